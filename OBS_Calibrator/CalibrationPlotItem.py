@@ -1,5 +1,3 @@
-import numpy as np
-import matplotlib.pyplot as plt
 from PySide6.QtCore import QObject, Signal, Property, Slot
 from PySide6.QtGui import QImage
 from PySide6.QtQuick import QQuickImageProvider
@@ -18,6 +16,10 @@ class CalibrationPlotItem(QObject):
         self._r2 = ""
 
     def generate_plot(self, x_values, y_values):
+        # matplotlib adds more to startup than the rest of the application, it is loaded with the first fit
+        import numpy as np
+        import matplotlib.pyplot as plt
+
         x = np.array(x_values)
         y = np.array(y_values)
 
@@ -81,7 +81,7 @@ Frame {
             font.pointSize: 12
             font.family: "PT Mono"
             from: 1
-            to: 256
+            to: 100000
             up.indicator: Item {}
             down.indicator: Item {}
             contentItem: TextInput {
@@ -157,20 +157,23 @@ Frame {
             }
         }
 
-        ScrollView {
+        ListView {
+            id: samplesListView
+            objectName: "samplesListView"
             width: 143
             height: 214
-
-            TextArea {
-                id: samplesTextArea
-                objectName: "samplesTextArea"
-                width: parent.width
-                height: parent.height
-                horizontalAlignment: Text.AlignLeft
-                wrapMode: Text.WordWrap
-                placeholderText: qsTr("")
-                cursorVisible: true
-                readOnly: true
+            clip: true
+            // Rows are added in batches by the controller's SampleListModel
+            reuseItems: true
+            ScrollBar.vertical: ScrollBar {}
+            onCountChanged: positionViewAtEnd()
+
+            delegate: Text {
+                required property string display
+                width: ListView.view.width
+                leftPadding: 6
+                text: display
+                color: samplesListView.palette.text
                 font.pointSize: 12
                 font.family: "PT Mono"
             }
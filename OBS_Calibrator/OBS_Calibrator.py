@@ -1,16 +1,30 @@
 
+import time
+
+# --profile-startup times the imports from here
+STARTUP_TIME = time.perf_counter()
+
 from pathlib import Path
 
 import sys
 import os
 import csv
+import json
+import math
+import argparse
 
-from PySide6.QtCore import QObject, QUrl, Slot
+from PySide6.QtCore import QObject, QUrl, QTimer, Slot, Qt
 from PySide6.QtGui import QGuiApplication
 from PySide6.QtQml import QQmlApplicationEngine
 
 from CalibrationPlotItem import CalibrationPlotItem
 from Sensor_Thread import SensorThread
+from running_stats import MAX_RELATIVE_STDEV, CONVERGED, UNSTABLE
+from sampler import DEFAULT_SAMPLE_RATE, STOPPED
+from sample_store import SampleListModel, FLUSH_INTERVAL
+from sensor_backend import SensorError, VCNL4010Backend, RecordingSensorBackend, SENSOR_ERROR
+from settling import NOT_SETTLED, DEFAULT_SETTLE_WINDOW, DEFAULT_SETTLE_TIMEOUT
+from simulated_sensor import SyntheticSensorBackend, ReplaySensorBackend
 from Python.autogen.settings import url, import_paths
 
 os.environ["QT_QUICK_CONTROLS_STYLE"] = "Fusion"
@@ -28,6 +42,14 @@ class UIController(QObject):
 
         # Grab references to all the things we're going to need often
         self.ntu_components = [self.root.findChild(QObject, f"ntuComponent{i}") for i in range(10)]
+        # Readings of each calibration point, shown in its sample list
+        self.sample_models = [SampleListModel(parent=self) for _ in range(10)]
+        # Running statistics of the active point, shown at most once a frame
+        self.latest_statistics = None
+        self.statisticsTimer = QTimer(self)
+        self.statisticsTimer.setSingleShot(True)
+        self.statisticsTimer.setInterval(FLUSH_INTERVAL)
+        self.statisticsTimer.timeout.connect(self.show_statistics)
         self.serialNumberTextField = self.root.findChild(QObject, "serialNumberTextField")
         self.num_calibration_points_spinbox = self.root.findChild(QObject, "numCalibrationPointsSpinBox")
         self.saveSampleDataButton = self.root.findChild(QObject, "saveSampleData")
@@ -44,7 +66,13 @@ class UIController(QObject):
                 if reset_button:
                     reset_button.clicked.connect(lambda idx=i: self.reset_component(idx))
 
+                samples_list_view = component.findChild(QObject, "samplesListView")
+                if samples_list_view:
+                    samples_list_view.setProperty("model", self.sample_models[i])
+
         self.sensor_thread.proximity_read.connect(self.update_samples_text_area)
+        self.sensor_thread.statistics_updated.connect(self.update_statistics)
+        self.sensor_thread.message.connect(self.show_sensor_message)
         self.sensor_thread.finished.connect(self.handle_sensor_finished)
         self.find_equation_button.clicked.connect(self.generate_plot)
 
@@ -57,14 +85,31 @@ class UIController(QObject):
             if field:
                 field.setProperty("enabled", True)
 
-    @Slot(float, float)
-    def handle_sensor_finished(self, mean, stdev):
+    @Slot(float, float, str)
+    def handle_sensor_finished(self, mean, stdev, stop_reason):
         if self.active_component_index is None:
             return
 
+        if stop_reason == STOPPED:
+            # Reset already cleared the point. The run may also have been stopped to start another, which is still
+            # going when this arrives
+            if not self.sensor_thread.isRunning():
+                self.enable_calibration_controls()
+            return
+
+        # The final statistics replace any live update still waiting to be shown
+        self.statisticsTimer.stop()
+
         component = self.ntu_components[self.active_component_index]
         self.enable_sampling_controls(component)
 
+        count = len(self.sample_models[self.active_component_index].buffer)
+        if stop_reason == CONVERGED:
+            print(f"Calibration point {self.active_component_index + 1} converged after {count} samples")
+        elif stop_reason == UNSTABLE:
+            print(f"Calibration point {self.active_component_index + 1} stopped after {count} samples, the "
+                  f"readings are too unstable to pass")
+
         average_spinbox = component.findChild(QObject, "averageSpinBox")
         stdev_spinbox = component.findChild(QObject, "stdevSpinBox")
 
@@ -73,7 +118,9 @@ class UIController(QObject):
 
         if stdev_spinbox:
             stdev_spinbox.setProperty("value", stdev)
-            if mean > 0 and stdev > 0.01 * mean:
+            # A point that never settled or lost the sensor has no samples to judge, it has to be run again
+            if count == 0 or stop_reason in (NOT_SETTLED, SENSOR_ERROR) or \
+                    (mean > 0 and stdev > MAX_RELATIVE_STDEV * mean):
                 stdev_spinbox.setProperty("textColor", "red")
                 self.cal_point_complete[self.active_component_index] = False
             else:
@@ -81,6 +128,9 @@ class UIController(QObject):
                 self.cal_point_complete[self.active_component_index] = True
                 self.checkFindEquation()
 
+        self.enable_calibration_controls()
+
+    def enable_calibration_controls(self):
         for i in range(self.root.findChild(QObject, "numCalibrationPointsSpinBox").property("value")):
             self.ntu_components[i].setProperty("enabled", True)
 
@@ -97,9 +147,8 @@ class UIController(QObject):
         component = self.ntu_components[index]
         self.enable_sampling_controls(component)
 
-        samples_text_area = component.findChild(QObject, "samplesTextArea")
-        if samples_text_area:
-            samples_text_area.setProperty("text", "")
+        self.sample_models[index].clear()
+        self.statisticsTimer.stop()
 
         average_spinbox = component.findChild(QObject, "averageSpinBox")
         if average_spinbox:
@@ -155,15 +204,37 @@ class UIController(QObject):
         # Start the sensor thread running
         self.sensor_thread.start()
 
-    @Slot(int)
-    def update_samples_text_area(self, value):
+    @Slot(int, float)
+    def update_samples_text_area(self, value, timestamp):
         if self.active_component_index is not None:
-            component = self.ntu_components[self.active_component_index]
-            text_area = component.findChild(QObject, "samplesTextArea")
-            if text_area:
-                current_text = text_area.property("text") or ""
-                new_text = f"{current_text}\n{value}" if current_text else str(value)
-                text_area.setProperty("text", new_text)
+            self.sample_models[self.active_component_index].append(value, timestamp)
+
+    @Slot(str)
+    def show_sensor_message(self, text):
+        if self.active_component_index is not None:
+            print(f"Calibration point {self.active_component_index + 1}: {text}")
+
+    @Slot(int, float, float)
+    def update_statistics(self, count, mean, stdev):
+        self.latest_statistics = (count, mean, stdev)
+        if not self.statisticsTimer.isActive():
+            self.statisticsTimer.start()
+
+    @Slot()
+    def show_statistics(self):
+        if self.active_component_index is None or self.latest_statistics is None:
+            return
+
+        count, mean, stdev = self.latest_statistics
+        component = self.ntu_components[self.active_component_index]
+
+        average_spinbox = component.findChild(QObject, "averageSpinBox")
+        if average_spinbox:
+            average_spinbox.setProperty("value", mean)
+
+        stdev_spinbox = component.findChild(QObject, "stdevSpinBox")
+        if stdev_spinbox and count >= 2:
+            stdev_spinbox.setProperty("value", stdev)
 
     @Slot(str)
     def saveSampleData(self, file_url):
@@ -178,42 +249,25 @@ class UIController(QObject):
             print("File path is empty after processing.")
             return
 
-        all_samples = []
+        points = []
 
         for i in range(self.num_points):
             if self.cal_point_complete[i]:
-                component = self.ntu_components[i]
-
-                try:
-                    concentration_field = component.findChild(QObject, "ntuConcentrationSpinBox")
-                    sample_area = component.findChild(QObject, "samplesTextArea")
-
-                    if not concentration_field or not sample_area:
-                        continue  # Skip if either child is missing
-
-                    concentration = float(concentration_field.property("value"))
-                    sample_lines = sample_area.property("text").splitlines()
-
-                    for line in sample_lines:
-                        line = line.strip()
-                        if line:
-                            try:
-                                reading = int(line)
-                                all_samples.append((concentration, reading))
-                            except ValueError:
-                                continue  # Skip invalid lines
-                except Exception as e:
-                    print(f"Error processing component: {e}")
+                concentration_field = self.ntu_components[i].findChild(QObject, "ntuConcentrationSpinBox")
+                if not concentration_field:
                     continue
 
-        # Sort samples by NTU concentration
-        all_samples.sort(key=lambda x: x[0])
+                points.append((float(concentration_field.property("value")), self.sample_models[i].buffer.values))
+
+        # Sort samples by NTU concentration, readings keep the order they were taken in
+        points.sort(key=lambda point: point[0])
 
         try:
             with open(file_path, mode='w', newline='') as file:
                 writer = csv.writer(file)
                 writer.writerow(["NTU concentration", "sensor reading"])
-                writer.writerows(all_samples)
+                for concentration, readings in points:
+                    writer.writerows(zip([concentration] * len(readings), readings.tolist()))
             print(f"Sample data saved to {file_path}")
         except Exception as e:
             print(f"Error saving file: {e}")
@@ -231,9 +285,110 @@ class UIController(QObject):
     def generate_plot(self):
         pass
 
+
+def positive_float(text):
+    try:
+        value = float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{text!r} is not a number")
+    if not 0 < value < math.inf:
+        raise argparse.ArgumentTypeError(f"must be a number greater than 0, not {text}")
+    return value
+
+
+def parse_step(text):
+    """A --step argument, SECONDS:COUNTS."""
+    try:
+        at, counts = text.split(":")
+        return float(at), float(counts)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected SECONDS:COUNTS, not {text!r}")
+
+
+def open_sensor_backend(args):
+    """The SensorBackend chosen on the command line. Raises SensorError if it cannot be opened."""
+    if args.replay:
+        backend = ReplaySensorBackend(args.replay, speed=args.replay_speed)
+    elif args.sensor == VCNL4010Backend.name:
+        backend = VCNL4010Backend()
+    else:
+        backend = SyntheticSensorBackend(noise=args.noise, drift=args.drift, steps=args.step, seed=args.seed)
+
+    if args.record:
+        backend = RecordingSensorBackend(backend, args.record)
+    return backend
+
+
+def report_startup(marks, json_path):
+    """Prints the time between consecutive (name, time.perf_counter()) marks, and writes them to json_path if given."""
+    phases = {name: end - start for (_, start), (name, end) in zip(marks, marks[1:])}
+    total = marks[-1][1] - marks[0][1]
+
+    print("Startup profile:")
+    for name, seconds in phases.items():
+        print(f"  {name:<16}{seconds * 1000:8.1f} ms")
+    print(f"  {'total':<16}{total * 1000:8.1f} ms")
+
+    if json_path:
+        # Wall clock time of the first frame, startup_benchmark.py compares it with the time it launched the process
+        finished_at = time.time() - (time.perf_counter() - marks[-1][1])
+        with open(json_path, 'w') as f:
+            json.dump({"phases": phases, "total": total, "finished_at": finished_at}, f)
+
+
 if __name__ == '__main__':
-    app = QGuiApplication(sys.argv)
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--profile-startup', nargs='?', const='', default=None, metavar='JSON',
+                        help='Print the time taken by each step of startup up to the first frame, then exit. The '
+                             'timings are also written to JSON if a file name is given')
+    parser.add_argument('--sample-rate', type=positive_float, default=DEFAULT_SAMPLE_RATE, metavar='HZ',
+                        help=f'Sensor readings per second (default {DEFAULT_SAMPLE_RATE:g})')
+    parser.add_argument('--target-sem', type=float, default=None, metavar='COUNTS',
+                        help='Stop a calibration point early once the standard error of its mean is down to this many '
+                             'sensor counts, or once it is clearly too unstable to pass. The number of samples is '
+                             'then the most taken. By default every point takes its full number of samples')
+    parser.add_argument('--settle-window', type=int, default=DEFAULT_SETTLE_WINDOW, metavar='READINGS',
+                        help=f'Wait until the trend and spread of this many consecutive readings are steady before '
+                             f'keeping samples for a point, 0 to keep them from the first reading (default '
+                             f'{DEFAULT_SETTLE_WINDOW})')
+    parser.add_argument('--settle-timeout', type=float, default=DEFAULT_SETTLE_TIMEOUT, metavar='SECONDS',
+                        help=f'Abandon a point whose readings have not settled after this long (default '
+                             f'{DEFAULT_SETTLE_TIMEOUT:g})')
+
+    sensor_group = parser.add_argument_group('sensor')
+    sensor_group.add_argument('--sensor', choices=[VCNL4010Backend.name, SyntheticSensorBackend.name],
+                              default=SyntheticSensorBackend.name,
+                              help=f'Read the VCNL4010 on the I2C bus, or generate readings (default '
+                                   f'{SyntheticSensorBackend.name})')
+    sensor_group.add_argument('--noise', type=float, default=12.0, metavar='COUNTS',
+                              help='Standard deviation of the generated readings (default 12)')
+    sensor_group.add_argument('--drift', type=float, default=0.0, metavar='COUNTS',
+                              help='Drift of the generated readings per second (default 0)')
+    sensor_group.add_argument('--step', type=parse_step, action='append', default=[], metavar='SECONDS:COUNTS',
+                              help='Shift the generated readings by COUNTS from SECONDS after the first reading, can '
+                                   'be given more than once')
+    sensor_group.add_argument('--seed', type=int, default=None, help='Seed for repeatable generated readings')
+    sensor_group.add_argument('--record', default=None, metavar='CAPTURE',
+                              help='Write every raw reading, with its time, to the CSV file CAPTURE')
+    sensor_group.add_argument('--replay', default=None, metavar='CAPTURE',
+                              help='Play back a capture written with --record instead of reading a sensor, at the rate '
+                                   'it was recorded at (--sample-rate is ignored)')
+    sensor_group.add_argument('--replay-speed', type=positive_float, default=1.0, metavar='FACTOR',
+                              help='Play the capture back this many times faster (default 1)')
+    # Anything else is left for Qt
+    args, qt_args = parser.parse_known_args()
+
+    try:
+        backend = open_sensor_backend(args)
+    except SensorError as e:
+        print(e, file=sys.stderr)
+        sys.exit(2)
+
+    marks = [("start", STARTUP_TIME), ("imports", time.perf_counter())]
+
+    app = QGuiApplication(sys.argv[:1] + qt_args)
     engine = QQmlApplicationEngine()
+    marks.append(("QGuiApplication", time.perf_counter()))
 
     app_dir = Path(__file__).parent
 
@@ -244,10 +399,12 @@ if __name__ == '__main__':
     engine.load(os.fspath(app_dir/url))
     if not engine.rootObjects():
         sys.exit(-1)
+    marks.append(("QML load", time.perf_counter()))
 
     root_object = engine.rootObjects()[0]
 
-    sensor_thread = SensorThread()
+    sensor_thread = SensorThread(backend, sample_rate=args.sample_rate, target_sem=args.target_sem,
+                                 settle_window=args.settle_window, settle_timeout=args.settle_timeout)
     controller = UIController(root_object, sensor_thread)  # Your controller class instance
     engine.rootContext().setContextProperty("controller", controller)
 
@@ -255,5 +412,19 @@ if __name__ == '__main__':
 
     # Stop the thread when the app is about to quit
     app.aboutToQuit.connect(sensor_thread.stop)
-
-    sys.exit(app.exec())
\ No newline at end of file
+    marks.append(("controller", time.perf_counter()))
+
+    if args.profile_startup is not None:
+        def report_first_frame():
+            root_object.frameSwapped.disconnect(report_first_frame)
+            marks.append(("first frame", time.perf_counter()))
+            report_startup(marks, args.profile_startup)
+            app.quit()
+
+        # Queued, frameSwapped is emitted from the render thread
+        root_object.frameSwapped.connect(report_first_frame, Qt.ConnectionType.QueuedConnection)
+
+    exit_code = app.exec()
+    sensor_thread.wait()
+    backend.close()
+    sys.exit(exit_code)
\ No newline at end of file
@@ -1,55 +1,102 @@
-import random
-# import board
-# import adafruit_vcnl4010
-import statistics
-import time
+import itertools
 from PySide6.QtCore import Signal, QThread, Slot
 
+from running_stats import RunningStats, EarlyStop
+from sampler import PeriodicSampler, DEFAULT_SAMPLE_RATE, STOPPED
+from sensor_backend import SensorError, SENSOR_ERROR
+from settling import SettlingDetector, SETTLED, NOT_SETTLED, DEFAULT_SETTLE_WINDOW, DEFAULT_SETTLE_TIMEOUT
+
 
 class SensorThread(QThread):
-    proximity_read = Signal(int)
-    finished = Signal(float, float)
+    proximity_read = Signal(int, float)  # reading, timestamp (seconds since the epoch)
+    statistics_updated = Signal(int, float, float)  # readings so far, their mean, their standard deviation
+    message = Signal(str)  # progress to report to the operator
+    # mean, standard deviation, why the run ended before sample_count ("" if it did not): running_stats.CONVERGED or
+    # UNSTABLE, settling.NOT_SETTLED, sensor_backend.SENSOR_ERROR or sampler.STOPPED
+    finished = Signal(float, float, str)
 
-    def __init__(self, parent=None):
+    def __init__(self, backend, parent=None, sample_rate=DEFAULT_SAMPLE_RATE, target_sem=None,
+                 settle_window=DEFAULT_SETTLE_WINDOW, settle_timeout=DEFAULT_SETTLE_TIMEOUT):
         super().__init__(parent)
         self.sample_count = 10  # Default value
-        self._running = False
+        # Standard error of the mean (counts) to stop at before sample_count, None to always take sample_count
+        self.target_sem = target_sem
+        # Readings the signal must be steady over before samples are kept, 0 to keep them from the start
+        self.settle_window = settle_window
+        self.settle_timeout = settle_timeout
+        # sensor_backend.SensorBackend the readings come from, read at its own rate if it has one
+        self.backend = backend
+        self.sampler = PeriodicSampler(backend.read, backend.rate or sample_rate)
+
     def set_sample_count(self, count: int):
         self.sample_count = count
+
+    def set_sample_rate(self, rate: float):
+        self.sampler.rate = self.backend.rate or rate
+
+    def set_target_sem(self, target_sem):
+        self.target_sem = target_sem
+
+    def settle(self, readings):
+        """Reads until the signal has settled, returns False if it did not within settle_timeout or was stopped."""
+        detector = SettlingDetector(self.settle_window, self.settle_timeout)
+        self.message.emit(f"Waiting for the readings to settle, up to {self.settle_timeout:g} s")
+
+        for sample in readings:
+            state = detector.add(sample.value, sample.timestamp)
+            if state == SETTLED:
+                self.message.emit(f"Settled after {detector.diagnostics()}")
+                return True
+            if state == NOT_SETTLED:
+                self.message.emit(f"Readings did not settle after {detector.diagnostics()}")
+                return False
+
+        return False
+
     def run(self):
-        self._running = True
-        # i2c = board.I2C()
-        # sensor = adafruit_vcnl4010.VCNL4010(i2c)
-        samples = []
+        try:
+            self.sample()
+        except SensorError as e:
+            self.message.emit(str(e))
+            self.finished.emit(0, 0, SENSOR_ERROR)
+
+    def sample(self):
+        stats = RunningStats()
+        early_stop = EarlyStop(self.target_sem) if self.target_sem else None
+        stop_reason = ""
         proximity = 0
 
-        for i in range(self.sample_count):
-            if self._running:
-                # proximity = sensor.proximity
-                proximity = random.randint(32750,32790)
-                samples.append(proximity)
-                self.proximity_read.emit(proximity)
-                if i < (self.sample_count - 1):
-                    for i in range(999):
-                        if not self._running:
-                            break
-                        else:
-                            time.sleep(0.001)
-
-        if self.sample_count >= 2 and self._running:
-            mean = statistics.mean(samples)
-            stdev = statistics.stdev(samples)
-
-            self._running = False
+        # One schedule for settling and sampling, so the first kept sample follows the last settling reading a
+        # period later
+        readings = self.sampler.samples()
+
+        if self.settle_window and not self.settle(readings):
+            self.finished.emit(0, 0, STOPPED if self.sampler.stopped() else NOT_SETTLED)
+            return
+
+        for sample in itertools.islice(readings, self.sample_count):
+            proximity = sample.value
+            stats.add(proximity)
+            self.proximity_read.emit(proximity, sample.timestamp)
+            self.statistics_updated.emit(stats.count, stats.mean, stats.stdev)
+
+            if early_stop is not None:
+                stop_reason = early_stop.check(stats) or ""
+                if stop_reason:
+                    break
+
+        if self.sampler.stopped():
+            stop_reason = STOPPED
+
+        if stats.count >= 2 and stop_reason != STOPPED:
+            mean = stats.mean
+            stdev = stats.stdev
         else:
             mean = proximity
             stdev = 0
 
-        self.finished.emit(mean, stdev)
-
+        self.finished.emit(mean, stdev, stop_reason)
 
     @Slot()
     def stop(self):
-        self._running = False
-
-
+        self.sampler.stop()
@@ -0,0 +1,69 @@
+import math
+
+# A calibration point is rejected if the standard deviation of its readings is more than this fraction of their mean
+MAX_RELATIVE_STDEV = 0.01
+# Readings taken before an adaptive point may stop, whatever its statistics look like
+MIN_ADAPTIVE_SAMPLES = 10
+# One sided normal quantile for "clearly unstable", 99% confidence
+UNSTABLE_Z = 2.33
+
+CONVERGED = "converged"
+UNSTABLE = "unstable"
+
+
+class RunningStats:
+    """Mean and variance of a stream of readings, updated one reading at a time with Welford's method."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared differences from the mean
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self):
+        """Sample variance, 0 until there are two readings."""
+        return self.m2 / (self.count - 1) if self.count >= 2 else 0.0
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.variance)
+
+    @property
+    def standard_error(self):
+        """Standard error of the mean."""
+        return self.stdev / math.sqrt(self.count) if self.count else math.inf
+
+
+class EarlyStop:
+    """
+    Decides when an adaptive calibration point has enough readings: once the standard error of the mean is down to
+    target_sem (in sensor counts) with the standard deviation inside MAX_RELATIVE_STDEV, or as soon as the standard
+    deviation is above that limit with 99% confidence, when further readings would not save the point.
+    """
+
+    def __init__(self, target_sem, min_samples=MIN_ADAPTIVE_SAMPLES, max_relative_stdev=MAX_RELATIVE_STDEV):
+        self.target_sem = target_sem
+        self.min_samples = max(2, min_samples)
+        self.max_relative_stdev = max_relative_stdev
+
+    def check(self, stats):
+        """CONVERGED or UNSTABLE if sampling should stop after the readings in stats, otherwise None."""
+        if stats.count < self.min_samples:
+            return None
+
+        limit = self.max_relative_stdev * abs(stats.mean)
+        # Lower confidence bound of the standard deviation, from the normal approximation of its sampling distribution
+        stdev_lower_bound = stats.stdev / (1 + UNSTABLE_Z / math.sqrt(2 * (stats.count - 1)))
+        if stdev_lower_bound > limit:
+            return UNSTABLE
+
+        if stats.standard_error <= self.target_sem and stats.stdev <= limit:
+            return CONVERGED
+
+        return None
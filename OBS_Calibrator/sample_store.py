@@ -0,0 +1,125 @@
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QTimer, Slot
+
+# Capacity of a buffer when its first reading arrives, doubled whenever it fills up
+INITIAL_CAPACITY = 1024
+# Appended readings are collected and shown at most this often (milliseconds), about once a frame
+FLUSH_INTERVAL = 16
+
+
+class SampleBuffer:
+    """
+    The readings of one calibration point and their timestamps, in NumPy arrays that double in size when full so
+    appending stays cheap however long the point runs.
+    """
+
+    def __init__(self):
+        self._values = None
+        self._timestamps = None
+        self.count = 0
+
+    @staticmethod
+    def _empty(capacity, dtype):
+        # NumPy is loaded with the first reading (or first look at the readings) rather than at startup
+        import numpy as np
+
+        return np.empty(capacity, dtype=getattr(np, dtype))
+
+    def _allocate(self, capacity):
+        values = self._empty(capacity, "int32")
+        timestamps = self._empty(capacity, "float64")
+        if self.count:
+            values[:self.count] = self._values[:self.count]
+            timestamps[:self.count] = self._timestamps[:self.count]
+        self._values = values
+        self._timestamps = timestamps
+
+    def append(self, value, timestamp):
+        if self._values is None:
+            self._allocate(INITIAL_CAPACITY)
+        elif self.count == len(self._values):
+            self._allocate(max(INITIAL_CAPACITY, 2 * len(self._values)))
+
+        self._values[self.count] = value
+        self._timestamps[self.count] = timestamp
+        self.count += 1
+
+    def clear(self):
+        # The arrays are kept for the next run
+        self.count = 0
+
+    @property
+    def values(self):
+        """Readings so far, a view into the buffer that is only valid until the next append."""
+        if self._values is None:
+            return self._empty(0, "int32")
+        return self._values[:self.count]
+
+    @property
+    def timestamps(self):
+        if self._timestamps is None:
+            return self._empty(0, "float64")
+        return self._timestamps[:self.count]
+
+    def __len__(self):
+        return self.count
+
+
+class SampleListModel(QAbstractListModel):
+    """
+    List model of a SampleBuffer for the QML sample list. Readings go into the buffer as they arrive, and are added
+    to the model in one batch every FLUSH_INTERVAL, so the view updates once a frame however fast the sensor reads.
+    """
+
+    ValueRole = Qt.ItemDataRole.UserRole + 1
+    TimestampRole = Qt.ItemDataRole.UserRole + 2
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.buffer = SampleBuffer()
+        # Rows the view knows about, the buffer may be ahead until the next flush
+        self.rows = 0
+
+        self.flushTimer = QTimer(self)
+        self.flushTimer.setSingleShot(True)
+        self.flushTimer.setInterval(FLUSH_INTERVAL)
+        self.flushTimer.timeout.connect(self.flush)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.rows
+
+    def roleNames(self):
+        return {Qt.ItemDataRole.DisplayRole: b"display", self.ValueRole: b"value", self.TimestampRole: b"timestamp"}
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= self.rows:
+            return None
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            return str(self.buffer.values[index.row()])
+        if role == self.ValueRole:
+            return int(self.buffer.values[index.row()])
+        if role == self.TimestampRole:
+            return float(self.buffer.timestamps[index.row()])
+        return None
+
+    def append(self, value, timestamp):
+        self.buffer.append(value, timestamp)
+        if not self.flushTimer.isActive():
+            self.flushTimer.start()
+
+    @Slot()
+    def flush(self):
+        self.flushTimer.stop()
+        if self.rows == len(self.buffer):
+            return
+
+        self.beginInsertRows(QModelIndex(), self.rows, len(self.buffer) - 1)
+        self.rows = len(self.buffer)
+        self.endInsertRows()
+
+    def clear(self):
+        self.flushTimer.stop()
+        self.beginResetModel()
+        self.buffer.clear()
+        self.rows = 0
+        self.endResetModel()
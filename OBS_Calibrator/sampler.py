@@ -0,0 +1,76 @@
+import math
+import threading
+import time
+from dataclasses import dataclass
+
+# Readings per second
+DEFAULT_SAMPLE_RATE = 1.0
+# Reason a run of readings ended early when stop() was called
+STOPPED = "stopped"
+
+
+@dataclass
+class Sample:
+    value: int
+    timestamp: float  # seconds since the epoch, when the reading was taken
+
+
+class PeriodicSampler:
+    """
+    Calls read() at a fixed rate (Hz) and yields each reading as a Sample.
+
+    Every reading is scheduled against a deadline on the monotonic clock, counted from the first one, so time spent
+    reading and scheduler jitter do not add up over a long run. Between readings the thread sleeps on an event, which
+    stop() sets to end the run at once from any thread. If a reading overruns its slot the missed slots are skipped
+    rather than read back to back, and counted in missed.
+    """
+
+    def __init__(self, read, rate=DEFAULT_SAMPLE_RATE):
+        self.read = read
+        self.rate = rate
+        self.stop_event = threading.Event()
+        self.missed = 0
+
+    @property
+    def rate(self):
+        return self._rate
+
+    @rate.setter
+    def rate(self, rate):
+        if not 0 < rate < math.inf:
+            raise ValueError(f"Sample rate must be positive, not {rate}")
+        self._rate = rate
+
+    def samples(self, count=None):
+        """Yields count Samples (endless if None), the first one straight away, until stop() is called."""
+        self.stop_event.clear()
+        self.missed = 0
+        period = 1.0 / self.rate
+        start = time.monotonic()
+        # Timestamps are taken off the monotonic clock too, so they are as evenly spaced as the readings
+        epoch_offset = time.time() - start
+        slot = 0
+        taken = 0
+
+        while count is None or taken < count:
+            deadline = start + slot * period
+            if self.stop_event.wait(max(0.0, deadline - time.monotonic())):
+                return
+
+            now = time.monotonic()
+            value = self.read()
+            yield Sample(value, now + epoch_offset)
+            taken += 1
+            if taken == count:
+                return
+
+            # Next slot still ahead of the clock
+            next_slot = max(slot + 1, int((time.monotonic() - start) / period) + 1)
+            self.missed += next_slot - slot - 1
+            slot = next_slot
+
+    def stop(self):
+        self.stop_event.set()
+
+    def stopped(self):
+        return self.stop_event.is_set()
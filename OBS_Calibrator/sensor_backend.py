@@ -0,0 +1,80 @@
+import csv
+import time
+
+# Stop reason SensorThread.finished gives when a run ends because the sensor could not be read
+SENSOR_ERROR = "sensor error"
+
+# Header of raw capture files written by RecordingSensorBackend and played back by ReplaySensorBackend
+CAPTURE_HEADER = ["timestamp", "proximity"]
+
+
+class SensorError(Exception):
+    pass
+
+
+class SensorBackend:
+    """Something that gives proximity readings: the VCNL4010, or a simulator for hardware-free testing."""
+
+    name = ""
+    # Readings per second the backend must be read at, or None to read at the calibrator's sample rate
+    rate = None
+
+    def read(self):
+        """Takes one proximity reading (counts). Raises SensorError if the sensor cannot be read."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class VCNL4010Backend(SensorBackend):
+    """The VCNL4010 proximity sensor on the I2C bus, through Adafruit Blinka."""
+
+    name = "vcnl4010"
+
+    def __init__(self):
+        # Only installed on the calibration rig
+        try:
+            import board
+            import adafruit_vcnl4010
+        except ImportError as e:
+            raise SensorError(f"The VCNL4010 driver is not installed ({e}), install adafruit-circuitpython-vcnl4010")
+
+        try:
+            self.i2c = board.I2C()
+            self.sensor = adafruit_vcnl4010.VCNL4010(self.i2c)
+        except (OSError, ValueError, RuntimeError) as e:
+            raise SensorError(f"Unable to open the VCNL4010: {e}")
+
+    def read(self):
+        try:
+            return self.sensor.proximity
+        except OSError as e:
+            raise SensorError(f"Unable to read the VCNL4010: {e}")
+
+    def close(self):
+        self.i2c.deinit()
+
+
+class RecordingSensorBackend(SensorBackend):
+    """Passes the readings of another backend through, writing each one with its time to a raw capture file."""
+
+    def __init__(self, backend, path):
+        self.backend = backend
+        self.name = backend.name
+        self.rate = backend.rate
+        try:
+            self.file = open(path, 'w', newline='')
+        except OSError as e:
+            raise SensorError(f"Unable to write capture {path}: {e}")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(CAPTURE_HEADER)
+
+    def read(self):
+        value = self.backend.read()
+        self.writer.writerow([f"{time.time():.6f}", value])
+        return value
+
+    def close(self):
+        self.file.close()
+        self.backend.close()
@@ -0,0 +1,90 @@
+import math
+import statistics
+from collections import deque
+
+from running_stats import MAX_RELATIVE_STDEV
+
+# Readings in the rolling window the signal must be steady over
+DEFAULT_SETTLE_WINDOW = 10
+# Seconds to wait for the signal to settle before the point is abandoned
+DEFAULT_SETTLE_TIMEOUT = 120.0
+# How far the trend of the window may move from its first reading to its last, as a fraction of the window mean
+MAX_WINDOW_DRIFT = 0.002
+
+SETTLED = "settled"
+NOT_SETTLED = "not settled"
+
+
+class SettlingDetector:
+    """
+    Watches readings taken after the sensor is moved into a new standard, until they have settled: over the last
+    window readings the least squares trend moves by no more than MAX_WINDOW_DRIFT of their mean and their standard
+    deviation is within MAX_RELATIVE_STDEV. add() returns SETTLED then, or NOT_SETTLED once timeout seconds have passed
+    without that happening.
+    """
+
+    def __init__(self, window=DEFAULT_SETTLE_WINDOW, timeout=DEFAULT_SETTLE_TIMEOUT, max_drift=MAX_WINDOW_DRIFT,
+                 max_relative_stdev=MAX_RELATIVE_STDEV):
+        self.window = max(3, window)
+        self.timeout = timeout
+        self.max_drift = max_drift
+        self.max_relative_stdev = max_relative_stdev
+        self.readings = deque(maxlen=self.window)
+        self.count = 0
+        self.start = None
+        self.mean = math.nan
+        self.slope = math.nan  # counts per second
+        self.stdev = math.nan
+
+    def add(self, value, timestamp):
+        """Adds a reading taken at timestamp (seconds), returns SETTLED, NOT_SETTLED or None to keep waiting."""
+        if self.start is None:
+            self.start = timestamp
+        self.readings.append((timestamp, value))
+        self.count += 1
+
+        if len(self.readings) == self.window:
+            self.update()
+            if self.settled():
+                return SETTLED
+
+        if timestamp - self.start >= self.timeout:
+            return NOT_SETTLED
+        return None
+
+    def update(self):
+        times = [t - self.readings[0][0] for t, _ in self.readings]
+        values = [value for _, value in self.readings]
+        mean_time = statistics.fmean(times)
+        mean_value = statistics.fmean(values)
+        spread = sum((t - mean_time) ** 2 for t in times)
+
+        self.mean = mean_value
+        self.slope = sum((t - mean_time) * (value - mean_value) for t, value in zip(times, values)) / spread \
+            if spread else 0.0
+        self.stdev = statistics.stdev(values)
+
+    def window_duration(self):
+        return self.readings[-1][0] - self.readings[0][0]
+
+    def drift_limit(self):
+        return self.max_drift * abs(self.mean)
+
+    def stdev_limit(self):
+        return self.max_relative_stdev * abs(self.mean)
+
+    def settled(self):
+        return abs(self.slope) * self.window_duration() <= self.drift_limit() and self.stdev <= self.stdev_limit()
+
+    def elapsed(self):
+        return self.readings[-1][0] - self.start if self.readings else 0.0
+
+    def diagnostics(self):
+        """One line on how settling went, for the operator."""
+        summary = f"{self.elapsed():.1f} s ({self.count} readings)"
+        if len(self.readings) < self.window:
+            return f"{summary}, fewer readings than the {self.window} reading window"
+
+        return (f"{summary}, over the last {self.window} readings the trend moved "
+                f"{abs(self.slope) * self.window_duration():.1f} counts (limit {self.drift_limit():.1f}) and the "
+                f"standard deviation was {self.stdev:.1f} (limit {self.stdev_limit():.1f})")
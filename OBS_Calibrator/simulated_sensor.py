@@ -0,0 +1,84 @@
+import csv
+import math
+import random
+import statistics
+import time
+
+from sensor_backend import SensorBackend, SensorError, CAPTURE_HEADER
+
+# The VCNL4010 gives 16 bit proximity counts
+MAX_COUNTS = 65535
+
+
+class SyntheticSensorBackend(SensorBackend):
+    """
+    Readings generated around level (counts) with gaussian noise of the given standard deviation, a linear drift in
+    counts per second and steps, (seconds, counts) pairs that shift the level by counts from that many seconds after
+    the first reading on, like moving the sensor between standards. seed makes the noise repeatable.
+    """
+
+    name = "synthetic"
+
+    def __init__(self, level=32770.0, noise=12.0, drift=0.0, steps=(), seed=None):
+        self.level = level
+        self.noise = noise
+        self.drift = drift
+        self.steps = sorted(steps)
+        self.random = random.Random(seed)
+        self.start = None
+
+    def read(self):
+        now = time.monotonic()
+        if self.start is None:
+            self.start = now
+        elapsed = now - self.start
+
+        value = self.level + self.drift * elapsed + sum(counts for at, counts in self.steps if elapsed >= at)
+        value += self.random.gauss(0.0, self.noise)
+        return min(MAX_COUNTS, max(0, round(value)))
+
+
+class ReplaySensorBackend(SensorBackend):
+    """
+    Plays back a raw capture written with --record, at the rate it was recorded at multiplied by speed. Reading past
+    the end of the capture raises SensorError, or starts it again if loop is set.
+    """
+
+    name = "replay"
+
+    def __init__(self, path, speed=1.0, loop=False):
+        if not 0 < speed < math.inf:
+            raise SensorError(f"Replay speed must be positive, not {speed}")
+
+        try:
+            with open(path, newline='') as f:
+                rows = list(csv.reader(f))
+        except OSError as e:
+            raise SensorError(f"Unable to read capture {path}: {e}")
+
+        if rows and rows[0] == CAPTURE_HEADER:
+            rows = rows[1:]
+        try:
+            timestamps = [float(row[0]) for row in rows]
+            self.values = [int(row[1]) for row in rows]
+        except (ValueError, IndexError) as e:
+            raise SensorError(f"{path} is not a sensor capture: {e}")
+
+        intervals = [b - a for a, b in zip(timestamps, timestamps[1:]) if b > a]
+        if not intervals:
+            raise SensorError(f"{path} needs at least two readings to replay")
+
+        self.path = path
+        self.rate = speed / statistics.median(intervals)
+        self.loop = loop
+        self.position = 0
+
+    def read(self):
+        if self.position == len(self.values):
+            if not self.loop:
+                raise SensorError(f"End of capture {self.path} after {len(self.values)} readings")
+            self.position = 0
+
+        value = self.values[self.position]
+        self.position += 1
+        return value
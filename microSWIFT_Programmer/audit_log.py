@@ -0,0 +1,274 @@
+"""
+Audit log of every microSWIFT programmed, kept in a local SQLite database.
+
+    python microSWIFT_programmer.py audit --tracking_number 117
+    python microSWIFT_programmer.py audit --since 2026-06-01 --failed
+
+Each programming job is stored with its tracking number, probe serial, the SHA-256 of the firmware image, the
+configuration struct bytes, how long each phase took, the CLI exit codes and when it ran. Jobs are indexed by
+tracking number and by time, so looking up a unit stays instant however many jobs have been logged.
+
+Records are written on a background thread in batches, so logging never holds up programming. The database runs in
+WAL mode, so it can be queried while the programmer is writing to it.
+
+Nothing here imports Qt.
+"""
+import argparse
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from microSWIFT_config import unpack_config, describe_field, ConfigDecodeError
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "programming_audit.db")
+
+# Records queued within BATCH_WAIT seconds of each other are written in one transaction, up to BATCH_SIZE at a time
+BATCH_SIZE = 500
+BATCH_WAIT = 0.5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    started TEXT NOT NULL,          -- UTC, ISO 8601
+    tracking_number INTEGER,
+    probe_serial TEXT,
+    firmware_sha256 TEXT,
+    config BLOB,
+    success INTEGER NOT NULL,
+    duration REAL,                  -- seconds
+    phases TEXT NOT NULL,           -- JSON list of {"name", "success", "duration", "returncode"}
+    exit_codes TEXT NOT NULL,       -- JSON list, one per CLI session
+    backend TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_tracking_number ON jobs (tracking_number, started);
+CREATE INDEX IF NOT EXISTS jobs_started ON jobs (started);
+"""
+
+COLUMNS = ("started", "tracking_number", "probe_serial", "firmware_sha256", "config", "success", "duration", "phases",
+           "exit_codes", "backend")
+
+
+class AuditLogError(Exception):
+    pass
+
+
+@dataclass
+class AuditRecord:
+    started: str  # UTC, ISO 8601
+    tracking_number: int
+    probe_serial: str
+    firmware_sha256: str
+    config: bytes
+    success: bool
+    duration: float
+    phases: list = field(default_factory=list)  # PhaseResult fields as dicts
+    exit_codes: list = field(default_factory=list)
+    backend: str = ""
+    id: int = None
+
+    def row(self):
+        return (self.started, self.tracking_number, self.probe_serial, self.firmware_sha256, self.config,
+                int(self.success), self.duration, json.dumps(self.phases), json.dumps(self.exit_codes), self.backend)
+
+    @classmethod
+    def from_row(cls, row):
+        record_id, started, tracking_number, probe_serial, firmware_sha256, config, success, duration, phases, \
+            exit_codes, backend = row
+        return cls(started, tracking_number, probe_serial, firmware_sha256, config, bool(success), duration,
+                   json.loads(phases), json.loads(exit_codes), backend, record_id)
+
+    def local_start_time(self):
+        return datetime.fromisoformat(self.started).astimezone()
+
+
+def utc_timestamp():
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+
+def to_utc(text):
+    """Local date or date and time given on the command line, as a UTC timestamp comparable with started."""
+    try:
+        return datetime.fromisoformat(text).astimezone(timezone.utc).isoformat(timespec="milliseconds")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{text!r} is not a date (YYYY-MM-DD) or date and time (YYYY-MM-DDTHH:MM)")
+
+
+def connect(db_path):
+    connection = sqlite3.connect(db_path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    # WAL keeps the database consistent through a power cut at this level, only the last batch could be lost
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+class AuditLog:
+    """
+    Appends AuditRecords to the database at db_path from a writer thread. add() only queues the record, so it is
+    safe to call from programming threads. close() writes whatever is still queued.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def add(self, record):
+        with self.lock:
+            # Started with the first record, so opening the programmer costs nothing
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.write_records, daemon=True)
+                self.thread.start()
+        self.queue.put(record)
+
+    def close(self):
+        with self.lock:
+            thread, self.thread = self.thread, None
+        if thread is not None:
+            self.queue.put(None)
+            thread.join()
+
+    def write_records(self):
+        try:
+            connection = connect(self.db_path)
+        except sqlite3.Error as e:
+            print(f"Unable to open the audit log {self.db_path}: {e}", file=sys.stderr)
+            connection = None
+
+        stopping = False
+        while not stopping:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + BATCH_WAIT
+            while batch[-1] is not None and len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+
+            if batch[-1] is None:
+                stopping = True
+                batch.pop()
+
+            if connection is None or not batch:
+                continue
+
+            try:
+                with connection:
+                    connection.executemany(f"INSERT INTO jobs ({', '.join(COLUMNS)}) "
+                                           f"VALUES ({', '.join('?' * len(COLUMNS))})",
+                                           [record.row() for record in batch])
+            except sqlite3.Error as e:
+                print(f"Unable to write {len(batch)} records to the audit log: {e}", file=sys.stderr)
+
+        if connection is not None:
+            connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def query_jobs(db_path=DEFAULT_DB_PATH, tracking_number=None, probe_serial=None, since=None, until=None,
+               failed_only=False, limit=None):
+    """
+    AuditRecords matching every filter given, newest first. since and until are UTC timestamps (until exclusive).
+
+    Raises AuditLogError if there is no database at db_path.
+    """
+    if not os.path.isfile(db_path):
+        raise AuditLogError(f"No audit log at {db_path}")
+
+    conditions = []
+    parameters = []
+    for condition, value in (("tracking_number = ?", tracking_number), ("probe_serial = ?", probe_serial),
+                             ("started >= ?", since), ("started < ?", until)):
+        if value is not None:
+            conditions.append(condition)
+            parameters.append(value)
+    if failed_only:
+        conditions.append("success = 0")
+
+    sql = f"SELECT id, {', '.join(COLUMNS)} FROM jobs"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY started DESC, id DESC"
+    if limit is not None:
+        sql += " LIMIT ?"
+        parameters.append(limit)
+
+    try:
+        connection = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            return [AuditRecord.from_row(row) for row in connection.execute(sql, parameters)]
+        finally:
+            connection.close()
+    except sqlite3.Error as e:
+        raise AuditLogError(f"Unable to read the audit log {db_path}: {e}")
+
+
+def format_duration(seconds):
+    return "-" if seconds is None else f"{seconds:.1f} s"
+
+
+def print_record(record, show_config=False):
+    result = "PASS" if record.success else "FAIL"
+    print(f"{record.local_start_time():%Y-%m-%d %H:%M:%S}  microSWIFT {record.tracking_number}  "
+          f"probe {record.probe_serial or '-'}  {result}  {format_duration(record.duration)}")
+    print(f"    firmware {record.firmware_sha256 or '-'}  exit codes {', '.join(map(str, record.exit_codes)) or '-'}")
+    print("    " + ", ".join(f"{phase['name']} {format_duration(phase['duration'])}"
+                             f"{'' if phase['success'] else ' (failed)'}" for phase in record.phases))
+
+    if show_config and record.config:
+        try:
+            config = unpack_config(record.config).config
+        except ConfigDecodeError as e:
+            print(f"    configuration could not be decoded: {e}")
+        else:
+            for name, value in vars(config).items():
+                print(f"    {name:<32}{describe_field(name, value)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="microSWIFT_programmer.py audit", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help=f'Audit database (default {DEFAULT_DB_PATH})')
+    parser.add_argument('--tracking_number', type=int, default=None, help='Only jobs for this microSWIFT')
+    parser.add_argument('--probe', default=None, help='Only jobs run through this STLink serial number')
+    parser.add_argument('--since', type=to_utc, default=None, help='Only jobs from this local date/time on')
+    parser.add_argument('--until', type=to_utc, default=None, help='Only jobs before this local date/time')
+    parser.add_argument('--failed', action='store_true', help='Only jobs that failed')
+    parser.add_argument('--limit', type=int, default=20, help='Most recent jobs to list, 0 for all (default 20)')
+    parser.add_argument('--config', action='store_true', help='Also list the configuration written by each job')
+    parser.add_argument('--json', action='store_true', help='Print one JSON record per line')
+    args = parser.parse_args(argv)
+
+    try:
+        records = query_jobs(args.db, args.tracking_number, args.probe, args.since, args.until, args.failed,
+                             args.limit or None)
+    except AuditLogError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    for record in records:
+        if args.json:
+            print(json.dumps(dict(vars(record), config=record.config.hex() if record.config else None)))
+        else:
+            print_record(record, args.config)
+
+    if not args.json:
+        print(f"{len(records)} jobs")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""
+Headless batch programming driven by a manifest CSV, one microSWIFT per row.
+
+    python microSWIFT_programmer.py batch manifest.csv
+
+The manifest format is described in fleet_manifest.py. Each row is checked with the same rules as the Verify button,
+and one JSON record per unit is appended to the results file as it is programmed.
+
+Nothing here imports Qt.
+"""
+import argparse
+import dataclasses
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import requests
+
+from firmware_cache import FirmwareCache, FirmwareCacheError, FIRMWARE_URL, FIRMWARE_DIGEST_URL, FIRMWARE_FILENAME
+from audit_log import AuditLog, DEFAULT_DB_PATH
+from phase_timing import TimingTrace, format_timings
+from fleet_manifest import read_manifest, ManifestError
+from microSWIFT_config import pack_config
+from programming_job import ProgrammingJob, run_programming_job
+from simulated_backend import SimulatedProgrammerBackend
+from stm32_cli import STM32CubeProgrammerBackend
+
+
+def update_firmware(firmware_dir):
+    """Fetches the latest firmware like the GUI does. Returns False if there is no usable firmware."""
+    print("Checking GitHub for firmware updates...")
+    try:
+        result = FirmwareCache(firmware_dir).fetch(FIRMWARE_URL, digest_url=FIRMWARE_DIGEST_URL, timeout=10)
+    except (requests.RequestException, FirmwareCacheError, OSError) as e:
+        if os.path.isfile(os.path.join(firmware_dir, FIRMWARE_FILENAME)):
+            print(f"Firmware download failed ({e}), using the cached firmware.")
+            return True
+        print(f"Firmware download failed ({e}) and no cached firmware is available.", file=sys.stderr)
+        return False
+
+    print("Firmware successfully updated from GitHub." if result.updated else "Firmware is up to date with GitHub.")
+    return True
+
+
+def wait_for_unit(tracking_number):
+    """Asks the operator to connect the next unit. Returns False if they want to stop."""
+    try:
+        answer = input(f"Connect microSWIFT {tracking_number} and press Enter (q to stop): ")
+    except EOFError:
+        return False
+    return answer.strip().lower() not in ("q", "quit")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="microSWIFT_programmer.py batch", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('manifest', help='CSV file with one row per microSWIFT')
+    parser.add_argument('--results', default=None,
+                        help='JSON lines file results are appended to (default <manifest>_results.jsonl)')
+    parser.add_argument('--probe', default=None, help='Serial number of the STLink to use (default first found)')
+    parser.add_argument('--no_prompt', action='store_true',
+                        help='Program rows back to back without waiting for Enter between units')
+    parser.add_argument('--stop_on_failure', action='store_true', help='Stop at the first unit that fails')
+    parser.add_argument('--verbose', action='store_true', help='Print STM32_Programmer_CLI output')
+    parser.add_argument('--no_firmware_update', action='store_true', help='Disable automatic firmware download')
+    parser.add_argument('--separate_cli_sessions', action='store_true',
+                        help='Launch STM32_Programmer_CLI once per programming phase instead of a single session')
+    parser.add_argument('--full_flash', action='store_true',
+                        help='Always write the full firmware image instead of only the flash sectors that changed')
+    parser.add_argument('--audit_db', default=DEFAULT_DB_PATH,
+                        help='SQLite database every programmed unit is logged to')
+    parser.add_argument('--no_audit_log', action='store_true', help='Do not log programmed units to the database')
+    parser.add_argument('--timing_trace', default=None, metavar='FILE',
+                        help='Append the timing of every phase and CLI step to FILE, as JSON lines or as a Chrome '
+                             'trace if it ends in .json')
+    parser.add_argument('--simulate', action='store_true',
+                        help='Program simulated devices instead of using STM32_Programmer_CLI (no probe needed)')
+    parser.add_argument('--simulator_failure_rate', type=float, default=0.0,
+                        help='Chance that each simulated programming operation fails')
+    args = parser.parse_args(argv)
+
+    manifest_path = os.path.abspath(args.manifest)
+    results_path = os.path.abspath(args.results or os.path.splitext(manifest_path)[0] + "_results.jsonl")
+    timing_trace_path = os.path.abspath(args.timing_trace) if args.timing_trace else None
+
+    # Firmware paths are relative to the application folder, as in the GUI
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    os.chdir(app_dir)
+
+    try:
+        rows = read_manifest(manifest_path)
+    except ManifestError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    invalid = [row for row in rows if row.errors]
+    for row in invalid:
+        print(f"Line {row.line}: {'; '.join(row.errors)}", file=sys.stderr)
+    print(f"{len(rows)} units in manifest, {len(invalid)} with invalid settings.")
+
+    if args.simulate:
+        backend = SimulatedProgrammerBackend(failure_rate=args.simulator_failure_rate)
+    else:
+        backend = STM32CubeProgrammerBackend()
+
+    if not args.no_firmware_update and not update_firmware(os.path.join(app_dir, "firmware")):
+        return 2
+
+    probe_serial = args.probe
+    if probe_serial is None:
+        probes = backend.list_probes()
+        if not probes:
+            print("STLink programmer not detected.", file=sys.stderr)
+            return 2
+        probe_serial = probes[0].serial_number
+
+    passed = failed = 0
+
+    audit_log = AuditLog(args.audit_db) if not args.no_audit_log else None
+    trace = TimingTrace(timing_trace_path) if timing_trace_path else None
+
+    with tempfile.TemporaryDirectory() as work_dir, open(results_path, 'a') as results_file:
+        for row in rows:
+            record = {"line": row.line, "tracking_number": row.config.tracking_number, "probe_serial": probe_serial,
+                      "config": dataclasses.asdict(row.config)}
+
+            if row.errors:
+                record.update(result="invalid", errors=row.errors)
+            else:
+                if not args.no_prompt and not wait_for_unit(row.config.tracking_number):
+                    break
+
+                config_struct = pack_config(row.config)
+                config_path = os.path.join(work_dir, f"config_{row.config.tracking_number}.bin")
+                with open(config_path, 'wb') as f:
+                    f.write(config_struct)
+
+                job = ProgrammingJob(config_path=config_path, probe_serial=probe_serial,
+                                     single_session=not args.separate_cli_sessions, differential=not args.full_flash)
+                phases = []
+
+                def on_phase(name, success):
+                    phases.append({"name": name, "success": success})
+                    print(f"  {name}: {'done' if success else 'FAILED'}")
+
+                def on_timings(spans):
+                    print(f"  {format_timings(spans)}")
+                    if trace is not None:
+                        try:
+                            trace.write(spans)
+                        except OSError as e:
+                            print(f"Unable to write timings to {trace.path}: {e}", file=sys.stderr)
+
+                print(f"Programming microSWIFT {row.config.tracking_number}...")
+                started = datetime.now()
+                start = time.monotonic()
+                success = run_programming_job(job, print if args.verbose else lambda text: None,
+                                              lambda text: print(text, file=sys.stderr), on_phase, backend=backend,
+                                              audit_log=audit_log, on_timings=on_timings)
+
+                record.update(result="pass" if success else "fail", phases=phases,
+                              started=started.isoformat(timespec="seconds"),
+                              duration=round(time.monotonic() - start, 3), config_struct=config_struct.hex())
+                print(f"microSWIFT {row.config.tracking_number}: {'PASS' if success else 'FAIL'}")
+
+                if success:
+                    passed += 1
+                else:
+                    failed += 1
+
+            # Written unit by unit so the results survive the run being stopped part way through
+            results_file.write(json.dumps(record) + "\n")
+            results_file.flush()
+
+            if record["result"] == "fail" and args.stop_on_failure:
+                break
+
+    if audit_log is not None:
+        audit_log.close()
+
+    print(f"{passed} passed, {failed} failed, {len(invalid)} invalid. Results in {results_path}")
+    return 0 if failed == 0 and not invalid else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+Sweeps combinations of microSWIFT settings through the Verify button's timing rules to plan deployments.
+
+    python microSWIFT_programmer.py sweep --duty_cycle 30:180:10 --iridium_tx_time 5,10 --light
+
+Each setting takes a single value, a comma separated list, or an inclusive start:stop:step range. Every combination
+of the swept values is checked, vectorized with NumPy a duty cycle at a time. The tool prints, for each duty cycle,
+Iridium transmit time, GNSS fix wait and GNSS rate, the highest GNSS, light and turbidity sample counts that appear
+in a feasible combination. A feasibility grid of duty cycle against GNSS samples can be written as CSV with --grid_csv.
+
+Nothing here imports Qt.
+"""
+import argparse
+import csv
+import sys
+import time
+
+import numpy as np
+
+from microSWIFT_config import (feasibility_violations, GNSS_SAMPLE_RATES, MAX_DUTY_CYCLE, MAX_GNSS_SAMPLES,
+                               MAX_LIGHT_SAMPLES, MAX_TURBIDITY_SAMPLES)
+
+# Order of the axes of the combination grid
+AXES = ("duty_cycle", "iridium_tx_time", "gnss_wait", "gnss_rate", "gnss_samples", "light_samples",
+        "turbidity_samples")
+
+
+def parse_values(text):
+    """Parses "5", "4,5" or an inclusive "start:stop:step" range into a sorted array of unique values."""
+    try:
+        if ":" in text:
+            start, stop, step = (float(part) for part in text.split(":"))
+            if step <= 0:
+                raise ValueError("step must be positive")
+            values = np.arange(start, stop + step / 2, step)
+        else:
+            values = np.array([float(part) for part in text.split(",")])
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"{text!r} is not a value, list or start:stop:step range ({e})")
+
+    if values.size == 0 or np.any(values < 0):
+        raise argparse.ArgumentTypeError(f"{text!r} must give one or more non-negative values")
+
+    return np.unique(values)
+
+
+def parse_gnss_rates(text):
+    """parse_values for GNSS sample rates, which must be rates the GNSS supports."""
+    values = parse_values(text)
+    unsupported = [f"{value:g}" for value in values if value not in GNSS_SAMPLE_RATES]
+    if unsupported:
+        raise argparse.ArgumentTypeError(f"unsupported GNSS sample rate {', '.join(unsupported)}, must be one of "
+                                         f"{', '.join(map(str, GNSS_SAMPLE_RATES))}")
+    return values
+
+
+def sweep(values, light_enabled, turbidity_enabled):
+    """
+    Evaluates every combination of the swept values, values being {axis name: 1-D array} for each of AXES.
+
+    Returns a boolean array with one axis per entry of AXES, True where the combination passes every rule.
+    """
+    # Each setting gets its own axis so the rules broadcast over the full grid
+    grid = {name: values[name].reshape([-1 if axis == i else 1 for axis in range(len(AXES))])
+            for i, name in enumerate(AXES)}
+
+    violations = feasibility_violations(grid["gnss_samples"], grid["gnss_rate"], grid["duty_cycle"],
+                                        grid["iridium_tx_time"], grid["gnss_wait"],
+                                        light_enabled, grid["light_samples"],
+                                        turbidity_enabled, grid["turbidity_samples"])
+
+    shape = tuple(values[name].size for name in AXES)
+    violated = np.zeros(shape, dtype=bool)
+    for rule_violated in violations.values():
+        violated |= rule_violated
+
+    return ~violated
+
+
+def max_feasible(feasible, values, name, keep_axes):
+    """
+    Largest value along axis name that is part of a feasible combination, for every cell of keep_axes (NaN if there
+    is none). keep_axes must all come before name in AXES.
+    """
+    reduce_axes = tuple(i for i, axis_name in enumerate(AXES) if axis_name not in keep_axes and axis_name != name)
+    # Remaining axes are keep_axes followed by name
+    present = feasible.any(axis=reduce_axes)
+
+    last = present.shape[-1] - 1 - np.argmax(present[..., ::-1], axis=-1)
+    return np.where(present.any(axis=-1), values[name][last], np.nan)
+
+
+def format_count(value):
+    return "-" if np.isnan(value) else f"{value:g}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="microSWIFT_programmer.py sweep", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duty_cycle', type=parse_values, default=parse_values(f"10:{MAX_DUTY_CYCLE}:10"),
+                        help='Total duty cycle (mins)')
+    parser.add_argument('--iridium_tx_time', type=parse_values, default=parse_values("5"),
+                        help='Iridium max transmit time (mins)')
+    parser.add_argument('--gnss_wait', type=parse_values, default=parse_values("2"),
+                        help='GNSS max time to fix (mins)')
+    parser.add_argument('--gnss_rate', type=parse_gnss_rates,
+                        default=parse_gnss_rates(",".join(map(str, GNSS_SAMPLE_RATES))),
+                        help='GNSS sample rate (Hz)')
+    parser.add_argument('--gnss_samples', type=parse_values, default=parse_values(f"256:{MAX_GNSS_SAMPLES}:256"),
+                        help='Number of GNSS samples per window')
+    parser.add_argument('--light', action='store_true', help='Light sensor enabled')
+    parser.add_argument('--light_samples', type=parse_values, default=parse_values(f"0:{MAX_LIGHT_SAMPLES}:30"),
+                        help='Number of light samples (with --light)')
+    parser.add_argument('--turbidity', action='store_true', help='Turbidity sensor enabled')
+    parser.add_argument('--turbidity_samples', type=parse_values,
+                        default=parse_values(f"0:{MAX_TURBIDITY_SAMPLES}:60"),
+                        help='Number of turbidity samples (with --turbidity)')
+    parser.add_argument('--grid_csv', default=None,
+                        help='Write the fraction of feasible combinations for each duty cycle and GNSS sample count')
+    args = parser.parse_args(argv)
+
+    values = {"duty_cycle": args.duty_cycle, "iridium_tx_time": args.iridium_tx_time, "gnss_wait": args.gnss_wait,
+              "gnss_rate": args.gnss_rate, "gnss_samples": args.gnss_samples,
+              # A disabled sensor takes no samples, sweeping its count would only repeat every combination
+              "light_samples": args.light_samples if args.light else np.zeros(1),
+              "turbidity_samples": args.turbidity_samples if args.turbidity else np.zeros(1)}
+
+    summary_axes = ("duty_cycle", "iridium_tx_time", "gnss_wait", "gnss_rate")
+    best = {name: [] for name in ("gnss_samples", "light_samples", "turbidity_samples")}
+    grid = []
+    combinations = feasible_count = 0
+
+    start = time.perf_counter()
+    # One duty cycle at a time keeps memory bounded however many combinations are swept
+    for duty_cycle in values["duty_cycle"]:
+        feasible = sweep(dict(values, duty_cycle=np.array([duty_cycle])), args.light, args.turbidity)
+        combinations += feasible.size
+        feasible_count += np.count_nonzero(feasible)
+
+        for name in best:
+            best[name].append(max_feasible(feasible, values, name, summary_axes))
+
+        if args.grid_csv:
+            # Fraction of the other swept settings that work, 1 means every combination does
+            keep = (AXES.index("duty_cycle"), AXES.index("gnss_samples"))
+            grid.append(feasible.mean(axis=tuple(i for i in range(len(AXES)) if i not in keep))[0])
+
+    best = {name: np.concatenate(cells) for name, cells in best.items()}
+    elapsed = time.perf_counter() - start
+
+    print(f"{combinations:,} combinations, {feasible_count:,} feasible, evaluated in "
+          f"{elapsed * 1000:.0f} ms")
+    print()
+
+    header = ["Duty cycle", "Iridium tx", "GNSS wait", "GNSS rate", "Max GNSS", "Max light", "Max turbidity"]
+    print("".join(f"{title:>14}" for title in header))
+    for index in np.ndindex(best["gnss_samples"].shape):
+        cells = [values[name][i] for name, i in zip(summary_axes, index)]
+        counts = [best[name][index] for name in best]
+        if not args.light:
+            counts[1] = np.nan
+        if not args.turbidity:
+            counts[2] = np.nan
+        print("".join(f"{value:>14g}" for value in cells) + "".join(f"{format_count(count):>14}" for count in counts))
+
+    if args.grid_csv:
+        with open(args.grid_csv, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["duty_cycle \\ gnss_samples"] + [f"{value:g}" for value in values["gnss_samples"]])
+            for duty_cycle, row in zip(values["duty_cycle"], grid):
+                writer.writerow([f"{duty_cycle:g}"] + [f"{value:.3g}" for value in row])
+
+        print(f"\nFeasibility grid written to {args.grid_csv}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Keeps track of the STLink probes attached while the programmer is open.
+
+On Linux with pyudev installed, USB serial (tty) hot-plug events from udev trigger a rescan, so nothing is scanned
+while nothing changes. Elsewhere the probe list is polled every POLL_INTERVAL seconds. Either way the attached probes
+are kept in a ProbeRegistry, keyed by USB serial number, and callbacks report probes as they come and go.
+
+Nothing here imports Qt.
+"""
+import platform
+import threading
+
+try:
+    import pyudev
+except ImportError:
+    pyudev = None
+
+# Seconds between probe scans when there are no hot-plug events to wait on
+POLL_INTERVAL = 1.0
+# How often the udev wait checks whether it should stop (seconds)
+STOP_CHECK_INTERVAL = 0.5
+# Plugging in a probe produces a burst of events, they are collected for this long before rescanning (seconds)
+EVENT_SETTLE_TIME = 0.25
+
+
+def probe_key(probe):
+    # Probes without a USB serial number (older STLinks) can only be told apart by port
+    return probe.serial_number or probe.port
+
+
+class ProbeRegistry:
+    """The attached probes, safe to read from any thread while the monitor updates it."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.probes_by_key = {}
+
+    def update(self, probes):
+        """Replaces the attached probes with a new scan. Returns (connected, disconnected) lists of StlinkProbe."""
+        scanned = {probe_key(probe): probe for probe in probes}
+
+        with self.lock:
+            previous = self.probes_by_key
+            self.probes_by_key = scanned
+
+        # A probe that moved to another port counts as unplugged and plugged back in
+        connected = [probe for key, probe in scanned.items() if previous.get(key) != probe]
+        disconnected = [probe for key, probe in previous.items() if scanned.get(key) != probe]
+        return connected, disconnected
+
+    def probes(self):
+        with self.lock:
+            return list(self.probes_by_key.values())
+
+    def __len__(self):
+        with self.lock:
+            return len(self.probes_by_key)
+
+
+def udev_available(backend):
+    """True if hot-plug events can stand in for polling backend's probe list."""
+    return pyudev is not None and platform.system() == "Linux" and backend.usb_probes
+
+
+def watch_probes(backend, registry, on_connect, on_disconnect, stop_event, poll_interval=POLL_INTERVAL):
+    """
+    Scans backend's probes into registry until stop_event is set, calling on_connect(probe) and on_disconnect(probe)
+    for every change. The first scan reports every attached probe as connected.
+    """
+
+    def scan():
+        connected, disconnected = registry.update(backend.list_probes())
+        for probe in disconnected:
+            on_disconnect(probe)
+        for probe in connected:
+            on_connect(probe)
+
+    scan()
+
+    if udev_available(backend):
+        try:
+            monitor = pyudev.Monitor.from_netlink(pyudev.Context())
+            monitor.filter_by(subsystem="tty")
+            monitor.start()
+        except OSError:
+            monitor = None  # No access to the netlink socket (containers, sandboxes), poll instead
+
+        if monitor is not None:
+            while not stop_event.is_set():
+                if monitor.poll(timeout=STOP_CHECK_INTERVAL) is None:
+                    continue
+                while monitor.poll(timeout=EVENT_SETTLE_TIME) is not None:
+                    pass
+                scan()
+            return
+
+    while not stop_event.wait(poll_interval):
+        scan()
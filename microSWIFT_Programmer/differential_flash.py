@@ -0,0 +1,189 @@
+import hashlib
+import json
+import os
+import struct
+import tempfile
+
+from firmware_cache import sha256_of_file
+from microSWIFT_config import CONFIG_STRUCT_SIZE
+from stm32_cli import ProgrammingPhase, CONFIG_ADDRESS, read_memory_ranges
+
+# STM32U5A5 flash layout
+FLASH_BASE = 0x08000000
+FLASH_SIZE = 0x400000
+SECTOR_SIZE = 0x2000
+ERASED_BYTE = 0xFF
+
+ELF_HEADER = struct.Struct("<16sHHIIIIIHHHHHH")
+ELF_PROGRAM_HEADER = struct.Struct("<IIIIIIII")
+PT_LOAD = 1
+
+# Bump if the hashing scheme changes so stale cached tables are ignored
+SECTOR_TABLE_VERSION = 1
+
+
+class ElfParseError(Exception):
+    pass
+
+
+def read_load_segments(elf_path):
+    """Returns [(load address, bytes)] for every PT_LOAD segment of a 32-bit little-endian ELF with file content."""
+    with open(elf_path, 'rb') as f:
+        data = f.read()
+
+    if len(data) < ELF_HEADER.size or data[:4] != b'\x7fELF':
+        raise ElfParseError(f"{elf_path} is not an ELF file")
+    if data[4] != 1 or data[5] != 1:
+        raise ElfParseError(f"{elf_path} is not a 32-bit little-endian ELF file")
+
+    (_, _, _, _, _, phoff, _, _, _, phentsize, phnum, _, _, _) = ELF_HEADER.unpack_from(data, 0)
+
+    segments = []
+    for i in range(phnum):
+        (p_type, p_offset, _, p_paddr, p_filesz, _, _, _) = ELF_PROGRAM_HEADER.unpack_from(data, phoff + i * phentsize)
+        if p_type == PT_LOAD and p_filesz > 0:
+            # Physical (load) address, initialised .data is stored in flash at its LMA
+            segments.append((p_paddr, data[p_offset:p_offset + p_filesz]))
+
+    return segments
+
+
+def build_sector_image(segments):
+    """Lays the flash-resident segments out as {sector address: sector bytes}, unwritten bytes left erased."""
+    sectors = {}
+
+    for address, payload in segments:
+        if address < FLASH_BASE or address + len(payload) > FLASH_BASE + FLASH_SIZE:
+            continue
+
+        offset = 0
+        while offset < len(payload):
+            sector_address = (address + offset) & ~(SECTOR_SIZE - 1)
+            start = address + offset - sector_address
+            length = min(SECTOR_SIZE - start, len(payload) - offset)
+
+            sector = sectors.setdefault(sector_address, bytearray([ERASED_BYTE]) * SECTOR_SIZE)
+            sector[start:start + length] = payload[offset:offset + length]
+            offset += length
+
+    return {address: bytes(sector) for address, sector in sectors.items()}
+
+
+def sector_hash(sector_address, sector):
+    """
+    SHA-256 of a sector with the configuration struct masked out, it is written separately on every programming run.
+    """
+    config_start = CONFIG_ADDRESS - sector_address
+    if 0 <= config_start < SECTOR_SIZE:
+        sector = (sector[:config_start] + bytes([ERASED_BYTE]) * CONFIG_STRUCT_SIZE +
+                  sector[config_start + CONFIG_STRUCT_SIZE:])
+
+    return hashlib.sha256(sector).hexdigest()
+
+
+def load_sector_table(elf_path, elf_sha256, cache_dir):
+    """
+    Returns {sector address: hash} for the firmware image.
+
+    Tables are cached in cache_dir as <elf sha256>.sectors.json so the image only has to be parsed and hashed once.
+    """
+    table_path = os.path.join(cache_dir, f"{elf_sha256}.sectors.json")
+
+    try:
+        with open(table_path, 'r') as f:
+            cached = json.load(f)
+        if cached.get("version") == SECTOR_TABLE_VERSION and cached.get("sector_size") == SECTOR_SIZE:
+            return {int(address, 16): digest for address, digest in cached["sectors"].items()}
+    except (OSError, ValueError, KeyError):
+        pass
+
+    image = build_sector_image(read_load_segments(elf_path))
+    table = {address: sector_hash(address, sector) for address, sector in image.items()}
+
+    # Unique temporary name, several programming jobs may build the same table at once
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".json.tmp")
+    with os.fdopen(fd, 'w') as f:
+        json.dump({
+            "version": SECTOR_TABLE_VERSION,
+            "sector_size": SECTOR_SIZE,
+            "sectors": {f"0x{address:08X}": digest for address, digest in sorted(table.items())},
+        }, f, indent=2)
+    os.replace(tmp_path, table_path)
+
+    return table
+
+
+def contiguous_runs(sector_addresses):
+    """Groups sector addresses into (start address, size) runs of adjacent sectors."""
+    runs = []
+
+    for address in sorted(sector_addresses):
+        if runs and runs[-1][0] + runs[-1][1] == address:
+            runs[-1] = (runs[-1][0], runs[-1][1] + SECTOR_SIZE)
+        else:
+            runs.append((address, SECTOR_SIZE))
+
+    return runs
+
+
+def changed_sectors(table, readback_runs, readback_paths):
+    """Compares sectors read back from the device against the image table, returns the addresses that differ."""
+    changed = set(table)
+
+    for (run_address, run_size), path in zip(readback_runs, readback_paths):
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        for offset in range(0, min(run_size, len(data)), SECTOR_SIZE):
+            address = run_address + offset
+            sector = data[offset:offset + SECTOR_SIZE]
+            if address in table and len(sector) == SECTOR_SIZE and sector_hash(address, sector) == table[address]:
+                changed.discard(address)
+
+    return changed
+
+
+def write_sector_phases(elf_path, sector_addresses, out_dir):
+    """Writes the changed sectors out as .bin files and returns a verified download phase for each run."""
+    image = build_sector_image(read_load_segments(elf_path))
+    phases = []
+
+    for run_address, run_size in contiguous_runs(sector_addresses):
+        path = os.path.join(out_dir, f"sectors_{run_address:08X}.bin")
+        with open(path, 'wb') as f:
+            for address in range(run_address, run_address + run_size, SECTOR_SIZE):
+                f.write(image[address])
+
+        phases.append(ProgrammingPhase(f"Firmware 0x{run_address:08X}-0x{run_address + run_size - 1:08X}",
+                                       path, run_address, verify=True))
+
+    return phases
+
+
+def plan_differential_phases(backend, firmware_path, work_dir, on_stdout, on_stderr,
+                             connect_args=("port=SWD",), on_progress=None, timing=None):
+    """
+    Reads back the flash sectors covered by the firmware image and returns download phases for only the sectors
+    that differ from it. Returns None if the comparison could not be made and the full image should be flashed.
+    The readback session is added to timing if one is given.
+    """
+    cache_dir = os.path.join(os.path.dirname(firmware_path), "cache")
+    try:
+        table = load_sector_table(firmware_path, sha256_of_file(firmware_path), cache_dir)
+    except (OSError, ElfParseError) as e:
+        on_stderr(f"Unable to read firmware sectors ({e}), programming full image.")
+        return None
+
+    runs = contiguous_runs(table)
+
+    on_stdout("Reading back firmware sectors from device...")
+    paths = read_memory_ranges(backend, runs, work_dir, on_stdout, on_stderr, connect_args, on_progress, timing)
+    if paths is None:
+        on_stderr("Unable to read back device flash, programming full image.")
+        return None
+
+    changed = changed_sectors(table, runs, paths)
+    on_stdout(f"{len(changed)} of {len(table)} firmware sectors differ from {os.path.basename(firmware_path)}.")
+
+    return write_sector_phases(firmware_path, changed, work_dir)
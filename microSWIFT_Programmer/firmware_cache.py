@@ -0,0 +1,325 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from dataclasses import dataclass
+
+FIRMWARE_URL = "https://github.com/SASlabgroup/microSWIFT-V2-Binaries/raw/main/V2.2/microSWIFT_V2.2.elf"
+# sha256sum-style digest published next to the image ("<hex digest>  microSWIFT_V2.2.elf")
+FIRMWARE_DIGEST_URL = FIRMWARE_URL + ".sha256"
+FIRMWARE_FILENAME = "microSWIFT_V2.2.elf"
+
+CHUNK_SIZE = 8192
+# Number of previous firmware images kept in the cache after a new one is installed
+CACHE_KEEP_COUNT = 3
+# A dropped connection is resumed from the .partial file this many times before giving up
+MAX_TRANSFER_ATTEMPTS = 5
+RETRY_BACKOFF_SECONDS = 1.0
+
+
+class FirmwareCacheError(Exception):
+    pass
+
+
+@dataclass
+class FirmwareFetchResult:
+    path: str
+    sha256: str
+    updated: bool  # True if new bytes were transferred and installed
+    verified: bool = False  # True if the image matched the published digest
+    bytes_transferred: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self):
+        """Average transfer rate in bytes per second."""
+        return self.bytes_transferred / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def sha256_of_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE * 8), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FirmwareCache:
+    """
+    Content-addressed firmware cache.
+
+    Every downloaded image is stored once under firmware/cache/<sha256>.elf. The index file remembers the ETag and
+    Last-Modified headers for each URL so the next launch can issue a conditional request and skip the transfer when
+    the server copy has not changed. The working copy in firmware/ (the file handed to STM32_Programmer_CLI) is only
+    ever replaced atomically, and only with an image whose hash has been checked.
+
+    Transfers land in a .partial file in the cache. If the connection drops, the transfer is picked up where it left
+    off with an HTTP Range request (guarded by If-Range so a changed file on the server restarts from zero), both
+    within a fetch and on the next launch.
+    """
+
+    def __init__(self, firmware_dir, filename=FIRMWARE_FILENAME, session=None):
+        self.firmware_dir = firmware_dir
+        self.cache_dir = os.path.join(firmware_dir, "cache")
+        self.index_path = os.path.join(self.cache_dir, "index.json")
+        self.installed_path = os.path.join(firmware_dir, filename)
+        if session is None:
+            # requests takes longer to import than the rest of the programmer's modules together, so it is left until
+            # a download actually happens
+            import requests
+            session = requests.Session()
+        self.session = session
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def blob_path(self, sha256):
+        return os.path.join(self.cache_dir, f"{sha256}.elf")
+
+    def partial_path(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{key}.partial")
+
+    def load_index(self):
+        try:
+            with open(self.index_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_index(self, index):
+        self._write_json(self.index_path, index)
+
+    def _write_json(self, path, obj):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".json.tmp")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(obj, f, indent=2)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def cached_entry(self, url):
+        """Returns the index entry for url if its cached image is present and intact, otherwise None."""
+        entry = self.load_index().get(url)
+        if not entry:
+            return None
+
+        blob = self.blob_path(entry["sha256"])
+        if not os.path.isfile(blob) or sha256_of_file(blob) != entry["sha256"]:
+            return None
+
+        return entry
+
+    def fetch_published_digest(self, digest_url, timeout=10):
+        """Returns the SHA-256 published at digest_url, or None if nothing is published there."""
+        response = self.session.get(digest_url, timeout=timeout)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+
+        match = re.match(r'\s*([0-9a-fA-F]{64})\b', response.text)
+        if not match:
+            raise FirmwareCacheError(f"Malformed firmware digest at {digest_url}")
+
+        return match.group(1).lower()
+
+    def fetch(self, url=FIRMWARE_URL, digest_url=None, timeout=10, progress_callback=None,
+              max_attempts=MAX_TRANSFER_ATTEMPTS):
+        """
+        Bring the installed firmware up to date with url.
+
+        progress_callback, if given, is called as progress_callback(received, total, bytes_per_second) while data is
+        transferred; total is None if the server does not report a length.
+
+        Raises requests.RequestException on network errors and FirmwareCacheError if the transferred image does not
+        check out. In both cases the installed firmware is left untouched.
+        """
+        import requests
+
+        entry = self.cached_entry(url)
+        published = self.fetch_published_digest(digest_url, timeout) if digest_url else None
+
+        # The published digest alone is enough to know the cached image is current
+        if entry and published == entry["sha256"]:
+            self.install(entry["sha256"])
+            return FirmwareFetchResult(self.installed_path, entry["sha256"], updated=False, verified=True)
+
+        for attempt in range(max_attempts):
+            try:
+                return self._transfer(url, entry, published, timeout, progress_callback)
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError):
+                if attempt == max_attempts - 1:
+                    raise
+                time.sleep(RETRY_BACKOFF_SECONDS * 2 ** attempt)
+
+    def _transfer(self, url, entry, published, timeout, progress_callback, conditional=True):
+        """
+        One request for url, resuming the .partial if there is one. With conditional False nothing is resumed and the
+        request carries no validators, which is how a response that cannot be trusted is retried once.
+        """
+        partial_path = self.partial_path(url)
+        partial_meta_path = partial_path + ".json"
+
+        try:
+            with open(partial_meta_path, 'r') as f:
+                partial_meta = json.load(f)
+        except (OSError, ValueError):
+            partial_meta = {}
+
+        validator = partial_meta.get("etag") or partial_meta.get("last_modified")
+        offset = os.path.getsize(partial_path) if conditional and validator and os.path.isfile(partial_path) else 0
+
+        # The whole image already arrived, but was never moved into the cache
+        if offset and partial_meta.get("total") is not None and offset >= partial_meta["total"]:
+            if offset == partial_meta["total"] and published is not None and \
+                    sha256_of_file(partial_path) == published:
+                return self._finish(url, entry, published, partial_meta, partial_path, 0, 0.0)
+            self._discard_partial(url)
+            partial_meta = {}
+            offset = 0
+
+        headers = {}
+        if entry and conditional:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validator
+
+        with self.session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+            if response.status_code == 304 and entry:
+                self.install(entry["sha256"])
+                return FirmwareFetchResult(self.installed_path, entry["sha256"], updated=False,
+                                           verified=published == entry["sha256"])
+
+            content_range = response.headers.get("Content-Range", "")
+            # Range Not Satisfiable: the partial is as long as (or longer than) the image, its length was not recorded
+            # so it cannot be checked. Not Modified without a cached image, or part of the file other than the part
+            # asked for: nothing usable came back. All of these are downloaded again from the start
+            retry = (response.status_code == 416 and offset or
+                     response.status_code == 304 or
+                     response.status_code == 206 and not (offset and content_range.startswith(f"bytes {offset}-")))
+            if retry:
+                response.close()
+                if not conditional:
+                    raise FirmwareCacheError(f"Unexpected {response.status_code} response to a plain request for "
+                                             f"{url}")
+                self._discard_partial(url)
+                return self._transfer(url, entry, published, timeout, progress_callback, conditional=False)
+
+            response.raise_for_status()
+
+            if response.status_code == 206:
+                mode = 'ab'
+                total = content_range.rpartition("/")[2]
+                total = int(total) if total.isdigit() else None
+            else:
+                # A whole file, the server ignored the range or the file changed under us, start over
+                offset = 0
+                mode = 'wb'
+                length = response.headers.get("Content-Length")
+                total = int(length) if length else None
+                self._write_json(partial_meta_path, {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "total": total,
+                })
+
+            received = offset
+            start_time = time.monotonic()
+
+            with open(partial_path, mode) as f:
+                try:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        f.write(chunk)
+                        received += len(chunk)
+                        if progress_callback:
+                            elapsed = time.monotonic() - start_time
+                            progress_callback(received, total, (received - offset) / elapsed if elapsed > 0 else 0.0)
+                finally:
+                    # Whatever made it to disk is kept for the next resume
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            elapsed = time.monotonic() - start_time
+
+            validators = {
+                "etag": response.headers.get("ETag") or partial_meta.get("etag"),
+                "last_modified": response.headers.get("Last-Modified") or partial_meta.get("last_modified"),
+            }
+
+        if total is not None and received != total:
+            raise FirmwareCacheError(f"Firmware download truncated: received {received} of {total} bytes")
+
+        return self._finish(url, entry, published, validators, partial_path, received - offset, elapsed)
+
+    def _discard_partial(self, url):
+        partial_path = self.partial_path(url)
+        for path in (partial_path, partial_path + ".json"):
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def _finish(self, url, entry, published, validators, partial_path, bytes_transferred, elapsed):
+        """Checks the completed .partial for url and moves it into the cache and the working copy."""
+        sha256 = sha256_of_file(partial_path)
+
+        if published is not None and sha256 != published:
+            self._discard_partial(url)
+            raise FirmwareCacheError(f"Downloaded firmware SHA-256 {sha256} does not match published digest "
+                                     f"{published}")
+
+        os.replace(partial_path, self.blob_path(sha256))
+        os.unlink(partial_path + ".json")
+
+        index = self.load_index()
+        index[url] = {"etag": validators.get("etag"), "last_modified": validators.get("last_modified"),
+                      "sha256": sha256}
+
+        self.install(sha256)
+        self.save_index(index)
+        self.prune(keep=sha256)
+
+        return FirmwareFetchResult(self.installed_path, sha256,
+                                   updated=entry is None or entry["sha256"] != sha256,
+                                   verified=published is not None,
+                                   bytes_transferred=bytes_transferred,
+                                   elapsed=elapsed)
+
+    def install(self, sha256):
+        """Atomically replaces the working firmware file with the cached image sha256."""
+        if os.path.isfile(self.installed_path) and sha256_of_file(self.installed_path) == sha256:
+            return
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.firmware_dir, suffix=".elf.tmp")
+        try:
+            with os.fdopen(fd, 'wb') as dst, open(self.blob_path(sha256), 'rb') as src:
+                for chunk in iter(lambda: src.read(CHUNK_SIZE * 8), b''):
+                    dst.write(chunk)
+                dst.flush()
+                os.fsync(dst.fileno())
+
+            if sha256_of_file(tmp_path) != sha256:
+                raise FirmwareCacheError("Cached firmware image failed hash check during install")
+
+            os.replace(tmp_path, self.installed_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def prune(self, keep):
+        """Removes all but the CACHE_KEEP_COUNT most recent images, never removing keep or an indexed image."""
+        referenced = {entry["sha256"] for entry in self.load_index().values()}
+        referenced.add(keep)
+
+        blobs = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir) if name.endswith(".elf")]
+        blobs.sort(key=os.path.getmtime, reverse=True)
+
+        for blob in blobs[CACHE_KEEP_COUNT:]:
+            if os.path.basename(blob)[:-len(".elf")] not in referenced:
+                os.unlink(blob)
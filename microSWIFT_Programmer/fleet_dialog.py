@@ -0,0 +1,239 @@
+import os
+import tempfile
+
+from PyQt6 import QtWidgets
+from PyQt6.QtCore import pyqtSignal, QThread
+from PyQt6.QtGui import QColor, QFont
+from PyQt6.QtWidgets import QDialog, QTableWidgetItem
+
+from fleet_programming import run_fleet, MAX_PARALLEL_JOBS
+from microSWIFT_config import pack_config, verify_settings, MAX_TRACKING_NUMBER
+from phase_timing import format_timings
+from programming_job import ProgrammingJob
+from status_log import StatusLogModel, StatusLogView
+
+SERIAL_COLUMN = 0
+PORT_COLUMN = 1
+TRACKING_NUMBER_COLUMN = 2
+STATUS_COLUMN = 3
+PROGRESS_COLUMN = 4
+RESULT_COLUMN = 5
+
+
+class FleetWorker(QThread):
+    # Signals are emitted from the pool threads and delivered queued to the dialog
+    deviceOutput = pyqtSignal(str, str, bool)  # probe serial, text, is error
+    devicePhaseFinished = pyqtSignal(str, str, bool)  # probe serial, phase name, success
+    deviceFinished = pyqtSignal(str, bool)  # probe serial, success
+    deviceProgress = pyqtSignal(str, int)  # probe serial, percent complete of the current CLI operation
+    deviceTimings = pyqtSignal(str, object)  # probe serial, list of TimingSpan
+
+    def __init__(self, jobs, max_workers, backend=None, audit_log=None, progress=None, parent=None):
+        super().__init__(parent)
+        self.jobs = jobs
+        self.max_workers = max_workers
+        self.backend = backend
+        self.audit_log = audit_log
+        self.progress = progress
+
+    def run(self):
+        run_fleet(self.jobs,
+                  lambda serial, text: self.deviceOutput.emit(serial, text, False),
+                  lambda serial, text: self.deviceOutput.emit(serial, text, True),
+                  self.devicePhaseFinished.emit,
+                  self.deviceFinished.emit,
+                  max_workers=self.max_workers,
+                  on_progress=self.deviceProgress.emit,
+                  backend=self.backend,
+                  audit_log=self.audit_log,
+                  on_timings=self.deviceTimings.emit,
+                  progress=self.progress)
+
+
+class FleetProgrammingDialog(QDialog):
+    """One row per attached STLink, each programmed in parallel with its own tracking number."""
+
+    def __init__(self, probes, first_tracking_number, config_factory, single_session=True, differential=True,
+                 backend=None, audit_log=None, timing_trace=None, progress=None, parent=None):
+        super().__init__(parent)
+        self.probes = probes
+        # Called as config_factory(tracking_number) -> MicroSWIFTConfig
+        self.config_factory = config_factory
+        self.single_session = single_session
+        self.differential = differential
+        self.backend = backend
+        self.audit_log = audit_log
+        # phase_timing.TimingTrace the timings of every device are appended to, if any
+        self.timing_trace = timing_trace
+        # PhaseProgress shared with the main window, so programming a failed row again resumes where it stopped
+        self.progress = progress
+        self.device_logs = {probe.serial_number: StatusLogModel(parent=self) for probe in probes}
+        self.rows = {probe.serial_number: row for row, probe in enumerate(probes)}
+        self.work_dir = None
+        self.fleet_worker = None
+
+        self.setupUi(first_tracking_number)
+
+    def setupUi(self, first_tracking_number):
+        self.setWindowTitle("Program Fleet")
+        self.resize(720, 520)
+
+        self.verticalLayout = QtWidgets.QVBoxLayout(self)
+
+        self.deviceTable = QtWidgets.QTableWidget(len(self.probes), 6, parent=self)
+        self.deviceTable.setHorizontalHeaderLabels(["Probe serial", "Port", "Tracking number", "Status", "Progress",
+                                                    "Result"])
+        self.deviceTable.horizontalHeader().setSectionResizeMode(STATUS_COLUMN,
+                                                                 QtWidgets.QHeaderView.ResizeMode.Stretch)
+        self.deviceTable.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows)
+        self.deviceTable.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.SingleSelection)
+        self.deviceTable.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.verticalLayout.addWidget(self.deviceTable)
+
+        self.trackingNumberSpinBoxes = {}
+        self.progressBars = {}
+        for row, probe in enumerate(self.probes):
+            self.deviceTable.setItem(row, SERIAL_COLUMN, QTableWidgetItem(probe.serial_number or "Unknown"))
+            self.deviceTable.setItem(row, PORT_COLUMN, QTableWidgetItem(probe.port))
+            self.deviceTable.setItem(row, STATUS_COLUMN, QTableWidgetItem("Ready"))
+            self.deviceTable.setItem(row, RESULT_COLUMN, QTableWidgetItem(""))
+
+            spinBox = QtWidgets.QSpinBox(parent=self.deviceTable)
+            spinBox.setMaximum(MAX_TRACKING_NUMBER)
+            spinBox.setValue(min(first_tracking_number + row, MAX_TRACKING_NUMBER))
+            self.deviceTable.setCellWidget(row, TRACKING_NUMBER_COLUMN, spinBox)
+            self.trackingNumberSpinBoxes[probe.serial_number] = spinBox
+
+            progressBar = QtWidgets.QProgressBar(parent=self.deviceTable)
+            progressBar.setRange(0, 100)
+            progressBar.setValue(0)
+            self.deviceTable.setCellWidget(row, PROGRESS_COLUMN, progressBar)
+            self.progressBars[probe.serial_number] = progressBar
+
+        self.deviceLogView = StatusLogView(parent=self)
+        self.deviceLogView.setFont(QFont("Courier New"))
+        self.verticalLayout.addWidget(self.deviceLogView)
+
+        self.buttonHorizLayout = QtWidgets.QHBoxLayout()
+        self.parallelJobsLabel = QtWidgets.QLabel("Parallel jobs", parent=self)
+        self.buttonHorizLayout.addWidget(self.parallelJobsLabel)
+        self.parallelJobsSpinBox = QtWidgets.QSpinBox(parent=self)
+        self.parallelJobsSpinBox.setRange(1, max(MAX_PARALLEL_JOBS, len(self.probes)))
+        self.parallelJobsSpinBox.setValue(min(MAX_PARALLEL_JOBS, max(1, len(self.probes))))
+        self.buttonHorizLayout.addWidget(self.parallelJobsSpinBox)
+        self.buttonHorizLayout.addStretch()
+        self.programAllButton = QtWidgets.QPushButton("Program All", parent=self)
+        self.buttonHorizLayout.addWidget(self.programAllButton)
+        self.closeButton = QtWidgets.QPushButton("Close", parent=self)
+        self.buttonHorizLayout.addWidget(self.closeButton)
+        self.verticalLayout.addLayout(self.buttonHorizLayout)
+
+        self.programAllButton.clicked.connect(self.programAll)
+        self.closeButton.clicked.connect(self.reject)
+        self.deviceTable.itemSelectionChanged.connect(self.showSelectedLog)
+
+    def programAll(self):
+        tracking_numbers = [spinBox.value() for spinBox in self.trackingNumberSpinBoxes.values()]
+        if len(set(tracking_numbers)) != len(tracking_numbers):
+            QtWidgets.QMessageBox.warning(self, "Program Fleet", "Every device needs a unique tracking number.")
+            return
+
+        # Every device is checked before any is programmed, so a bad configuration cannot leave the fleet half done
+        configs = {}
+        problems = []
+        for probe in self.probes:
+            tracking_number = self.trackingNumberSpinBoxes[probe.serial_number].value()
+            configs[probe.serial_number] = self.config_factory(tracking_number)
+            problems += [f"Tracking number {tracking_number}: {problem.strip()}"
+                         for problem in verify_settings(configs[probe.serial_number])]
+        if problems:
+            QtWidgets.QMessageBox.warning(self, "Program Fleet", "\n".join(problems))
+            return
+
+        self.work_dir = tempfile.TemporaryDirectory()
+        jobs = []
+
+        for probe in self.probes:
+            config_path = os.path.join(self.work_dir.name, f"config_{probe.serial_number}.bin")
+            with open(config_path, "wb") as config_file:
+                config_file.write(pack_config(configs[probe.serial_number]))
+
+            jobs.append(ProgrammingJob(config_path=config_path, probe_serial=probe.serial_number,
+                                       single_session=self.single_session, differential=self.differential))
+
+            self.device_logs[probe.serial_number].clear()
+            self.setStatus(probe.serial_number, "Waiting")
+            self.progressBars[probe.serial_number].setValue(0)
+            self.setResult(probe.serial_number, "", None)
+
+        for spinBox in self.trackingNumberSpinBoxes.values():
+            spinBox.setDisabled(True)
+        self.programAllButton.setDisabled(True)
+        self.closeButton.setDisabled(True)
+        self.parallelJobsSpinBox.setDisabled(True)
+
+        self.fleet_worker = FleetWorker(jobs, self.parallelJobsSpinBox.value(), self.backend, self.audit_log,
+                                        self.progress)
+        self.fleet_worker.deviceOutput.connect(self.onDeviceOutput)
+        self.fleet_worker.devicePhaseFinished.connect(self.onDevicePhaseFinished)
+        self.fleet_worker.deviceFinished.connect(self.onDeviceFinished)
+        self.fleet_worker.deviceProgress.connect(self.onDeviceProgress)
+        self.fleet_worker.deviceTimings.connect(self.onDeviceTimings)
+        self.fleet_worker.finished.connect(self.onFleetFinished)
+        self.fleet_worker.start()
+
+    def setStatus(self, serial, text):
+        self.deviceTable.item(self.rows[serial], STATUS_COLUMN).setText(text)
+
+    def setResult(self, serial, text, success):
+        item = self.deviceTable.item(self.rows[serial], RESULT_COLUMN)
+        item.setText(text)
+        if success is not None:
+            item.setForeground(QColor('green') if success else QColor('red'))
+
+    def onDeviceOutput(self, serial, text, is_error):
+        self.device_logs[serial].append(text, is_error)
+
+        lines = text.strip().splitlines()
+        if lines and not is_error:
+            self.setStatus(serial, lines[-1])
+
+    def onDevicePhaseFinished(self, serial, name, success):
+        self.setStatus(serial, f"{name} {'done' if success else 'failed'}")
+
+    def onDeviceProgress(self, serial, percent):
+        self.progressBars[serial].setValue(percent)
+
+    def onDeviceTimings(self, serial, spans):
+        self.device_logs[serial].append(format_timings(spans))
+        if self.timing_trace is not None:
+            try:
+                self.timing_trace.write(spans)
+            except OSError as e:
+                self.device_logs[serial].append(f"Unable to write timings to {self.timing_trace.path}: {e}", True)
+
+    def onDeviceFinished(self, serial, success):
+        self.setResult(serial, "Pass" if success else "Fail", success)
+
+    def onFleetFinished(self):
+        for spinBox in self.trackingNumberSpinBoxes.values():
+            spinBox.setEnabled(True)
+        self.programAllButton.setEnabled(True)
+        self.closeButton.setEnabled(True)
+        self.parallelJobsSpinBox.setEnabled(True)
+
+        self.work_dir.cleanup()
+        self.work_dir = None
+
+    def showSelectedLog(self):
+        row = self.deviceTable.currentRow()
+        if row < 0:
+            return
+
+        self.deviceLogView.setModel(self.device_logs[self.probes[row].serial_number])
+
+    def reject(self):
+        # Jobs cannot be abandoned half way through, a device would be left partially programmed
+        if self.fleet_worker is not None and self.fleet_worker.isRunning():
+            return
+        super().reject()
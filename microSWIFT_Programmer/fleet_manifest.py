@@ -0,0 +1,137 @@
+"""
+Fleet manifest CSVs, one microSWIFT per row, shared by batch programming and bulk .sbd generation.
+
+Column names are the microSWIFT_configuration field names (see microSWIFT_config.py), e.g.
+
+    tracking_number,duty_cycle,gnss_samples_per_window,gnss_sampling_rate,iridium_max_transmit_time,...
+    101,60,4096,4,5,...
+
+Booleans accept true/false, yes/no or 1/0. iridium_type (V3D/V3F) may be given instead of iridium_v3f,
+light_sensor_gain is the gain label (e.g. "2x"), and total_light_samples/total_turbidity_samples may be "gnss" to
+match the GNSS sample window. Missing or empty columns take the settings the programmer window starts with
+(DEFAULT_CONFIG in microSWIFT_config.py). Each row is checked with the same rules as the Verify button.
+"""
+import csv
+import dataclasses
+
+from microSWIFT_config import MicroSWIFTConfig, verify_settings, DEFAULT_CONFIG, IRIDIUM_TYPES, LIGHT_GAINS
+
+TRUE_STRINGS = ("1", "true", "yes", "y")
+FALSE_STRINGS = ("0", "false", "no", "n")
+# Sample count columns take this to match the GNSS sample window, like the "Match GNSS" check boxes
+MATCH_GNSS = "gnss"
+
+CONFIG_FIELDS = {field.name: field.type for field in dataclasses.fields(MicroSWIFTConfig)}
+EXTRA_COLUMNS = ("iridium_type",)
+
+
+class ManifestError(Exception):
+    pass
+
+
+@dataclasses.dataclass
+class ManifestRow:
+    line: int
+    config: MicroSWIFTConfig
+    errors: list
+    # Fields the row left out or empty, which took their DEFAULT_CONFIG value
+    defaulted: list
+
+
+def parse_bool(text):
+    if text.lower() in TRUE_STRINGS:
+        return True
+    if text.lower() in FALSE_STRINGS:
+        return False
+    raise ValueError(f"expected true or false, got \"{text}\"")
+
+
+def defaulted_fields(values):
+    """Configuration fields a manifest row gives no value for, in struct order."""
+    given = {"iridium_v3f" if column == "iridium_type" else column for column, text in values.items() if text}
+    return [name for name in CONFIG_FIELDS if name not in given]
+
+
+def parse_row(values):
+    """Builds a MicroSWIFTConfig from one manifest row. Returns (config, errors)."""
+    config = dataclasses.replace(DEFAULT_CONFIG)
+    errors = []
+    matched = []
+
+    for column, text in values.items():
+        if not text:
+            continue
+
+        try:
+            if column == "iridium_type":
+                if text.upper() not in IRIDIUM_TYPES:
+                    raise ValueError(f"expected one of {', '.join(IRIDIUM_TYPES)}")
+                config.iridium_v3f = text.upper() == "V3F"
+            elif column == "light_sensor_gain":
+                if text.lower() not in LIGHT_GAINS:
+                    raise ValueError(f"expected one of {', '.join(LIGHT_GAINS)}")
+                config.light_sensor_gain = LIGHT_GAINS.index(text.lower())
+            elif column in ("total_light_samples", "total_turbidity_samples") and text.lower() == MATCH_GNSS:
+                matched.append(column)
+            elif column == "gnss_sampling_rate":
+                config.gnss_sampling_rate = int(text.lower().removesuffix("hz").strip())
+            elif CONFIG_FIELDS[column] in (bool, "bool"):
+                setattr(config, column, parse_bool(text))
+            else:
+                setattr(config, column, int(text))
+        except ValueError as e:
+            errors.append(f"{column}: {e}")
+
+    # Needs the GNSS settings, which may come later in the row
+    if not errors and config.gnss_sampling_rate:
+        if "total_light_samples" in matched:
+            config.total_light_samples = config.gnss_matched_light_samples()
+        if "total_turbidity_samples" in matched:
+            config.total_turbidity_samples = config.gnss_matched_turbidity_samples()
+
+    if not errors:
+        errors = [error.strip() for error in verify_settings(config)]
+
+    return config, errors
+
+
+def read_manifest(path):
+    """Reads and checks every row of a manifest CSV. Raises ManifestError if the file itself is unusable."""
+    try:
+        with open(path, newline='') as f:
+            reader = csv.DictReader(f)
+            columns = [column.strip().lower() for column in reader.fieldnames or []]
+            raw_rows = [(reader.line_num, list(row.values())) for row in reader]
+    except (OSError, csv.Error, UnicodeDecodeError) as e:
+        raise ManifestError(f"Unable to read manifest {path}: {e}")
+
+    if "tracking_number" not in columns:
+        raise ManifestError(f"Manifest {path} has no tracking_number column")
+
+    # A misspelt column would otherwise silently fall back to the default
+    unknown = [column for column in columns if column not in CONFIG_FIELDS and column not in EXTRA_COLUMNS]
+    if unknown:
+        raise ManifestError(f"Unknown manifest column(s): {', '.join(unknown)}")
+
+    rows = []
+    seen_tracking_numbers = set()
+
+    for line, values in raw_rows:
+        if not any(value and value.strip() for value in values):
+            continue
+
+        values = {column: (value or "").strip() for column, value in zip(columns, values)}
+        config, errors = parse_row(values)
+        defaulted = defaulted_fields(values)
+
+        # Every unit would otherwise get the default tracking number
+        if "tracking_number" in defaulted:
+            errors.insert(0, "tracking_number is empty")
+
+        if not errors and config.tracking_number in seen_tracking_numbers:
+            errors.append(f"Tracking number {config.tracking_number} appears more than once in the manifest")
+        seen_tracking_numbers.add(config.tracking_number)
+
+        rows.append(ManifestRow(line, config, errors, defaulted))
+
+    return rows
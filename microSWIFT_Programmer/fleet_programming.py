@@ -0,0 +1,52 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from programming_job import run_programming_job
+from stm32_cli import STM32CubeProgrammerBackend
+
+# Each job spends its time waiting on its own STM32_Programmer_CLI process, the bound is for USB bandwidth
+MAX_PARALLEL_JOBS = 8
+
+
+def run_fleet(jobs, on_stdout, on_stderr, on_phase, on_job_finished, max_workers=MAX_PARALLEL_JOBS,
+              on_progress=None, backend=None, audit_log=None, on_timings=None, progress=None):
+    """
+    Programs every job on a bounded thread pool, one job per STLink probe.
+
+    Callbacks receive the job's probe serial as their first argument and may be called from any pool thread. Every
+    job is added to audit_log if one is given, and on_timings(serial, spans) gets each job's TimingSpans. Jobs
+    resume from the phases recorded in progress (a PhaseProgress) if one is given.
+    Returns {probe serial: success}.
+    """
+    backend = backend or STM32CubeProgrammerBackend()
+    results = {}
+
+    if not jobs:
+        return results
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs)))) as pool:
+        futures = {}
+        for job in jobs:
+            serial = job.probe_serial
+            future = pool.submit(run_programming_job, job,
+                                 lambda text, serial=serial: on_stdout(serial, text),
+                                 lambda text, serial=serial: on_stderr(serial, text),
+                                 lambda name, success, serial=serial: on_phase(serial, name, success),
+                                 backend,
+                                 (lambda percent, serial=serial: on_progress(serial, percent)) if on_progress else None,
+                                 audit_log,
+                                 (lambda spans, serial=serial: on_timings(serial, spans)) if on_timings else None,
+                                 progress)
+            futures[future] = serial
+
+        for future in as_completed(futures):
+            serial = futures[future]
+            try:
+                success = future.result()
+            except Exception as e:
+                on_stderr(serial, f"Unexpected error: {str(e)}")
+                success = False
+
+            results[serial] = success
+            on_job_finished(serial, success)
+
+    return results
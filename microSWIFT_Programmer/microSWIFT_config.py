@@ -0,0 +1,409 @@
+import struct
+from dataclasses import dataclass, fields, replace
+from datetime import datetime
+from types import SimpleNamespace
+
+'''
+Definition of configuration struct from configuration.h in firmware files
+
+typedef struct __attribute__((packed)) microSWIFT_configuration
+{
+  uint32_t tracking_number;
+  uint32_t gnss_samples_per_window;
+  uint32_t duty_cycle;
+  uint32_t iridium_max_transmit_time;
+  uint32_t gnss_max_acquisition_wait_time;
+  uint32_t gnss_sampling_rate;
+  uint32_t total_light_samples;
+  uint32_t light_sensor_gain;
+  uint32_t total_turbidity_samples;
+  uint16_t turbidity_serial_number;
+
+  bool iridium_v3f;
+  bool gnss_high_performance_mode;
+  bool ct_enabled;
+  bool temperature_enabled;
+  bool light_enabled;
+  bool turbidity_enabled;
+
+  const char compile_date_flash[11];
+  const char compile_time_flash[9];
+} microSWIFT_configuration;
+
+In microSWIFT.ld:
+
+  /* Custom variables (firmware version, compile date/time, etc) */
+  .uservars :
+  {
+    /* Variables contained in type microSWIFT_configuration contained in configuration.h */
+    KEEP(*(.uservars.CONFIGURATION))
+    *(.uservars*);
+  } > USERVARS
+'''
+
+
+@dataclass(frozen=True)
+class ConfigField:
+    name: str
+    format: str  # struct format code
+    numpy_type: str  # equivalent NumPy dtype, little-endian like the target
+
+
+# Field order and types of microSWIFT_configuration, everything else is derived from this
+CONFIG_SCHEMA = (
+    ConfigField("tracking_number", "L", "<u4"),
+    ConfigField("gnss_samples_per_window", "L", "<u4"),
+    ConfigField("duty_cycle", "L", "<u4"),
+    ConfigField("iridium_max_transmit_time", "L", "<u4"),
+    ConfigField("gnss_max_acquisition_wait_time", "L", "<u4"),
+    ConfigField("gnss_sampling_rate", "L", "<u4"),
+    ConfigField("total_light_samples", "L", "<u4"),
+    ConfigField("light_sensor_gain", "L", "<u4"),
+    ConfigField("total_turbidity_samples", "L", "<u4"),
+    ConfigField("turbidity_serial_number", "H", "<u2"),
+    ConfigField("iridium_v3f", "?", "?"),
+    ConfigField("gnss_high_performance_mode", "?", "?"),
+    ConfigField("ct_enabled", "?", "?"),
+    ConfigField("temperature_enabled", "?", "?"),
+    ConfigField("light_enabled", "?", "?"),
+    ConfigField("turbidity_enabled", "?", "?"),
+    ConfigField("compile_date_flash", "11s", "S11"),
+    ConfigField("compile_time_flash", "9s", "S9"),
+)
+
+# Compiled once, "<LLLLLLLLLH??????11s9s"
+CONFIG_STRUCT = struct.Struct("<" + "".join(field.format for field in CONFIG_SCHEMA))
+CONFIG_STRUCT_FORMAT = CONFIG_STRUCT.format
+CONFIG_STRUCT_SIZE = CONFIG_STRUCT.size  # 64 bytes
+
+# Iridium over-the-air configuration files are rejected if the filename, extension included, is longer than this
+SBD_EXTENSION = ".sbd"
+SBD_MAX_FILENAME_LENGTH = 80
+
+DATE_FORMAT = "%m/%d/%Y"  # MM/DD/YYYY
+TIME_FORMAT = "%H:%M:%S"  # HH:MM:SS
+
+# Choices offered in the programmer's drop down boxes
+IRIDIUM_TYPES = ("V3D", "V3F")
+GNSS_SAMPLE_RATES = (4, 5)  # Hz
+LIGHT_GAINS = ("0.5x", "1x", "2x", "4x", "8x", "16x", "32x", "64x", "128x", "256x", "512x")
+DEFAULT_LIGHT_GAIN = 2  # 2x
+
+# Largest value each setting's spin box accepts
+MAX_TRACKING_NUMBER = 1000
+MAX_GNSS_SAMPLES = 32768
+MAX_DUTY_CYCLE = 1440  # minutes
+MAX_IRIDIUM_TX_TIME = 60  # minutes
+MAX_GNSS_ACQUISITION_TIME = 10  # minutes
+MAX_LIGHT_SAMPLES = 1800
+MAX_TURBIDITY_SAMPLES = 3600
+MAX_TURBIDITY_SERIAL_NUMBER = 65535
+
+
+@dataclass
+class MicroSWIFTConfig:
+    """The user settable fields of the microSWIFT_configuration struct."""
+    tracking_number: int = 0
+    gnss_samples_per_window: int = 0
+    duty_cycle: int = 0
+    iridium_max_transmit_time: int = 0
+    gnss_max_acquisition_wait_time: int = 0
+    gnss_sampling_rate: int = GNSS_SAMPLE_RATES[0]
+    total_light_samples: int = 0
+    light_sensor_gain: int = DEFAULT_LIGHT_GAIN  # index into LIGHT_GAINS
+    total_turbidity_samples: int = 0
+    turbidity_serial_number: int = 0
+    iridium_v3f: bool = False
+    gnss_high_performance_mode: bool = False
+    ct_enabled: bool = False
+    temperature_enabled: bool = False
+    light_enabled: bool = False
+    turbidity_enabled: bool = False
+
+    def gnss_matched_light_samples(self):
+        """Light samples that span the GNSS sample window, what the "Match GNSS" box sets."""
+        return int(self.gnss_samples_per_window / self.gnss_sampling_rate / 2)
+
+    def gnss_matched_turbidity_samples(self):
+        """Turbidity samples that span the GNSS sample window, what the "Match GNSS" box sets."""
+        return int(self.gnss_samples_per_window / self.gnss_sampling_rate)
+
+
+# Settings the programmer starts with, and that manifest columns left out take
+DEFAULT_CONFIG = MicroSWIFTConfig(tracking_number=100, gnss_samples_per_window=4096, duty_cycle=30,
+                                  iridium_max_transmit_time=5, gnss_max_acquisition_wait_time=5,
+                                  total_light_samples=512, total_turbidity_samples=1024)
+
+
+@dataclass(frozen=True)
+class ValidationRule:
+    name: str
+    fields: tuple  # MicroSWIFTConfig fields the rule reads
+    check: object  # check(settings) -> True if the rule is broken
+    message: str
+
+
+def _gnss_duration(settings):
+    # Minutes the GNSS window needs, waiting for a fix first
+    return (settings.gnss_samples_per_window / settings.gnss_sampling_rate) / 60 + 1 + \
+        settings.gnss_max_acquisition_wait_time
+
+
+# Timing rules of the Verify button, in the order their problems are reported. Checks only use arithmetic, comparisons
+# and "&" so they evaluate NumPy arrays as well as numbers.
+FEASIBILITY_RULES = (
+    ValidationRule("gnss_window", ("duty_cycle", "iridium_max_transmit_time", "gnss_samples_per_window",
+                                   "gnss_sampling_rate", "gnss_max_acquisition_wait_time"),
+                   lambda s: s.duty_cycle - _gnss_duration(s) - s.iridium_max_transmit_time < 0,
+                   "Duty cycle not long enough to complete GNSS sample window.\n"),
+    # Light samples at 30 per minute
+    ValidationRule("light_window", ("duty_cycle", "iridium_max_transmit_time", "light_enabled", "total_light_samples"),
+                   lambda s: s.light_enabled & (s.duty_cycle - (s.total_light_samples / 30 + 1) -
+                                                s.iridium_max_transmit_time < 0),
+                   "Duty cycle not long enough to complete Light sample window.\n"),
+    # Samples spanning the GNSS window, see MicroSWIFTConfig.gnss_matched_light_samples()
+    ValidationRule("light_samples", ("light_enabled", "gnss_samples_per_window", "gnss_sampling_rate"),
+                   lambda s: s.light_enabled & (s.gnss_samples_per_window / s.gnss_sampling_rate / 2 >=
+                                                MAX_LIGHT_SAMPLES + 1),
+                   "Max number of light samples is 1800.\n"),
+    # Turbidity samples at 60 per minute
+    ValidationRule("turbidity_window", ("duty_cycle", "iridium_max_transmit_time", "turbidity_enabled",
+                                        "total_turbidity_samples"),
+                   lambda s: s.turbidity_enabled & (s.duty_cycle - (s.total_turbidity_samples / 60 + 1) -
+                                                    s.iridium_max_transmit_time < 0),
+                   "Duty cycle not long enough to complete Turbidity sample window.\n"),
+    ValidationRule("turbidity_samples", ("turbidity_enabled", "gnss_samples_per_window", "gnss_sampling_rate"),
+                   lambda s: s.turbidity_enabled & (s.gnss_samples_per_window / s.gnss_sampling_rate >=
+                                                    MAX_TURBIDITY_SAMPLES + 1),
+                   "Max number of turbidity samples is 3600.\n"),
+)
+
+
+def _range_rule(field, label, maximum):
+    return ValidationRule(f"{field}_range", (field,), lambda s: not 0 <= getattr(s, field) <= maximum,
+                          f"{label} must be between 0 and {maximum}.\n")
+
+
+# Everything verify_settings checks, in the order problems are reported
+VALIDATION_RULES = (
+    _range_rule("tracking_number", "Tracking number", MAX_TRACKING_NUMBER),
+    _range_rule("gnss_samples_per_window", "Number of GNSS samples", MAX_GNSS_SAMPLES),
+    _range_rule("duty_cycle", "Duty cycle", MAX_DUTY_CYCLE),
+    _range_rule("iridium_max_transmit_time", "Iridium max transmit time", MAX_IRIDIUM_TX_TIME),
+    _range_rule("gnss_max_acquisition_wait_time", "GNSS max acquisition time", MAX_GNSS_ACQUISITION_TIME),
+    _range_rule("total_light_samples", "Number of light samples", MAX_LIGHT_SAMPLES),
+    _range_rule("total_turbidity_samples", "Number of turbidity samples", MAX_TURBIDITY_SAMPLES),
+    _range_rule("turbidity_serial_number", "Turbidity serial number", MAX_TURBIDITY_SERIAL_NUMBER),
+    ValidationRule("gnss_sampling_rate", ("gnss_sampling_rate",),
+                   lambda s: s.gnss_sampling_rate not in GNSS_SAMPLE_RATES,
+                   f"GNSS sample rate must be one of {', '.join(map(str, GNSS_SAMPLE_RATES))} Hz.\n"),
+    ValidationRule("light_sensor_gain", ("light_sensor_gain",),
+                   lambda s: not 0 <= s.light_sensor_gain < len(LIGHT_GAINS),
+                   f"Light sensor gain must be one of {', '.join(LIGHT_GAINS)}.\n"),
+    ValidationRule("ct_temperature", ("ct_enabled", "temperature_enabled"),
+                   lambda s: s.ct_enabled and s.temperature_enabled,
+                   "CT and temperature sensors cannot both be enabled.\n"),
+) + FEASIBILITY_RULES
+
+
+def rule_violated(rule, config):
+    # Timing rules divide by the GNSS rate, they are skipped until it is valid
+    if rule in FEASIBILITY_RULES and config.gnss_sampling_rate not in GNSS_SAMPLE_RATES:
+        return False
+    return bool(rule.check(config))
+
+
+def feasibility_violations(gnss_samples_per_window, gnss_sampling_rate, duty_cycle, iridium_max_transmit_time,
+                           gnss_max_acquisition_wait_time, light_enabled=False, total_light_samples=0,
+                           turbidity_enabled=False, total_turbidity_samples=0):
+    """
+    Evaluates the Verify button's timing rules, returns {rule name: violated} in FEASIBILITY_RULES order.
+
+    Arguments may be plain numbers or NumPy arrays. Arrays broadcast against each other, so a sweep over many
+    candidate settings is a single call, and each result is a boolean array of the broadcast shape.
+    """
+    settings = SimpleNamespace(gnss_samples_per_window=gnss_samples_per_window, gnss_sampling_rate=gnss_sampling_rate,
+                               duty_cycle=duty_cycle, iridium_max_transmit_time=iridium_max_transmit_time,
+                               gnss_max_acquisition_wait_time=gnss_max_acquisition_wait_time,
+                               light_enabled=light_enabled, total_light_samples=total_light_samples,
+                               turbidity_enabled=turbidity_enabled, total_turbidity_samples=total_turbidity_samples)
+
+    return {rule.name: rule.check(settings) for rule in FEASIBILITY_RULES}
+
+
+def verify_settings(config):
+    """Checks a configuration the way the Verify button does. Returns a list of problems, empty if it is valid."""
+    return [rule.message for rule in VALIDATION_RULES if rule_violated(rule, config)]
+
+
+class SettingsValidator:
+    """
+    verify_settings for a configuration that is edited a field at a time. Each rule's result is kept, and update()
+    re-runs only the rules that read a field that changed.
+    """
+
+    def __init__(self):
+        self.rules_by_field = {}
+        for rule in VALIDATION_RULES:
+            for field in rule.fields:
+                self.rules_by_field.setdefault(field, []).append(rule)
+
+        self.config = None
+        self.violated = {}  # rule name: bool
+
+    def update(self, config):
+        """Checks a new version of the configuration, returns the names of the fields that changed."""
+        if self.config is None:
+            changed = [field.name for field in fields(MicroSWIFTConfig)]
+        else:
+            changed = [name for name, _, _ in diff_configs(self.config, config)]
+
+        rules = {rule.name: rule for field in changed for rule in self.rules_by_field.get(field, ())}
+        if "gnss_sampling_rate" in changed:
+            # Whether the timing rules apply at all depends on the rate, see rule_violated()
+            rules.update((rule.name, rule) for rule in FEASIBILITY_RULES)
+
+        for rule in rules.values():
+            self.violated[rule.name] = rule_violated(rule, config)
+
+        self.config = replace(config)
+        return changed
+
+    def problems(self):
+        """Broken rules, in the order verify_settings reports them."""
+        return [rule for rule in VALIDATION_RULES if self.violated.get(rule.name)]
+
+
+class ConfigDecodeError(Exception):
+    pass
+
+
+@dataclass
+class DecodedConfig:
+    """A configuration struct read back from a config.bin/.sbd file or a device."""
+    config: MicroSWIFTConfig
+    compile_date: str  # as stored, MM/DD/YYYY
+    compile_time: str  # HH:MM:SS
+
+    def timestamp(self):
+        """When the struct was generated, None if the date and time fields are blank or garbled."""
+        try:
+            return datetime.strptime(f"{self.compile_date} {self.compile_time}", f"{DATE_FORMAT} {TIME_FORMAT}")
+        except ValueError:
+            return None
+
+
+def _timestamp_fields(timestamp):
+    timestamp = timestamp or datetime.now()
+    # Null terminated
+    return ((timestamp.strftime(DATE_FORMAT) + "\x00").encode("utf-8"),
+            (timestamp.strftime(TIME_FORMAT) + "\x00").encode("utf-8"))
+
+
+def _c_string(raw):
+    return raw.split(b"\x00", 1)[0].decode("utf-8", errors="replace")
+
+
+def pack_config(config, timestamp=None):
+    """Packs a configuration into the 64 byte microSWIFT_configuration struct, stamped with timestamp (now)."""
+    date, time = _timestamp_fields(timestamp)
+
+    return CONFIG_STRUCT.pack(*(field.type(getattr(config, field.name)) for field in fields(MicroSWIFTConfig)),
+                              date, time)
+
+
+def unpack_config(data):
+    """Decodes a 64 byte configuration struct. Raises ConfigDecodeError if data is the wrong size."""
+    if len(data) != CONFIG_STRUCT_SIZE:
+        raise ConfigDecodeError(f"Configuration struct is {CONFIG_STRUCT_SIZE} bytes, got {len(data)}")
+
+    *values, date, time = CONFIG_STRUCT.unpack(data)
+    return DecodedConfig(MicroSWIFTConfig(*values), _c_string(date), _c_string(time))
+
+
+def read_config_file(path):
+    """Decodes a saved config.bin or over-the-air .sbd configuration file."""
+    with open(path, 'rb') as f:
+        data = f.read(CONFIG_STRUCT_SIZE + 1)
+
+    try:
+        return unpack_config(data)
+    except ConfigDecodeError as e:
+        raise ConfigDecodeError(f"{path}: {e}")
+
+
+def config_dtype():
+    """NumPy structured dtype matching the struct byte for byte, for encoding and decoding configs in bulk."""
+    import numpy as np  # Only needed for bulk work, keeps NumPy optional for the programmer
+
+    return np.dtype([(field.name, field.numpy_type) for field in CONFIG_SCHEMA])
+
+
+def config_array(configs, timestamp=None):
+    """
+    Lays a sequence of MicroSWIFTConfigs out as a structured array with config_dtype(), all stamped with timestamp.
+
+    Columns of the result can be modified with ordinary NumPy operations before encoding with pack_configs().
+    """
+    import numpy as np
+
+    configs = list(configs)
+    array = np.zeros(len(configs), dtype=config_dtype())
+    for field in fields(MicroSWIFTConfig):
+        array[field.name] = [getattr(config, field.name) for config in configs]
+    array["compile_date_flash"], array["compile_time_flash"] = _timestamp_fields(timestamp)
+
+    return array
+
+
+def pack_configs(configs, timestamp=None):
+    """
+    Encodes many configurations in one go. configs is a structured array from config_array()/unpack_configs() or a
+    sequence of MicroSWIFTConfigs. Returns the concatenated 64 byte structs.
+    """
+    if not hasattr(configs, "dtype"):
+        configs = config_array(configs, timestamp)
+
+    return configs.astype(config_dtype(), copy=False).tobytes()
+
+
+def unpack_configs(data):
+    """
+    Decodes concatenated configuration structs (e.g. a folder of config files joined together) into a read-only
+    structured array with one record per struct.
+    """
+    import numpy as np
+
+    if len(data) % CONFIG_STRUCT_SIZE:
+        raise ConfigDecodeError(f"{len(data)} bytes is not a whole number of {CONFIG_STRUCT_SIZE} byte structs")
+
+    return np.frombuffer(data, dtype=config_dtype())
+
+
+def array_to_configs(array):
+    """Turns a structured array back into a DecodedConfig per record."""
+    names = [field.name for field in fields(MicroSWIFTConfig)]
+    columns = [array[name].tolist() for name in names]
+
+    return [DecodedConfig(MicroSWIFTConfig(*values), _c_string(date), _c_string(time))
+            for *values, date, time in zip(*columns, array["compile_date_flash"].tolist(),
+                                           array["compile_time_flash"].tolist())]
+
+
+def describe_field(name, value):
+    """A MicroSWIFTConfig field value the way the programmer's controls show it."""
+    if name == "iridium_v3f":
+        return IRIDIUM_TYPES[1] if value else IRIDIUM_TYPES[0]
+    if name == "light_sensor_gain":
+        return LIGHT_GAINS[value] if 0 <= value < len(LIGHT_GAINS) else f"invalid ({value})"
+    if name == "gnss_sampling_rate":
+        return f"{value} Hz"
+    if isinstance(value, bool):
+        return "Yes" if value else "No"
+    return str(value)
+
+
+def diff_configs(a, b):
+    """Returns (field name, value in a, value in b) for every field where two MicroSWIFTConfigs differ."""
+    return [(field.name, getattr(a, field.name), getattr(b, field.name)) for field in fields(MicroSWIFTConfig)
+            if getattr(a, field.name) != getattr(b, field.name)]
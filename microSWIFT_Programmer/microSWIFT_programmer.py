@@ -1,183 +1,198 @@
 
-import platform
-import struct
+import time
+
+# --profile_startup times the imports from here
+STARTUP_TIME = time.perf_counter()
+
 import sys
 import os
-import requests
-import serial.tools.list_ports
+import importlib
 import re
-import subprocess
 import argparse
+import threading
+
+# Commands that run headless, e.g. "microSWIFT_programmer.py batch manifest.csv", handed off to their module before
+# anything below imports Qt
+HEADLESS_COMMANDS = {"batch": "batch_programmer", "sbd": "sbd_generator", "sweep": "config_sweep",
+                     "audit": "audit_log", "timings": "phase_timing"}
+
+if __name__ == "__main__" and len(sys.argv) > 1 and sys.argv[1] in HEADLESS_COMMANDS:
+    sys.exit(importlib.import_module(HEADLESS_COMMANDS[sys.argv[1]]).main(sys.argv[2:]))
+
+from microSWIFT_config import (MicroSWIFTConfig, SettingsValidator, pack_config, diff_configs, describe_field,
+                               DEFAULT_CONFIG, IRIDIUM_TYPES, GNSS_SAMPLE_RATES, LIGHT_GAINS, SBD_EXTENSION,
+                               SBD_MAX_FILENAME_LENGTH)
+from firmware_cache import FirmwareCache, FirmwareCacheError, FIRMWARE_URL, FIRMWARE_DIGEST_URL, FIRMWARE_FILENAME
+from stm32_cli import CONFIG_PATH, STM32CubeProgrammerBackend
+from simulated_backend import SimulatedProgrammerBackend
+from programming_job import ProgrammingJob, PhaseProgress, run_programming_job, read_device_config
+from device_monitor import ProbeRegistry, watch_probes
+from startup_profile import StartupProfile
+from status_log import StatusLogModel, StatusLogView, DEFAULT_MAX_LINES
+from audit_log import AuditLog, DEFAULT_DB_PATH
+from phase_timing import TimingTrace, format_timings
 
 from PyQt6 import QtCore, QtGui, QtWidgets
-from PyQt6.QtGui import QTextCharFormat, QColor, QGuiApplication, QFont, QTextCursor
-from PyQt6.QtWidgets import QGraphicsScene, QGraphicsPixmapItem, QTextEdit, QFileDialog, QMainWindow
+from PyQt6.QtGui import QFont
+from PyQt6.QtWidgets import QGraphicsScene, QGraphicsPixmapItem, QFileDialog, QMainWindow, QMessageBox
 from PyQt6.QtGui import QPixmap
-from PyQt6.QtCore import pyqtSignal, QThread, Qt
+from PyQt6.QtCore import pyqtSignal, QThread
 
-from datetime import datetime
 
 PROGRAMMER_MAJOR_VERSION = 1
-PROGRAMMER_MINOR_VERSION = 3
+PROGRAMMER_MINOR_VERSION = 4
 
 
-def download_microSWIFT_firmware():
-    # Raw file URL on GitHub
-    url = "https://github.com/SASlabgroup/microSWIFT-V2-Binaries/raw/main/V2.2/microSWIFT_V2.2.elf"
+class FirmwareDownloadWorker(QThread):
+    progress = pyqtSignal(int, int, float)  # bytes received, total bytes (0 if the server did not say), bytes/sec
+    downloadFinished = pyqtSignal(bool, str)  # success, message
 
-    # Define local path to save the file
-    firmware_dir = os.path.join(os.path.dirname(__file__), "firmware")
-    local_file_path = os.path.join(firmware_dir, "microSWIFT_V2.2.elf")
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.firmware_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "firmware")
 
-    # Ensure the firmware directory exists
-    os.makedirs(firmware_dir, exist_ok=True)
+    def run(self):
+        # Imported on this thread rather than at startup, it is the slowest import the programmer has
+        import requests
 
-    try:
-        # Add a timeout (in seconds)
-        response = requests.get(url, stream=True, timeout=10)
-        response.raise_for_status()  # Raise an error on bad HTTP status
+        try:
+            # Conditional request against the local cache, only transfers the image if it changed on GitHub
+            result = FirmwareCache(self.firmware_dir).fetch(FIRMWARE_URL, digest_url=FIRMWARE_DIGEST_URL, timeout=10,
+                                                            progress_callback=self.reportProgress)
+        except (requests.RequestException, FirmwareCacheError, OSError) as e:
+            self.downloadFinished.emit(False, str(e))
+            return
 
-        # Write the file (overwrite if exists)
-        with open(local_file_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+        if result.updated:
+            message = (f"Firmware successfully updated from GitHub "
+                       f"({result.bytes_transferred / 1024:.0f} KB at {result.throughput / 1024:.1f} KB/s).")
+        else:
+            message = "Firmware is up to date with GitHub."
 
-        return True
-    except (requests.RequestException, requests.Timeout):
-        return False
+        if not result.verified:
+            message += "\nNo published SHA-256 digest found, firmware checked for completeness only."
+
+        self.downloadFinished.emit(True, message)
+
+    def reportProgress(self, received, total, bytes_per_second):
+        if self.isInterruptionRequested():
+            raise FirmwareCacheError("Firmware download cancelled")
+
+        self.progress.emit(received, total or 0, bytes_per_second)
+
+    def cancel(self):
+        self.requestInterruption()
+        self.wait()
+
+    def cachedFirmwareAvailable(self):
+        return os.path.isfile(os.path.join(self.firmware_dir, FIRMWARE_FILENAME))
 
 
 class Worker(QThread):
     finished = pyqtSignal()
     stdoutAvailable = pyqtSignal(str)
     stderrAvailable = pyqtSignal(str)
+    phaseFinished = pyqtSignal(str, bool)  # phase name, success
+    progressAvailable = pyqtSignal(int)  # percent complete of the current CLI operation
+    phaseTimings = pyqtSignal(object)  # list of TimingSpan for the job, its sessions, phases and CLI steps
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, single_session=True, differential=True, backend=None, audit_log=None,
+                 progress=None):
         super().__init__(parent)
+        self.backend = backend
+        self.audit_log = audit_log
+        # Phases already completed on the attached device, so pressing Program again resumes after a failure
+        self.progress = progress
+        # Firmware, configuration and RAM clear in one CLI launch/SWD connect instead of three
+        self.single_session = single_session
+        # Only rewrite the flash sectors that differ from the firmware image
+        self.differential = differential
+        self.probe_serial = None
 
     def run(self):
-        firmwareBurnSuccessful = False
-        configBurnSuccessful = False
-        systemOS = platform.system()
-
-        if systemOS == "Darwin":  # MacOS
-            programmerPath = ("/Applications/STMicroelectronics/STM32Cube/STM32CubeProgrammer/"
-                              "STM32CubeProgrammer.app/Contents/MacOs/bin/STM32_Programmer_CLI")
-        else:  # Windows
-            programmerPath = ("C:\\Program Files\\STMicroelectronics\\STM32Cube\\STM32CubeProgrammer\\bin"
-                              "\\STM32_Programmer_CLI.exe")
-
-        # Define the command to run STM32CubeProgrammer
-        command = [
-            programmerPath,
-            "--connect", "port=SWD",  # Specify the port (e.g., USB, JTAG)
-            "--download", "firmware/microSWIFT_V2.2.elf",  # Firmware file to write to the device
-            "--verify",  # Verify after programming
-        ]
-
-        # Burn the firmware first
-        try:
-            process = subprocess.Popen(command, text=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        job = ProgrammingJob(probe_serial=self.probe_serial, single_session=self.single_session,
+                             differential=self.differential)
+        run_programming_job(job, self.stdoutAvailable.emit, self.stderrAvailable.emit, self.phaseFinished.emit,
+                            backend=self.backend, on_progress=self.progressAvailable.emit, audit_log=self.audit_log,
+                            on_timings=self.phaseTimings.emit, progress=self.progress)
 
-            # Do other work while the subprocess is running
-            while process.poll() is None:
-                # Retrieve output (if needed)
-                stdout, stderr = process.communicate()
+        self.finished.emit()
 
-                if stdout:
-                    cleanedText = re.sub(r'\x1b\[[0-9;]*[mG]', '', stdout)
-                    self.stdoutAvailable.emit(cleanedText)
 
-            if process.returncode == 0:
-                firmwareBurnSuccessful = True
-            else:
-                self.stderrAvailable.emit(f"\nProgramming Failed with code {process.returncode}")
+class ReadConfigWorker(QThread):
+    stderrAvailable = pyqtSignal(str)
+    configRead = pyqtSignal(object)  # DecodedConfig, None if it could not be read
 
+    def __init__(self, parent=None, backend=None):
+        super().__init__(parent)
+        self.backend = backend
 
-        except subprocess.CalledProcessError as e:
-            # If there's an error, show the error message
-            self.stderrAvailable.emit(f"/nError: {e.stderr}")
-            self.stderrAvailable.emit(e.stdout)
-        except Exception as e:
-            self.stderrAvailable.emit(f"Unexpected error: {str(e)}")
+    def run(self):
+        # CLI chatter is left out, the decoded settings are what gets shown
+        self.configRead.emit(read_device_config(lambda text: None, self.stderrAvailable.emit, backend=self.backend))
 
-        if firmwareBurnSuccessful:
-            command = [
-                programmerPath,
-                "--connect", "port=SWD",  # Specify the port (e.g., USB, JTAG)
-                "--download", "firmware/config.bin",  # Firmware file to write to the device
-                "0x083FFC00",  # download address
-            ]
 
-            # Burn the configuration bytes
-            try:
-                process = subprocess.Popen(command, text=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-                # Do other work while the subprocess is running
-                while process.poll() is None:
-                    # Retrieve output (if needed)
-                    stdout, stderr = process.communicate()
-
-                    if stdout:
-                        cleanedText = re.sub(r'\x1b\[[0-9;]*[mG]', '', stdout)
-                        self.stdoutAvailable.emit(cleanedText)
-
-                if process.returncode != 0:
-                    self.stderrAvailable.emit(f"\nProgramming Failed with code {process.returncode}")
-
-                else:
-                    configBurnSuccessful = True;
-
-            except subprocess.CalledProcessError as e:
-                # If there's an error, show the error message
-                self.stderrAvailable.emit(f"/nError: {e.stderr}")
-                self.stderrAvailable.emit(e.stdout)
-            except Exception as e:
-                self.stdoutAvailable.emit(f"Unexpected error: {str(e)}")
-
-        if configBurnSuccessful:
-            command = [
-                programmerPath,
-                "--connect", "port=SWD",  # Specify the port (e.g., USB, JTAG)
-                "--download", "firmware/zeros_64k.bin",  # Firmware file to write to the device
-                "0x200C0000",  # download address
-            ]
-
-            # Burn the configuration bytes
-            try:
-                process = subprocess.Popen(command, text=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+class DeviceMonitorWorker(QThread):
+    probeConnected = pyqtSignal(object)  # StlinkProbe
+    probeDisconnected = pyqtSignal(object)  # StlinkProbe
 
-                # Do other work while the subprocess is running
-                while process.poll() is None:
-                    # Retrieve output (if needed)
-                    stdout, stderr = process.communicate()
+    def __init__(self, parent=None, backend=None):
+        super().__init__(parent)
+        self.backend = backend
+        # Read by the GUI instead of rescanning the USB ports
+        self.registry = ProbeRegistry()
+        self.stop_event = threading.Event()
 
-                    if stdout:
-                        cleanedText = re.sub(r'\x1b\[[0-9;]*[mG]', '', stdout)
-                        self.stdoutAvailable.emit(cleanedText)
+    def run(self):
+        watch_probes(self.backend, self.registry, self.probeConnected.emit, self.probeDisconnected.emit,
+                     self.stop_event)
 
-                if process.returncode != 0:
-                    self.stderrAvailable.emit(f"\nProgramming Failed with code {process.returncode}")
+    def cancel(self):
+        self.stop_event.set()
+        self.wait()
 
-            except subprocess.CalledProcessError as e:
-                # If there's an error, show the error message
-                self.stderrAvailable.emit(f"/nError: {e.stderr}")
-                self.stderrAvailable.emit(e.stdout)
-            except Exception as e:
-                self.stderrAvailable.emit(f"Unexpected error: {str(e)}")
 
-        self.finished.emit()
+class FirstPaintWatcher(QtCore.QObject):
+    """Calls callback once, after widget has been painted for the first time."""
+
+    def __init__(self, widget, callback):
+        super().__init__(widget)
+        self.widget = widget
+        self.callback = callback
+        widget.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if obj is self.widget and event.type() == QtCore.QEvent.Type.Paint:
+            self.widget.removeEventFilter(self)
+            # Queued so the paint has finished by the time the callback runs
+            QtCore.QTimer.singleShot(0, self.callback)
+        return False
 
 
 class ProgrammerApp(QMainWindow):
     device_connected = False
     stlink_port = ""
-    configFilePath = "firmware/config.bin"
+    stlink_probes = []
+    configFilePath = CONFIG_PATH
 
-    def __init__(self, bypasss_firmware_update, firmware_updated):
+    def __init__(self, bypasss_firmware_update, single_session=True, differential=True, backend=None,
+                 startup_profile=None, status_log_lines=DEFAULT_MAX_LINES, audit_db=DEFAULT_DB_PATH,
+                 timing_trace=None):
         super().__init__()
+        # Every device programmed is logged, None turns the audit log off
+        self.auditLog = AuditLog(audit_db) if audit_db else None
+        # Timing spans of every job are appended here if a file is given
+        self.timingTrace = TimingTrace(timing_trace) if timing_trace else None
+        self.phaseProgress = PhaseProgress()
+        self.status_log_lines = status_log_lines
+        self.startup_profile = startup_profile
+        self.backend = backend or STM32CubeProgrammerBackend()
         self.bypass_firmware_update = bypasss_firmware_update
-        self.firmware_updated = firmware_updated
+        self.single_session = single_session
+        self.differential = differential
+        # Program stays disabled until the firmware download finishes or the user accepts the cached copy
+        self.firmware_ready = bypasss_firmware_update
+        self.settings_verified = False
         self.setupUi()
 
     def setupUi(self):
@@ -263,7 +278,6 @@ class ProgrammerApp(QMainWindow):
         font.setPointSize(12)
         self.lightNumSamplesSpinBox.setFont(font)
         self.lightNumSamplesSpinBox.setMaximum(1800)
-        self.lightNumSamplesSpinBox.setProperty("value", 512)
         self.lightNumSamplesSpinBox.setObjectName("lightNumSamplesSpinBox")
         self.lightSamplesHorizLayout.addWidget(self.lightNumSamplesSpinBox)
         self.lightVerticalLayout.addLayout(self.lightSamplesHorizLayout)
@@ -291,7 +305,6 @@ class ProgrammerApp(QMainWindow):
         font.setPointSize(12)
         self.iridiumTxTimeSpinBox.setFont(font)
         self.iridiumTxTimeSpinBox.setMaximum(60)
-        self.iridiumTxTimeSpinBox.setProperty("value", 5)
         self.iridiumTxTimeSpinBox.setObjectName("iridiumTxTimeSpinBox")
         self.iridiumTxTimeHorizLayout.addWidget(self.iridiumTxTimeSpinBox)
         self.iridiumVertLayout.addLayout(self.iridiumTxTimeHorizLayout)
@@ -334,7 +347,6 @@ class ProgrammerApp(QMainWindow):
         font.setPointSize(12)
         self.gnssNumSamplesSpinBox.setFont(font)
         self.gnssNumSamplesSpinBox.setMaximum(32768)
-        self.gnssNumSamplesSpinBox.setProperty("value", 4096)
         self.gnssNumSamplesSpinBox.setObjectName("gnssNumSamplesSpinBox")
         self.gnssSamplesHorizLayout.addWidget(self.gnssNumSamplesSpinBox)
         self.gnssVertLayout.addLayout(self.gnssSamplesHorizLayout)
@@ -380,7 +392,6 @@ class ProgrammerApp(QMainWindow):
         font.setPointSize(12)
         self.dutyCycleSpinBox.setFont(font)
         self.dutyCycleSpinBox.setMaximum(1440)
-        self.dutyCycleSpinBox.setProperty("value", 30)
         self.dutyCycleSpinBox.setObjectName("dutyCycleSpinBox")
         self.dutyCycleHorizLayout.addWidget(self.dutyCycleSpinBox)
         self.timingVertLayout.addLayout(self.dutyCycleHorizLayout)
@@ -399,7 +410,6 @@ class ProgrammerApp(QMainWindow):
         self.gnssMaxAcquisitionTimeSpinBox.setFont(font)
         self.gnssMaxAcquisitionTimeSpinBox.setWhatsThis("")
         self.gnssMaxAcquisitionTimeSpinBox.setMaximum(10)
-        self.gnssMaxAcquisitionTimeSpinBox.setProperty("value", 5)
         self.gnssMaxAcquisitionTimeSpinBox.setObjectName("gnssMaxAcquisitionTimeSpinBox")
         self.gnssBufferTimeHorizLayout.addWidget(self.gnssMaxAcquisitionTimeSpinBox)
         self.timingVertLayout.addLayout(self.gnssBufferTimeHorizLayout)
@@ -416,7 +426,6 @@ class ProgrammerApp(QMainWindow):
         font.setPointSize(12)
         self.trackingNumberSpinBox.setFont(font)
         self.trackingNumberSpinBox.setMaximum(1000)
-        self.trackingNumberSpinBox.setProperty("value", 100)
         self.trackingNumberSpinBox.setObjectName("trackingNumberSpinBox")
         self.trackingNumberHorizLayourt.addWidget(self.trackingNumberSpinBox)
         self.timingVertLayout.addLayout(self.trackingNumberHorizLayourt)
@@ -444,15 +453,40 @@ class ProgrammerApp(QMainWindow):
         self.verifyButton.setFont(font)
         self.verifyButton.setObjectName("verifyButton")
         self.statusAndProgVertLayout.addWidget(self.verifyButton)
+        self.validationLabel = QtWidgets.QLabel(parent=self.layoutWidget3)
+        self.validationLabel.setStyleSheet("color: red;")
+        self.validationLabel.setWordWrap(True)
+        self.validationLabel.setObjectName("validationLabel")
+        self.statusAndProgVertLayout.addWidget(self.validationLabel)
+        self.programHorizLayout = QtWidgets.QHBoxLayout()
+        self.programHorizLayout.setObjectName("programHorizLayout")
         self.programButton = QtWidgets.QPushButton(parent=self.layoutWidget3)
         font = QtGui.QFont()
         font.setPointSize(12)
         self.programButton.setFont(font)
         self.programButton.setObjectName("programButton")
-        self.statusAndProgVertLayout.addWidget(self.programButton)
+        self.programHorizLayout.addWidget(self.programButton)
+        self.programFleetButton = QtWidgets.QPushButton(parent=self.layoutWidget3)
+        font = QtGui.QFont()
+        font.setPointSize(12)
+        self.programFleetButton.setFont(font)
+        self.programFleetButton.setObjectName("programFleetButton")
+        self.programHorizLayout.addWidget(self.programFleetButton)
+        self.readConfigButton = QtWidgets.QPushButton(parent=self.layoutWidget3)
+        font = QtGui.QFont()
+        font.setPointSize(12)
+        self.readConfigButton.setFont(font)
+        self.readConfigButton.setObjectName("readConfigButton")
+        self.programHorizLayout.addWidget(self.readConfigButton)
+        self.statusAndProgVertLayout.addLayout(self.programHorizLayout)
         self.downloadConfigFile = QtWidgets.QPushButton(parent=self.layoutWidget3)
         self.downloadConfigFile.setObjectName("downloadConfigFile")
         self.statusAndProgVertLayout.addWidget(self.downloadConfigFile)
+        self.firmwareProgressBar = QtWidgets.QProgressBar(parent=self.layoutWidget3)
+        self.firmwareProgressBar.setMaximum(0)
+        self.firmwareProgressBar.setTextVisible(True)
+        self.firmwareProgressBar.setObjectName("firmwareProgressBar")
+        self.statusAndProgVertLayout.addWidget(self.firmwareProgressBar)
         self.turbidityFrame = QtWidgets.QFrame(parent=self.centralwidget)
         self.turbidityFrame.setGeometry(QtCore.QRect(10, 240, 301, 111))
         self.turbidityFrame.setFrameShape(QtWidgets.QFrame.Shape.StyledPanel)
@@ -508,13 +542,12 @@ class ProgrammerApp(QMainWindow):
         font.setPointSize(12)
         self.turbidityNumSamplesSpinBox.setFont(font)
         self.turbidityNumSamplesSpinBox.setMaximum(3600)
-        self.turbidityNumSamplesSpinBox.setProperty("value", 1024)
         self.turbidityNumSamplesSpinBox.setObjectName("turbidityNumSamplesSpinBox")
         self.turbiditySamplesHorizLayout.addWidget(self.turbidityNumSamplesSpinBox)
         self.turbidityVerticalLayout.addLayout(self.turbiditySamplesHorizLayout)
-        self.statusTextEdit = QtWidgets.QTextEdit(parent=self.centralwidget)
-        self.statusTextEdit.setGeometry(QtCore.QRect(10, 570, 621, 221))
-        self.statusTextEdit.setObjectName("statusTextEdit")
+        self.statusLogView = StatusLogView(parent=self.centralwidget)
+        self.statusLogView.setGeometry(QtCore.QRect(10, 570, 621, 221))
+        self.statusLogView.setObjectName("statusLogView")
         self.setCentralWidget(self.centralwidget)
 
         self.retranslateUi(self)
@@ -545,58 +578,58 @@ class ProgrammerApp(QMainWindow):
         self.verifyButton.setText(_translate("MainWindow", "Verify"))
         self.programButton.setText(_translate("MainWindow", "Program"))
         self.downloadConfigFile.setText(_translate("MainWindow", "Download Config"))
+        self.programFleetButton.setText(_translate("MainWindow", "Program Fleet"))
+        self.readConfigButton.setText(_translate("MainWindow", "Read Config"))
         self.turbidityEnableButton.setText(_translate("MainWindow", "Enable Turbidity"))
         self.turbidityMatchGNSSCheckbox.setText(_translate("MainWindow", "Match GNSS period"))
         self.turbiditySerialNumberLabel.setText(_translate("MainWindow", "Serial Number"))
         self.turbidityNumSamplesLabel.setText(_translate("MainWindow", "Number of samples @ 1Hz"))
-
-    def adjust_font_color_based_on_background(self, text_edit: QTextEdit):
-        """Adjusts font color in a QTextEdit based on background color."""
-        # Get the background color from the QTextEdit's palette
-        bg_color = text_edit.palette().color(text_edit.viewport().backgroundRole())
-
-        red = bg_color.red()
-        green = bg_color.green()
-        blue = bg_color.blue()
-
-        # Determine if the background is "close enough" to black or white
-        is_black = bg_color.red() < 50 and bg_color.green() < 50 and bg_color.blue() < 50
-        is_white = bg_color.red() > 200 and bg_color.green() > 200 and bg_color.blue() > 200
-
-        # Decide font color
-        if is_black:
-            font_color = QColor(Qt.GlobalColor.white)
-        elif is_white:
-            font_color = QColor(Qt.GlobalColor.black)
-        else:
-            # For non-pure black/white backgrounds, you could calculate contrast or set a default
-            # Here we default to black for safety
-            font_color = QColor(Qt.GlobalColor.black)
-
-        # Apply the font color to the entire document
-        cursor = text_edit.textCursor()
-        cursor.select(QTextCursor.SelectionType.Document)
-        format = QTextCharFormat()
-        format.setForeground(font_color)
-        cursor.mergeCharFormat(format)
-        text_edit.mergeCurrentCharFormat(format)
+        self.firmwareProgressBar.setFormat(_translate("MainWindow", "Firmware download %p%"))
 
     def finishSetup(self):
+        if self.startup_profile:
+            self.startup_profile.mark("setupUi")
+
         # Added functionality
-        self.worker = Worker()
+        self.worker = Worker(single_session=self.single_session, differential=self.differential,
+                             backend=self.backend, audit_log=self.auditLog, progress=self.phaseProgress)
         self.thread = QThread()
         self.worker.moveToThread(self.thread)
+        self.firmwareDownloadWorker = FirmwareDownloadWorker()
+        self.settings_validator = SettingsValidator()
+        self.verify_button_verified = None
+        self.validationTimer = QtCore.QTimer(self)
+        self.validationTimer.setSingleShot(True)
+        self.validationTimer.setInterval(0)
+        # Widgets showing each configuration field, outlined when a rule reading that field is broken
+        self.fieldWidgets = {
+            "tracking_number": self.trackingNumberSpinBox,
+            "gnss_samples_per_window": self.gnssNumSamplesSpinBox,
+            "duty_cycle": self.dutyCycleSpinBox,
+            "iridium_max_transmit_time": self.iridiumTxTimeSpinBox,
+            "gnss_max_acquisition_wait_time": self.gnssMaxAcquisitionTimeSpinBox,
+            "gnss_sampling_rate": self.gnssSampleRateComboBox,
+            "total_light_samples": self.lightNumSamplesSpinBox,
+            "light_sensor_gain": self.lightGainComboBox,
+            "total_turbidity_samples": self.turbidityNumSamplesSpinBox,
+            "turbidity_serial_number": self.turbiditySerialNumberSpinBox,
+        }
+        self.readConfigWorker = ReadConfigWorker(backend=self.backend)
+        self.statusLog = StatusLogModel(self.status_log_lines, self)
+        self.statusLogView.setModel(self.statusLog)
+        self.deviceMonitor = DeviceMonitorWorker(backend=self.backend)
         self.scene = QGraphicsScene()
 
         self.disableAllOptionalSensors()
         self.connectUIElements()
         self.fillComboBoxes()
-        self.find_usb_port()
+        self.updateProbeStatus()
         self.displayPicture()
 
-        self.lightGainComboBox.setCurrentIndex(2)
+        self.showConfig(DEFAULT_CONFIG)
+        self.validateSettings()
 
-        self.statusTextEdit.setFont(QFont("Courier New"))
+        self.statusLogView.setFont(QFont("Courier New"))
 
         (self.writeText
          ("           _        "
@@ -642,12 +675,18 @@ class ProgrammerApp(QMainWindow):
           "\r\r\nPlease ensure you are running the most recent version of this tool."
           "\r\nVisit https://github.com/SASlabgroup/microSWIFT-programmer"))
 
+        # STLinks are tracked in the background from here on, plugging or pulling one updates the window
+        self.deviceMonitor.start()
+
+        if self.startup_profile:
+            self.startup_profile.mark("finishSetup")
+
         if self.bypass_firmware_update:
+            self.firmwareProgressBar.hide()
             self.appendText("Firmware update bypassed.")
-        elif self.firmware_updated:
-            self.appendText("Firmware successfully updated from GitHub.")
         else:
-            self.appendError("Unable to pull firmware from GitHub!")
+            self.appendText("Checking GitHub for firmware updates...")
+            self.firmwareDownloadWorker.start()
 
     def saveConfigAsFile(self):
         file_dialog = QFileDialog(self)
@@ -658,110 +697,74 @@ class ProgrammerApp(QMainWindow):
         if file_dialog.exec():
             selected_file = file_dialog.selectedFiles()[0]
 
+            file_name = os.path.basename(selected_file)
+            if file_name.lower().endswith(SBD_EXTENSION) and len(file_name) > SBD_MAX_FILENAME_LENGTH:
+                self.writeError(f"Over-the-air .sbd file names must be {SBD_MAX_FILENAME_LENGTH} characters or "
+                                f"fewer including the extension, {file_name} is {len(file_name)}.")
+                return
+
             with open(selected_file, "wb") as config_file:
                 config_file.write(self.assembleBinaryConfigStruct())
                 self.writeText("Saved configuration file {file}".format(file=selected_file))
 
 
-    def assembleBinaryConfigStruct(self):
+    def currentConfig(self, tracking_number=None):
         get_int_from_str = lambda s: int(re.search(r'\d+', s).group()) if re.search(r'\d+', s) else None
-        '''
-
-                    Definition of configuration struct from configuration.h in firmware files
-
-                    typedef struct __attribute__((packed)) microSWIFT_configuration
-                    {
-                      uint32_t tracking_number;
-                      uint32_t gnss_samples_per_window;
-                      uint32_t duty_cycle;
-                      uint32_t iridium_max_transmit_time;
-                      uint32_t gnss_max_acquisition_wait_time;
-                      uint32_t gnss_sampling_rate;
-                      uint32_t total_light_samples;
-                      uint32_t light_sensor_gain;
-                      uint32_t total_turbidity_samples;
-                      uint16_t turbidity_serial_number;
-
-                      bool iridium_v3f;
-                      bool gnss_high_performance_mode;
-                      bool ct_enabled;
-                      bool temperature_enabled;
-                      bool light_enabled;
-                      bool turbidity_enabled;
-
-                      const char compile_date_flash[11];
-                      const char compile_time_flash[9];
-                    } microSWIFT_configuration;
-
-                    In microSWIFT.ld:
-
-                      /* Custom variables (firmware version, compile date/time, etc) */
-                      .uservars :
-                      {
-                        /* Variables contained in type microSWIFT_configuration contained in configuration.h */
-                        KEEP(*(.uservars.CONFIGURATION))
-                        *(.uservars*);
-                      } > USERVARS
-                    '''
-
-        current_datetime = datetime.now()
-
-        # Format the date and time strings
-        date = current_datetime.strftime("%m/%d/%Y")  # MM/DD/YYYY
-        time = current_datetime.strftime("%H:%M:%S")  # HH:MM:SS
-        date += "\x00"  # null terminated
-        time += "\x00"  # null terminated
-
-        v3f = self.iridiumTypeComboBox.currentText() == "V3F"
-
-        configStruct = struct.pack("<LLLLLLLLLH??????11s9s",
-                                   int(self.trackingNumberSpinBox.value()),
-                                   int(self.gnssNumSamplesSpinBox.value()),
-                                   int(self.dutyCycleSpinBox.value()),
-                                   int(self.iridiumTxTimeSpinBox.value()),
-                                   int(self.gnssMaxAcquisitionTimeSpinBox.value()),
-                                   get_int_from_str(self.gnssSampleRateComboBox.currentText()),
-                                   int(self.lightNumSamplesSpinBox.value()),
-                                   int(self.lightGainComboBox.currentIndex()),
-                                   int(self.turbidityNumSamplesSpinBox.value()),
-                                   int(self.turbiditySerialNumberSpinBox.value()),
-                                   bool(self.iridiumTypeComboBox.currentText() == "V3F"),
-                                   bool(self.gnssHighPerformanceModeCheckBox.isChecked()),
-                                   bool(self.ctEnableButton.isChecked()),
-                                   bool(self.tempEnableButton.isChecked()),
-                                   bool(self.lightEnableButton.isChecked()),
-                                   bool(self.turbidityEnableButton.isChecked()),
-                                   bytes(date.encode("utf-8")),
-                                   bytes(time.encode("utf-8"))
-                                   )
-
-        num_bytes = len(configStruct)
-
-        return configStruct
+
+        if tracking_number is None:
+            tracking_number = self.trackingNumberSpinBox.value()
+
+        return MicroSWIFTConfig(tracking_number=int(tracking_number),
+                                gnss_samples_per_window=self.gnssNumSamplesSpinBox.value(),
+                                duty_cycle=self.dutyCycleSpinBox.value(),
+                                iridium_max_transmit_time=self.iridiumTxTimeSpinBox.value(),
+                                gnss_max_acquisition_wait_time=self.gnssMaxAcquisitionTimeSpinBox.value(),
+                                gnss_sampling_rate=get_int_from_str(self.gnssSampleRateComboBox.currentText()),
+                                total_light_samples=self.lightNumSamplesSpinBox.value(),
+                                light_sensor_gain=self.lightGainComboBox.currentIndex(),
+                                total_turbidity_samples=self.turbidityNumSamplesSpinBox.value(),
+                                turbidity_serial_number=self.turbiditySerialNumberSpinBox.value(),
+                                iridium_v3f=self.iridiumTypeComboBox.currentText() == "V3F",
+                                gnss_high_performance_mode=self.gnssHighPerformanceModeCheckBox.isChecked(),
+                                ct_enabled=self.ctEnableButton.isChecked(),
+                                temperature_enabled=self.tempEnableButton.isChecked(),
+                                light_enabled=self.lightEnableButton.isChecked(),
+                                turbidity_enabled=self.turbidityEnableButton.isChecked())
+
+    def showConfig(self, config):
+        """Sets the settings widgets to config. The sensor enable buttons are left as they are."""
+        self.trackingNumberSpinBox.setValue(config.tracking_number)
+        self.gnssNumSamplesSpinBox.setValue(config.gnss_samples_per_window)
+        self.dutyCycleSpinBox.setValue(config.duty_cycle)
+        self.iridiumTxTimeSpinBox.setValue(config.iridium_max_transmit_time)
+        self.gnssMaxAcquisitionTimeSpinBox.setValue(config.gnss_max_acquisition_wait_time)
+        self.gnssSampleRateComboBox.setCurrentIndex(GNSS_SAMPLE_RATES.index(config.gnss_sampling_rate))
+        self.lightNumSamplesSpinBox.setValue(config.total_light_samples)
+        self.lightGainComboBox.setCurrentIndex(config.light_sensor_gain)
+        self.turbidityNumSamplesSpinBox.setValue(config.total_turbidity_samples)
+        self.turbiditySerialNumberSpinBox.setValue(config.turbidity_serial_number)
+        self.iridiumTypeComboBox.setCurrentIndex(IRIDIUM_TYPES.index("V3F" if config.iridium_v3f else "V3D"))
+        self.gnssHighPerformanceModeCheckBox.setChecked(config.gnss_high_performance_mode)
+
+    def assembleBinaryConfigStruct(self, tracking_number=None):
+        # Struct layout is documented in microSWIFT_config.py
+        return pack_config(self.currentConfig(tracking_number))
+
     def assembleBinaryConfigFile(self):
         with open(self.configFilePath, "wb") as configFile:
             configFile.write(self.assembleBinaryConfigStruct())
 
     def fillComboBoxes(self):
         # Iridium type drop box
-        self.iridiumTypeComboBox.addItem("V3D")
-        self.iridiumTypeComboBox.addItem("V3F")
+        for iridium_type in IRIDIUM_TYPES:
+            self.iridiumTypeComboBox.addItem(iridium_type)
 
         # GNSS sampling ratre drop box
-        self.gnssSampleRateComboBox.addItem("4 Hz")
-        self.gnssSampleRateComboBox.addItem("5 Hz")
-
-        self.lightGainComboBox.addItem("0.5x")
-        self.lightGainComboBox.addItem("1x")
-        self.lightGainComboBox.addItem("2x")
-        self.lightGainComboBox.addItem("4x")
-        self.lightGainComboBox.addItem("8x")
-        self.lightGainComboBox.addItem("16x")
-        self.lightGainComboBox.addItem("32x")
-        self.lightGainComboBox.addItem("64x")
-        self.lightGainComboBox.addItem("128x")
-        self.lightGainComboBox.addItem("256x")
-        self.lightGainComboBox.addItem("512x")
+        for rate in GNSS_SAMPLE_RATES:
+            self.gnssSampleRateComboBox.addItem(f"{rate} Hz")
+
+        for gain in LIGHT_GAINS:
+            self.lightGainComboBox.addItem(gain)
 
     def disableAllOptionalSensors(self):
         self.lightNumSamplesLabel.setDisabled(True)
@@ -771,14 +774,24 @@ class ProgrammerApp(QMainWindow):
         self.turbidityNumSamplesSpinBox.setDisabled(True)
 
         self.programButton.setDisabled(True)
+        self.programFleetButton.setDisabled(True)
         self.downloadConfigFile.setDisabled(True)
 
     def connectUIElements(self):
         self.worker.stdoutAvailable.connect(self.appendText)
         self.worker.stderrAvailable.connect(self.appendError)
+        self.worker.phaseFinished.connect(self.onPhaseFinished)
+        self.worker.progressAvailable.connect(self.onProgrammingProgress)
+        self.worker.phaseTimings.connect(self.onPhaseTimings)
         self.thread.started.connect(self.worker.run)
         self.worker.finished.connect(self.reenableGUI)
         self.worker.finished.connect(self.threadFinished)
+        self.firmwareDownloadWorker.progress.connect(self.onFirmwareDownloadProgress)
+        self.firmwareDownloadWorker.downloadFinished.connect(self.onFirmwareDownloadFinished)
+        self.readConfigWorker.stderrAvailable.connect(self.appendError)
+        self.readConfigWorker.configRead.connect(self.onDeviceConfigRead)
+        self.deviceMonitor.probeConnected.connect(self.onProbeConnected)
+        self.deviceMonitor.probeDisconnected.connect(self.onProbeDisconnected)
 
         self.ctEnableButton.clicked.connect(self.onCtEnabledClick)
         self.tempEnableButton.clicked.connect(self.onTempEnabledClick)
@@ -789,35 +802,40 @@ class ProgrammerApp(QMainWindow):
 
         self.verifyButton.clicked.connect(self.verifySettings)
         self.programButton.clicked.connect(self.programDevice)
+        self.programFleetButton.clicked.connect(self.programFleet)
+        self.readConfigButton.clicked.connect(self.readDeviceConfig)
         self.downloadConfigFile.clicked.connect(self.saveConfigAsFile)
 
-        self.lightNumSamplesSpinBox.valueChanged.connect(self.resetVerifyButton)
-        self.lightGainComboBox.currentIndexChanged.connect(self.resetVerifyButton)
-        self.turbidityNumSamplesSpinBox.valueChanged.connect(self.resetVerifyButton)
-        self.iridiumTxTimeSpinBox.valueChanged.connect(self.resetVerifyButton)
-        self.gnssNumSamplesSpinBox.valueChanged.connect(self.resetVerifyButton)
+        self.lightNumSamplesSpinBox.valueChanged.connect(self.scheduleValidation)
+        self.lightGainComboBox.currentIndexChanged.connect(self.scheduleValidation)
+        self.turbidityNumSamplesSpinBox.valueChanged.connect(self.scheduleValidation)
+        self.iridiumTxTimeSpinBox.valueChanged.connect(self.scheduleValidation)
+        self.gnssNumSamplesSpinBox.valueChanged.connect(self.scheduleValidation)
         self.gnssNumSamplesSpinBox.valueChanged.connect(self.onLightMatchGnssClicked)
         self.gnssNumSamplesSpinBox.valueChanged.connect(self.onTurbidityMatchGnssClicked)
         self.gnssSampleRateComboBox.currentIndexChanged.connect(self.onLightMatchGnssClicked)
         self.gnssSampleRateComboBox.currentIndexChanged.connect(self.onTurbidityMatchGnssClicked)
-        self.dutyCycleSpinBox.valueChanged.connect(self.resetVerifyButton)
-        self.gnssMaxAcquisitionTimeSpinBox.valueChanged.connect(self.resetVerifyButton)
-        self.trackingNumberSpinBox.valueChanged.connect(self.resetVerifyButton)
+        self.dutyCycleSpinBox.valueChanged.connect(self.scheduleValidation)
+        self.gnssMaxAcquisitionTimeSpinBox.valueChanged.connect(self.scheduleValidation)
+        self.trackingNumberSpinBox.valueChanged.connect(self.scheduleValidation)
 
-        self.iridiumTypeComboBox.currentIndexChanged.connect(self.resetVerifyButton)
-        self.gnssSampleRateComboBox.currentIndexChanged.connect(self.resetVerifyButton)
+        self.iridiumTypeComboBox.currentIndexChanged.connect(self.scheduleValidation)
+        self.gnssSampleRateComboBox.currentIndexChanged.connect(self.scheduleValidation)
+        self.turbiditySerialNumberSpinBox.valueChanged.connect(self.scheduleValidation)
+        self.gnssHighPerformanceModeCheckBox.toggled.connect(self.scheduleValidation)
+        self.validationTimer.timeout.connect(self.validateSettings)
 
     def onCtEnabledClick(self):
         if self.ctEnableButton.isChecked():
             self.tempEnableButton.setChecked(False)
 
-        self.resetVerifyButton()
+        self.scheduleValidation()
 
     def onTempEnabledClick(self):
         if self.tempEnableButton.isChecked():
             self.ctEnableButton.setChecked(False)
 
-        self.resetVerifyButton()
+        self.scheduleValidation()
 
     def onLightEnabledClick(self):
         if self.lightEnableButton.isChecked():
@@ -833,7 +851,7 @@ class ProgrammerApp(QMainWindow):
             self.lightGainLabel.setDisabled(True)
             self.lightGainComboBox.setDisabled(True)
 
-        self.resetVerifyButton()
+        self.scheduleValidation()
 
     def onLightMatchGnssClicked(self):
         get_int_from_str = lambda s: int(re.search(r'\d+', s).group()) if re.search(r'\d+', s) else None
@@ -844,7 +862,7 @@ class ProgrammerApp(QMainWindow):
         elif self.lightEnableButton.isChecked():
             self.lightNumSamplesSpinBox.setEnabled(True)
 
-        self.resetVerifyButton()
+        self.scheduleValidation()
 
     def onTurbidityEnabledClick(self):
         if self.turbidityEnableButton.isChecked():
@@ -860,7 +878,7 @@ class ProgrammerApp(QMainWindow):
             self.turbiditySerialNumberLabel.setDisabled(True)
             self.turbiditySerialNumberSpinBox.setDisabled(True)
 
-        self.resetVerifyButton()
+        self.scheduleValidation()
 
     def onTurbidityMatchGnssClicked(self):
         get_int_from_str = lambda s: int(re.search(r'\d+', s).group()) if re.search(r'\d+', s) else None
@@ -871,28 +889,32 @@ class ProgrammerApp(QMainWindow):
         elif self.turbidityEnableButton.isChecked():
             self.turbidityNumSamplesSpinBox.setEnabled(True)
 
-        self.resetVerifyButton()
-
-    def find_usb_port(self):
-
-        # List all available serial ports
-        ports = serial.tools.list_ports.comports()
-
-        stlink_ports = []
-
-        for port in ports:
-            # Check if the port is an STLINK
-            if "STLINK" in port.description.upper():
-                stlink_ports.append(port.device)
-                break
-
-        if stlink_ports:
-            for device in stlink_ports:
-                self.devicePortLabel.setStyleSheet("font-size: 14px; color: green;")
-                self.devicePortLabel.setText(f"STLink V3 found on port {device}")
-                self.device_connected = True
-                self.stlink_port = device
-                break
+        self.scheduleValidation()
+
+    def onProbeConnected(self, probe):
+        self.appendText(f"STLink {probe.serial_number or 'probe'} connected on port {probe.port}.")
+        self.updateProbeStatus()
+
+    def onProbeDisconnected(self, probe):
+        self.appendText(f"STLink {probe.serial_number or 'probe'} disconnected from port {probe.port}.")
+        # Whatever is plugged in next is treated as a new device
+        self.phaseProgress.forget(probe.serial_number or None)
+        self.updateProbeStatus()
+
+    def updateProbeStatus(self):
+        self.stlink_probes = self.deviceMonitor.registry.probes()
+
+        if len(self.stlink_probes) > 1:
+            self.devicePortLabel.setStyleSheet("font-size: 14px; color: green;")
+            self.devicePortLabel.setText(f"{len(self.stlink_probes)} STLink V3 probes found")
+            self.device_connected = True
+            self.stlink_port = self.stlink_probes[0].port
+        elif self.stlink_probes:
+            device = self.stlink_probes[0].port
+            self.devicePortLabel.setStyleSheet("font-size: 14px; color: green;")
+            self.devicePortLabel.setText(f"STLink V3 found on port {device}")
+            self.device_connected = True
+            self.stlink_port = device
         else:
             self.devicePortLabel.setStyleSheet("font-size: 14px; color: red;")
             self.devicePortLabel.setText("STLink V3 not found on any USB port.")
@@ -901,130 +923,148 @@ class ProgrammerApp(QMainWindow):
 
         self.devicePortLabel.setWordWrap(True)
 
-    def verifySettings(self):
-        # For getting GNSS sample rate from drop down box
-        get_int_from_str = lambda s: int(re.search(r'\d+', s).group()) if re.search(r'\d+', s) else None
+    def scheduleValidation(self):
+        # A burst of change signals (a spin box scrolling, the match GNSS handlers setting further values) becomes a
+        # single check once control returns to the event loop
+        if not self.validationTimer.isActive():
+            self.validationTimer.start()
 
-        settings_invalid = False
-        verify_strings = []
-
-        # Pull all the values from the UI
-        light_enabled = self.lightEnableButton.isChecked()
-        light_num_samples = self.lightNumSamplesSpinBox.value()
-        turbidity_enabled = self.turbidityEnableButton.isChecked()
-        turbidity_num_samples = self.turbidityNumSamplesSpinBox.value()
-        iridium_tx_time = self.iridiumTxTimeSpinBox.value()
-        num_gnss_samples = self.gnssNumSamplesSpinBox.value()
-        gnss_sample_rate = get_int_from_str(self.gnssSampleRateComboBox.currentText())
-        duty_cycle = self.dutyCycleSpinBox.value()
-        gnss_window_buffer = self.gnssMaxAcquisitionTimeSpinBox.value()
-
-        gnss_duration = (((num_gnss_samples / gnss_sample_rate) / 60) + 1) + gnss_window_buffer
-
-        if (duty_cycle - gnss_duration - iridium_tx_time) < 0:
-            verify_strings.append("Duty cycle not long enough to complete GNSS sample window.\n")
-            settings_invalid = True
-
-        if light_enabled:
-            if ((duty_cycle - ((light_num_samples / 30) + 1) - iridium_tx_time) < 0):
-                verify_strings.append("Duty cycle not long enough to complete Light sample window.\n")
-                settings_invalid = True
-            if (int((self.gnssNumSamplesSpinBox.value() / get_int_from_str(self.gnssSampleRateComboBox.currentText())
-                     / 2)) > 1800):
-                verify_strings.append("Max number of light samples is 1800.\n")
-                settings_invalid = True
-
-        if turbidity_enabled:
-            if ((duty_cycle - ((turbidity_num_samples / 60) + 1) - iridium_tx_time) < 0):
-                verify_strings.append("Duty cycle not long enough to complete Turbidity sample window.\n")
-                settings_invalid = True
-            if (int(self.gnssNumSamplesSpinBox.value() / get_int_from_str(self.gnssSampleRateComboBox.currentText()))
-                    > 3600):
-                verify_strings.append("Max number of turbidity samples is 3600.\n")
-                settings_invalid = True
-
-        if settings_invalid:
-            self.programButton.setDisabled(True)
-            self.downloadConfigFile.setDisabled(True)
-            self.verifyButton.setStyleSheet("""
-                background-color: red;
-                color: white;
-                border-radius: 5px;
-                font-size: 16px;
-                """)
+    def validateSettings(self):
+        self.validationTimer.stop()
 
-            write_string = "".join(verify_strings)
+        if not self.settings_validator.update(self.currentConfig()):
+            return
 
-            self.writeError(write_string)
-        else:
-            self.programButton.setEnabled(True)
-            self.downloadConfigFile.setEnabled(True)
-            self.verifyButton.setStyleSheet("""
-                background-color: green;
-                color: white;
-                border-radius: 5px;
-                font-size: 16px;
-                """)
-            self.writeText("Settings verified. You did a great job.")
+        problems = self.settings_validator.problems()
 
-    def resetVerifyButton(self):
-        self.colorScheme = QGuiApplication.styleHints().colorScheme()
+        field_problems = {}
+        for rule in problems:
+            for field in rule.fields:
+                field_problems.setdefault(field, []).append(rule.message.strip())
 
-        self.programButton.setDisabled(True)
-        self.downloadConfigFile.setDisabled(True)
-        self.verifyButton.setStyleSheet("""
-                background-color: gray;
+        # Only widgets whose problems changed are restyled
+        for field, widget in self.fieldWidgets.items():
+            tool_tip = "\n".join(field_problems.get(field, []))
+            if widget.toolTip() != tool_tip:
+                widget.setToolTip(tool_tip)
+                widget.setStyleSheet("border: 1px solid red;" if tool_tip else "")
+
+        self.validationLabel.setText("".join(rule.message for rule in problems).strip())
+        self.validationLabel.setVisible(bool(problems))
+        self.setSettingsVerified(not problems)
+
+    def setSettingsVerified(self, verified):
+        self.settings_verified = verified
+
+        # Left alone while a device is being programmed or read, reenableGUI() picks the state up afterwards
+        if self.verifyButton.isEnabled():
+            self.programButton.setEnabled(self.firmware_ready and verified)
+            self.programFleetButton.setEnabled(self.firmware_ready and verified)
+            self.downloadConfigFile.setEnabled(verified)
+
+        if verified != self.verify_button_verified:
+            self.verify_button_verified = verified
+            self.verifyButton.setStyleSheet("""
+                background-color: {};
                 color: white;
                 border-radius: 5px;
                 font-size: 16px;
-                """)
-        self.writeText("Configure as desired and press the Verify button when ready.")
+                """.format("green" if verified else "red"))
 
-    def writeError(self, err_str):
-        self.statusTextEdit.clear()
-
-        char_format = QTextCharFormat()
-        char_format.setForeground(QColor('red'))
+    def verifySettings(self):
+        self.validateSettings()
+        problems = self.settings_validator.problems()
 
-        self.statusTextEdit.setCurrentCharFormat(char_format)
+        if problems:
+            self.writeError("".join(rule.message for rule in problems))
+        else:
+            self.writeText("Settings verified. You did a great job.")
 
-        self.statusTextEdit.setText(err_str)
+    def writeError(self, err_str):
+        self.statusLog.clear()
+        self.statusLog.append(err_str, is_error=True)
 
     def writeText(self, err_str):
-        self.statusTextEdit.clear()
-        self.adjust_font_color_based_on_background(self.statusTextEdit)
-
-        self.statusTextEdit.setText(err_str)
+        self.statusLog.clear()
+        self.statusLog.append(err_str)
 
     def appendText(self, string):
-        self.adjust_font_color_based_on_background(self.statusTextEdit)
-
-        self.statusTextEdit.append(string)
+        self.statusLog.append(string)
 
     def appendError(self, string):
-        char_format = QTextCharFormat()
-        char_format.setForeground(QColor('red'))
-
-        self.statusTextEdit.setCurrentCharFormat(char_format)
-
-        self.statusTextEdit.append(string)
+        self.statusLog.append(string, is_error=True)
 
     def programDevice(self):
-
-        self.find_usb_port()
-
         if not self.device_connected:
             self.writeError("STLink programmer not detected.")
             return
 
         self.assembleBinaryConfigFile()
+        # The probe shown in the window, so the audit log records which one was used
+        self.worker.probe_serial = self.stlink_probes[0].serial_number or None
 
         self.writeText("Running STM32 Programmer CLI, please wait.")
 
+        # Progress bar is shared with the firmware download, which has finished by now
+        self.firmwareProgressBar.setMaximum(100)
+        self.firmwareProgressBar.setValue(0)
+        self.firmwareProgressBar.setFormat("Programming %p%")
+        self.firmwareProgressBar.show()
+
         self.disableGUI()
         # Run the worker thread so the program will be non-blocking
         self.thread.start()
 
+    def programFleet(self):
+        # Only needed once a fleet is programmed
+        from fleet_dialog import FleetProgrammingDialog
+
+        # The CLI can only address a probe by its USB serial number
+        probes = [probe for probe in self.stlink_probes if probe.serial_number]
+        if not probes:
+            self.writeError("STLink programmer not detected.")
+            return
+
+        dialog = FleetProgrammingDialog(probes, self.trackingNumberSpinBox.value(),
+                                        self.currentConfig, single_session=self.single_session,
+                                        differential=self.differential, backend=self.backend,
+                                        audit_log=self.auditLog, timing_trace=self.timingTrace,
+                                        progress=self.phaseProgress, parent=self)
+        self.disableGUI()
+        dialog.exec()
+        self.reenableGUI()
+
+    def readDeviceConfig(self):
+        if not self.device_connected:
+            self.writeError("STLink programmer not detected.")
+            return
+
+        self.writeText("Reading configuration from device, please wait.")
+        self.disableGUI()
+        self.readConfigWorker.start()
+
+    def onDeviceConfigRead(self, decoded):
+        self.reenableGUI()
+
+        if decoded is None:
+            return
+
+        device = decoded.config
+        settings = self.currentConfig()
+        differences = {name for name, _, _ in diff_configs(device, settings)}
+
+        self.writeText(f"Device configuration, written {decoded.compile_date} {decoded.compile_time}")
+        self.appendText(f"  {'Setting':<32}{'Device':<12}Current settings")
+        for name in MicroSWIFTConfig.__dataclass_fields__:
+            marker = "*" if name in differences else " "
+            self.appendText(f"{marker} {name:<32}{describe_field(name, getattr(device, name)):<12}"
+                            f"{describe_field(name, getattr(settings, name))}")
+
+        if differences:
+            self.appendText(f"\n{len(differences)} setting(s) differ from the current settings (marked *).")
+        else:
+            self.appendText("\nDevice matches the current settings.")
+
     def disableGUI(self):
         self.ctEnableButton.setDisabled(True)
         self.tempEnableButton.setDisabled(True)
@@ -1044,6 +1084,8 @@ class ProgrammerApp(QMainWindow):
         self.trackingNumberSpinBox.setDisabled(True)
         self.verifyButton.setDisabled(True)
         self.programButton.setDisabled(True)
+        self.programFleetButton.setDisabled(True)
+        self.readConfigButton.setDisabled(True)
         self.downloadConfigFile.setDisabled(True)
 
     def reenableGUI(self):
@@ -1070,8 +1112,58 @@ class ProgrammerApp(QMainWindow):
         self.gnssMaxAcquisitionTimeSpinBox.setEnabled(True)
         self.trackingNumberSpinBox.setEnabled(True)
         self.verifyButton.setEnabled(True)
-        self.programButton.setEnabled(True)
-        self.downloadConfigFile.setEnabled(True)
+        self.programButton.setEnabled(self.firmware_ready and self.settings_verified)
+        self.programFleetButton.setEnabled(self.firmware_ready and self.settings_verified)
+        self.readConfigButton.setEnabled(True)
+        self.downloadConfigFile.setEnabled(self.settings_verified)
+
+    def onFirmwareDownloadProgress(self, received, total, bytes_per_second):
+        if total:
+            self.firmwareProgressBar.setMaximum(total)
+            self.firmwareProgressBar.setValue(received)
+        self.firmwareProgressBar.setFormat(f"Firmware download %p% ({bytes_per_second / 1024:.0f} KB/s)")
+
+    def onFirmwareDownloadFinished(self, success, message):
+        self.firmwareProgressBar.hide()
+
+        if success:
+            self.firmware_ready = True
+            self.appendText(message)
+        else:
+            self.appendError(f"Unable to pull firmware from GitHub! {message}")
+
+            if self.firmwareDownloadWorker.cachedFirmwareAvailable():
+                answer = QMessageBox.question(self, "Firmware update failed",
+                                              "Unable to pull firmware from GitHub.\n\n"
+                                              f"Program devices with the local copy of {FIRMWARE_FILENAME}?")
+                self.firmware_ready = answer == QMessageBox.StandardButton.Yes
+            else:
+                self.appendError(f"No local copy of {FIRMWARE_FILENAME} in the firmware folder.")
+
+            if self.firmware_ready:
+                self.appendText("Using local copy of firmware.")
+
+        if self.settings_verified:
+            self.programButton.setEnabled(self.firmware_ready)
+            self.programFleetButton.setEnabled(self.firmware_ready)
+
+    def onProgrammingProgress(self, percent):
+        self.firmwareProgressBar.setMaximum(100)
+        self.firmwareProgressBar.setValue(percent)
+
+    def onPhaseFinished(self, name, success):
+        if success:
+            self.appendText(f"{name} programmed successfully.")
+        else:
+            self.appendError(f"{name} programming failed.")
+
+    def onPhaseTimings(self, spans):
+        self.appendText(format_timings(spans))
+        if self.timingTrace is not None:
+            try:
+                self.timingTrace.write(spans)
+            except OSError as e:
+                self.appendError(f"Unable to write timings to {self.timingTrace.path}: {e}")
 
     def displayPicture(self):
 
@@ -1081,28 +1173,80 @@ class ProgrammerApp(QMainWindow):
         self.scene.addItem(pixmapItem)
 
     def threadFinished(self):
+        self.firmwareProgressBar.hide()
         self.thread.quit()
         self.thread.wait()
         # os.remove(self.configFilePath)
 
 
 def main():
-    firmware_updated = False
-
     parser = argparse.ArgumentParser()
 
     parser.add_argument('--no_firmware_update', action='store_true',
                         help='Disable automatic firmware download')
+    parser.add_argument('--separate_cli_sessions', action='store_true',
+                        help='Launch STM32_Programmer_CLI once per programming phase instead of a single session')
+    parser.add_argument('--full_flash', action='store_true',
+                        help='Always write the full firmware image instead of only the flash sectors that changed')
+    parser.add_argument('--simulate', action='store_true',
+                        help='Program simulated devices instead of using STM32_Programmer_CLI (no probe needed)')
+    parser.add_argument('--simulator_failure_rate', type=float, default=0.0,
+                        help='Chance that each simulated programming operation fails')
+    parser.add_argument('--simulator_probes', type=int, default=4,
+                        help='Number of simulated STLinks (with --simulate)')
+    parser.add_argument('--status_log_lines', type=int, default=DEFAULT_MAX_LINES,
+                        help='Lines of output kept in the status box, older lines are dropped')
+    parser.add_argument('--audit_db', default=DEFAULT_DB_PATH,
+                        help='SQLite database every programmed device is logged to')
+    parser.add_argument('--no_audit_log', action='store_true', help='Do not log programmed devices')
+    parser.add_argument('--timing_trace', default=None, metavar='FILE',
+                        help='Append the timing of every phase and CLI step to FILE, as JSON lines or as a Chrome '
+                             'trace if it ends in .json')
+    parser.add_argument('--profile_startup', '--profile-startup', nargs='?', const='', default=None, metavar='JSON',
+                        help='Print the time taken by each step of startup up to the first paint of the window, then '
+                             'exit. The timings are also written to JSON if a file name is given')
 
     args = parser.parse_args()
 
-    if not args.no_firmware_update:
-        firmware_updated = download_microSWIFT_firmware()
+    startup_profile = None
+    if args.profile_startup is not None:
+        startup_profile = StartupProfile(STARTUP_TIME)
+        startup_profile.mark("imports")
 
     app = QtWidgets.QApplication(sys.argv)
 
-    programmer = ProgrammerApp(args.no_firmware_update, firmware_updated)
+    if startup_profile:
+        startup_profile.mark("QApplication")
+
+    # Firmware download runs in the background once the window is up
+    if args.simulate:
+        backend = SimulatedProgrammerBackend(probe_count=args.simulator_probes,
+                                             failure_rate=args.simulator_failure_rate)
+    else:
+        backend = STM32CubeProgrammerBackend()
+
+    programmer = ProgrammerApp(args.no_firmware_update, single_session=not args.separate_cli_sessions,
+                               differential=not args.full_flash, backend=backend, startup_profile=startup_profile,
+                               status_log_lines=args.status_log_lines,
+                               audit_db=None if args.no_audit_log else args.audit_db,
+                               timing_trace=args.timing_trace)
+    app.aboutToQuit.connect(programmer.firmwareDownloadWorker.cancel)
+    app.aboutToQuit.connect(programmer.deviceMonitor.cancel)
+    if programmer.auditLog is not None:
+        app.aboutToQuit.connect(programmer.auditLog.close)
+
+    if startup_profile:
+        def reportStartup():
+            startup_profile.mark("first paint")
+            startup_profile.report(args.profile_startup)
+            app.quit()
+
+        FirstPaintWatcher(programmer, reportStartup)
+
     programmer.show()
+
+    if startup_profile:
+        startup_profile.mark("show")
     sys.exit(app.exec())
 
 
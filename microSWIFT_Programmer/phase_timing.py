@@ -0,0 +1,274 @@
+"""
+Where programming time goes, aggregated across runs.
+
+    python microSWIFT_programmer.py timings programming_trace.jsonl
+    python microSWIFT_programmer.py timings --since 2026-06-01
+
+Every programming job is timed as a tree of spans: the job, each CLI session it runs (the differential readback and
+the programming session), each phase (firmware, configuration, RAM clear) and each step of the CLI as parsed from its
+output (SWD connect, open, erase, download, verify, read). The programmer, batch mode and the load test write the
+spans of every job to a trace file with --timing_trace, as JSON lines or, for a .json file, in the Chrome trace event
+format that chrome://tracing and Perfetto open.
+
+This report reads trace files, or the phase timings kept in the audit log if none are given, and prints the p50 and
+p95 of each phase and step per unit. Step timings are good to about a tenth of a second, the rate the CLI output is
+read at.
+
+Nothing here imports Qt.
+"""
+import argparse
+import json
+import re
+import sys
+import threading
+import time
+import uuid
+import zlib
+from dataclasses import dataclass, asdict
+from datetime import datetime
+
+from audit_log import query_jobs, to_utc, AuditLogError, DEFAULT_DB_PATH
+from stm32_cli import cli_steps
+
+# Order the categories are reported in
+CATEGORIES = ("job", "session", "phase", "step")
+
+# Differential firmware phases are named after the sector range they write, e.g. "Firmware 0x08000000-0x0801FFFF"
+SECTOR_RANGE_RE = re.compile(r'\s+0x[0-9A-Fa-f]+-0x[0-9A-Fa-f]+$')
+
+
+class TimingTraceError(Exception):
+    pass
+
+
+@dataclass
+class TimingSpan:
+    run: str  # shared by every span of one job
+    name: str
+    category: str  # one of CATEGORIES
+    start: float  # seconds since the epoch
+    duration: float  # seconds
+    phase: str = None  # phase a step belongs to
+    probe_serial: str = None
+    success: bool = True
+
+
+class TimingRecorder:
+    """Collects the TimingSpans of one programming job. Times are given as time.monotonic() values."""
+
+    def __init__(self, probe_serial=None):
+        self.probe_serial = probe_serial
+        self.run = uuid.uuid4().hex[:12]
+        self.spans = []
+        self.clock_offset = time.time() - time.monotonic()
+
+    def add(self, name, category, start, end, phase=None, success=True):
+        self.spans.append(TimingSpan(self.run, name, category, start + self.clock_offset, end - start, phase,
+                                     self.probe_serial, success))
+
+    def add_session(self, name, phases, results, line_times, start, end, success):
+        """
+        Adds a CLI session, its phases and its steps from (time.monotonic(), line) pairs of its output. results are
+        the session's PhaseResults, phases without a duration never started. The step the session ended in is marked
+        failed if the session failed.
+        """
+        self.add(name, "session", start, end, success=success)
+
+        steps = cli_steps(line_times, start, end)
+        phase_starts = {}
+        for index, (step, phase_index, step_start, step_end) in enumerate(steps):
+            phase = phases[phase_index].name if phase_index is not None and phase_index < len(phases) else None
+            phase_starts.setdefault(phase_index, step_start)
+            self.add(step, "step", step_start, step_end, phase, success or index < len(steps) - 1)
+
+        for index, result in enumerate(results):
+            if result.duration is not None and index in phase_starts:
+                self.add(result.name, "phase", phase_starts[index], phase_starts[index] + result.duration,
+                         success=result.success)
+
+
+class TimingTrace:
+    """
+    Appends the spans of each job to a trace file, as JSON lines or, if path ends in .json, as Chrome trace events.
+    write() may be called from any thread.
+
+    Chrome trace files are written in its JSON array format with the closing bracket left off, which the trace
+    viewers accept, so runs can keep appending to the same file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.chrome = path.lower().endswith(".json")
+        self.lock = threading.Lock()
+        self.named_threads = set()
+
+    def write(self, spans):
+        """Raises OSError if the file cannot be written."""
+        with self.lock:
+            with open(self.path, 'a') as f:
+                if not self.chrome:
+                    f.writelines(json.dumps(asdict(span)) + "\n" for span in spans)
+                    return
+
+                if f.tell() == 0:
+                    f.write("[\n")
+                for event in self.chrome_events(spans):
+                    f.write(json.dumps(event) + ",\n")
+
+    def chrome_events(self, spans):
+        for span in spans:
+            # One timeline row per STLink
+            thread_id = zlib.crc32((span.probe_serial or "").encode())
+            if thread_id not in self.named_threads:
+                self.named_threads.add(thread_id)
+                yield {"name": "thread_name", "ph": "M", "pid": 1, "tid": thread_id,
+                       "args": {"name": f"STLink {span.probe_serial or '(first found)'}"}}
+
+            name = f"{span.phase}: {span.name}" if span.phase else span.name
+            yield {"name": name, "cat": span.category, "ph": "X", "ts": round(span.start * 1e6),
+                   "dur": round(span.duration * 1e6), "pid": 1, "tid": thread_id, "args": asdict(span)}
+
+
+def read_trace(path):
+    """TimingSpans from a trace file written by TimingTrace. Raises TimingTraceError if it cannot be read."""
+    try:
+        with open(path) as f:
+            text = f.read()
+    except OSError as e:
+        raise TimingTraceError(f"Unable to read {path}: {e}")
+
+    try:
+        if text.lstrip().startswith("["):
+            events = json.loads(text.rstrip().rstrip("]").rstrip().rstrip(",") + "]")
+            return [TimingSpan(**event["args"]) for event in events if event.get("ph") == "X"]
+        return [TimingSpan(**json.loads(line)) for line in text.splitlines() if line.strip()]
+    except (ValueError, TypeError, KeyError) as e:
+        raise TimingTraceError(f"{path} is not a timing trace: {e}")
+
+
+def audit_spans(records):
+    """TimingSpans for the jobs and phases of AuditRecords, which do not have CLI steps."""
+    spans = []
+    for record in records:
+        run = f"audit-{record.id}"
+        start = datetime.fromisoformat(record.started).timestamp()
+        if record.duration is not None:
+            spans.append(TimingSpan(run, "job", "job", start, record.duration, None, record.probe_serial,
+                                    record.success))
+        for phase in record.phases:
+            if phase["duration"] is not None:
+                spans.append(TimingSpan(run, phase["name"], "phase", start, phase["duration"], None,
+                                        record.probe_serial, phase["success"]))
+    return spans
+
+
+def phase_key(name):
+    return SECTOR_RANGE_RE.sub("", name)
+
+
+def run_totals(spans):
+    """
+    Seconds spent on each phase and step of one job, as {key: (category, seconds)}. Differential firmware phases
+    are added together as "Firmware", and steps are keyed by their phase, e.g. "Firmware: erase".
+    """
+    totals = {}
+    for span in sorted(spans, key=lambda span: CATEGORIES.index(span.category)):
+        if span.category == "job":
+            key = "total"
+        elif span.category == "session":
+            key = f"{span.name} session"
+        elif span.category == "step" and span.phase:
+            key = f"{phase_key(span.phase)}: {span.name}"
+        else:
+            key = phase_key(span.name)
+
+        category, seconds = totals.get(key, (span.category, 0.0))
+        totals[key] = (category, seconds + span.duration)
+
+    return totals
+
+
+def format_timings(spans):
+    """One line summary of a job's spans for the status output."""
+    totals = run_totals(spans)
+    shown = [key for key, (category, _) in totals.items()
+             if category == "phase" or key in ("connect", "readback session")]
+    shown += [key for key in ("total",) if key in totals]
+    return "Timings: " + ", ".join(f"{key} {totals[key][1]:.1f} s" for key in shown)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def group_runs(spans):
+    runs = {}
+    for span in spans:
+        runs.setdefault(span.run, []).append(span)
+    return runs
+
+
+def print_report(runs, indent=""):
+    """Prints the count, p50, p95 and mean of every phase and step over runs, {run: spans}."""
+    samples = {}
+    for spans in runs.values():
+        for key, (category, seconds) in run_totals(spans).items():
+            samples.setdefault(key, (category, []))[1].append(seconds)
+
+    keys = sorted(samples, key=lambda key: CATEGORIES.index(samples[key][0]))
+    width = max(map(len, keys), default=0) + 2
+    print(f"{indent}{'':<{width}}{'runs':>6}{'p50':>9}{'p95':>9}{'mean':>9}")
+    for key in keys:
+        values = samples[key][1]
+        print(f"{indent}{key:<{width}}{len(values):>6}{percentile(values, 0.5):>8.2f}s{percentile(values, 0.95):>8.2f}s"
+              f"{sum(values) / len(values):>8.2f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="microSWIFT_programmer.py timings", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('traces', nargs='*', help='Trace files written with --timing_trace')
+    parser.add_argument('--audit_db', default=DEFAULT_DB_PATH,
+                        help=f'Audit database to read phase timings from if no trace is given (default '
+                             f'{DEFAULT_DB_PATH})')
+    parser.add_argument('--probe', default=None, help='Only jobs run through this STLink serial number')
+    parser.add_argument('--since', type=to_utc, default=None, help='Only jobs from this local date/time on')
+    parser.add_argument('--include_failed', action='store_true',
+                        help='Also count jobs that failed, which stop part way through')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.traces:
+            spans = [span for path in args.traces for span in read_trace(path)]
+        else:
+            spans = audit_spans(query_jobs(args.audit_db, probe_serial=args.probe, since=args.since))
+    except (TimingTraceError, AuditLogError) as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    since = datetime.fromisoformat(args.since).timestamp() if args.since else None
+    runs = {}
+    for run, run_spans in group_runs(spans).items():
+        jobs = [span for span in run_spans if span.category == "job"]
+        if not jobs:
+            continue
+        if not args.include_failed and not jobs[0].success:
+            continue
+        if args.probe is not None and jobs[0].probe_serial != args.probe:
+            continue
+        if since is not None and jobs[0].start < since:
+            continue
+        runs[run] = run_spans
+
+    if not runs:
+        print("No completed jobs to report on.")
+        return 0
+
+    print(f"Time per unit over {len(runs)} jobs")
+    print_report(runs)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+class ProgrammerSession:
+    """
+    One connection to a target through a programmer backend.
+
+    Operations are queued with download(), read_memory() and reset() and carried out in order by execute(), so a
+    backend that drives an external tool can run the whole session in a single launch. Backends report what they do
+    in STM32_Programmer_CLI's output format, which is what the phase parsing in stm32_cli reads.
+    """
+
+    def __init__(self, connect_args):
+        self.connect_args = tuple(connect_args)
+        self.operations = []
+
+    def download(self, path, address=None, verify=False):
+        """Writes path to the target, at address for raw .bin files or at its own load addresses for ELF files."""
+        self.operations.append(("download", path, address, verify))
+        return self
+
+    def read_memory(self, address, size, path):
+        """Reads size bytes starting at address into the file path."""
+        self.operations.append(("read", address, size, path))
+        return self
+
+    def reset(self):
+        self.operations.append(("reset",))
+        return self
+
+    def execute(self, on_stdout, on_stderr, on_progress=None):
+        """
+        Connects and runs the queued operations, stopping at the first failure.
+
+        Returns (returncode, output) where returncode is 0 on success and None if the backend could not be run.
+        """
+        raise NotImplementedError
+
+
+class ProgrammerBackend:
+    """Something that can program a microSWIFT: STM32_Programmer_CLI, or the simulator for hardware-free testing."""
+
+    name = ""
+    # Probes are USB devices, so USB hot-plug events mean the probe list may have changed
+    usb_probes = False
+
+    def list_probes(self):
+        """Returns a StlinkProbe for every probe this backend can program through."""
+        raise NotImplementedError
+
+    def session(self, connect_args=("port=SWD",)):
+        raise NotImplementedError
@@ -0,0 +1,320 @@
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, asdict
+
+from audit_log import AuditRecord, utc_timestamp
+from differential_flash import (plan_differential_phases, load_sector_table, contiguous_runs, changed_sectors,
+                                ElfParseError, ERASED_BYTE)
+from firmware_cache import sha256_of_file
+from microSWIFT_config import unpack_config, read_config_file, ConfigDecodeError, CONFIG_STRUCT_SIZE
+from phase_timing import TimingRecorder
+from stm32_cli import (run_programming_session, run_separate_sessions, read_memory_ranges, ProgrammingPhase,
+                       PhaseResult, STM32CubeProgrammerBackend, DEFAULT_PHASES, CONFIG_PATH, CONFIG_ADDRESS,
+                       FIRMWARE_PATH)
+
+# Waits (seconds) before each automatic retry of the phases left after a failure
+RETRY_DELAYS = (1.0, 2.0, 4.0)
+# Completed phases are forgotten after this long (seconds) without another run of the job
+RESUME_TIMEOUT = 15 * 60
+
+
+@dataclass
+class ProgrammingJob:
+    config_path: str = CONFIG_PATH
+    firmware_path: str = FIRMWARE_PATH
+    probe_serial: str = None  # None connects to whichever probe the CLI finds first
+    # Firmware, configuration and RAM clear in one CLI launch/SWD connect instead of three
+    single_session: bool = True
+    # Only rewrite the flash sectors that differ from the firmware image
+    differential: bool = True
+    retry_delays: tuple = RETRY_DELAYS
+
+    def connect_args(self):
+        if self.probe_serial:
+            return "port=SWD", f"sn={self.probe_serial}"
+        return ("port=SWD",)
+
+    def phases(self):
+        firmware, config, ram_clear = DEFAULT_PHASES
+        return [ProgrammingPhase(firmware.name, self.firmware_path, verify=firmware.verify),
+                ProgrammingPhase(config.name, self.config_path, CONFIG_ADDRESS),
+                ram_clear]
+
+
+class PhaseProgress:
+    """
+    Phases completed on the device attached through each probe, so running the same job again resumes at the first
+    phase that did not complete. Progress only carries over to a job writing the same files (new settings or firmware
+    start over), and is forgotten when the job completes, the probe is unplugged or after RESUME_TIMEOUT. A probe can
+    stay plugged in while the device on it is swapped, so run_programming_job reads the completed phases back with
+    verify_completed before skipping them. Safe to use from any thread.
+    """
+
+    def __init__(self, timeout=RESUME_TIMEOUT):
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.jobs = {}  # probe serial: (job fingerprint, completed phase names, time.monotonic() of the last update)
+
+    def completed(self, probe_serial, fingerprint):
+        """Names of the phases already completed by the job with fingerprint on probe_serial's device."""
+        with self.lock:
+            entry = self.jobs.get(probe_serial)
+
+        if entry is None or entry[0] != fingerprint or time.monotonic() - entry[2] > self.timeout:
+            return set()
+        return set(entry[1])
+
+    def update(self, probe_serial, fingerprint, completed):
+        with self.lock:
+            self.jobs[probe_serial] = (fingerprint, frozenset(completed), time.monotonic())
+
+    def forget(self, probe_serial):
+        with self.lock:
+            self.jobs.pop(probe_serial, None)
+
+
+def audit_record(job, backend, started, duration, results, success, exit_codes):
+    """An AuditRecord of a finished job, what was written is read back from the job's files."""
+    try:
+        with open(job.config_path, 'rb') as f:
+            config = f.read()
+    except OSError:
+        config = None
+
+    try:
+        tracking_number = unpack_config(config).config.tracking_number
+    except (ConfigDecodeError, TypeError):
+        tracking_number = None
+
+    firmware_sha256 = sha256_of_file(job.firmware_path) if os.path.isfile(job.firmware_path) else None
+
+    return AuditRecord(started, tracking_number, job.probe_serial, firmware_sha256, config, success, duration,
+                       [asdict(result) for result in results], exit_codes, backend.name)
+
+
+def _phase_content(phase):
+    if not os.path.isfile(phase.file):
+        return None
+
+    if phase.address == CONFIG_ADDRESS:
+        # The struct is stamped with the time it was packed, so it is the settings that identify the job
+        try:
+            return repr(read_config_file(phase.file).config)
+        except ConfigDecodeError:
+            pass
+
+    return sha256_of_file(phase.file)
+
+
+def job_fingerprint(phases):
+    """What a job writes, phase by phase. Progress only carries over between jobs with the same fingerprint."""
+    return tuple((phase.name, phase.address, _phase_content(phase)) for phase in phases)
+
+
+def verify_completed(job, backend, phases, work_dir, on_stdout, on_stderr, on_progress=None, timing=None):
+    """
+    Reads back what phases, the first of job.phases(), wrote to the device, all in one connect. Returns how many of
+    them, from the first, the device still holds. Only the firmware and configuration can be read back, a phase after
+    either of them is never counted.
+    """
+    ranges = []
+    checks = []  # (phase kind, what it wrote, index of its first range in ranges, number of ranges)
+    for phase in phases:
+        if phase.file == job.firmware_path:
+            cache_dir = os.path.join(os.path.dirname(phase.file), "cache")
+            try:
+                table = load_sector_table(phase.file, sha256_of_file(phase.file), cache_dir)
+            except (OSError, ElfParseError):
+                break
+            runs = contiguous_runs(table)
+            checks.append(("firmware", table, len(ranges), len(runs)))
+            ranges += runs
+        elif phase.address == CONFIG_ADDRESS:
+            checks.append(("config", _phase_content(phase), len(ranges), 1))
+            ranges.append((CONFIG_ADDRESS, CONFIG_STRUCT_SIZE))
+        else:
+            break
+
+    if not checks:
+        return 0
+
+    on_stdout("Checking the device still holds what was programmed on it...")
+    paths = read_memory_ranges(backend, ranges, work_dir, on_stdout, on_stderr, job.connect_args(), on_progress,
+                               timing)
+    if paths is None:
+        return 0
+
+    verified = 0
+    for kind, expected, first, count in checks:
+        if kind == "firmware":
+            held = not changed_sectors(expected, ranges[first:first + count], paths[first:first + count])
+        else:
+            with open(paths[first], 'rb') as f:
+                data = f.read()
+            try:
+                held = repr(unpack_config(data).config) == expected
+            except ConfigDecodeError:
+                held = False
+
+        if not held:
+            break
+        verified += 1
+
+    return verified
+
+
+def _run_phases(job, backend, phases, work_dir, on_stdout, on_stderr, on_progress, timing):
+    """
+    Runs phases, a tail of job.phases(), once. The firmware phase is narrowed down to the changed sectors first if the
+    job is differential.
+
+    Returns (PhaseResults, success of each of phases, exit code of each CLI session run).
+    """
+    results = []
+    run = phases
+    firmware_count = None  # how many of the phases run write the firmware, if it was split into sectors
+
+    if job.differential and phases[0].file == job.firmware_path:
+        firmware_phases = plan_differential_phases(backend, phases[0].file, work_dir, on_stdout, on_stderr,
+                                                   job.connect_args(), on_progress, timing)
+        if firmware_phases is not None:
+            if not firmware_phases:
+                on_stdout("Firmware on device is unchanged, skipping firmware download.")
+                results.append(PhaseResult(phases[0].name, True, 0.0))
+            firmware_count = len(firmware_phases)
+            run = firmware_phases + phases[1:]
+
+    if job.single_session:
+        session_results = run_programming_session(backend, run, on_stdout, on_stderr, job.connect_args(),
+                                                  on_progress, timing)
+    else:
+        session_results = run_separate_sessions(backend, run, on_stdout, on_stderr, job.connect_args(), on_progress,
+                                                timing)
+
+    if firmware_count is None:
+        succeeded = [result.success for result in session_results]
+    else:
+        succeeded = ([all(result.success for result in session_results[:firmware_count])] +
+                     [result.success for result in session_results[firmware_count:]])
+
+    # Phases run in a single session share its exit code
+    exit_codes = [result.returncode for result in session_results if result.returncode is not None]
+    if job.single_session:
+        exit_codes = exit_codes[:1]
+
+    return results + session_results, succeeded, exit_codes
+
+
+def run_programming_job(job, on_stdout, on_stderr, on_phase, backend=None, on_progress=None, audit_log=None,
+                        on_timings=None, progress=None):
+    """
+    Programs one device. on_phase(name, success) is called for every phase and on_progress(percent) as the CLI
+    reports progress on the current operation. The job is added to audit_log if one is given. on_timings(spans) is
+    called once at the end with a TimingSpan for the job and each of its sessions, phases and CLI steps.
+
+    When a phase fails, the job waits each of job.retry_delays in turn and carries on from that phase, phases that
+    completed are not run again. If progress (a PhaseProgress) is given, the job also resumes where an earlier run of
+    the same job on the same probe stopped, once the device has been read back to check it holds those phases.
+    Returns True if all phases succeeded.
+    """
+    backend = backend or STM32CubeProgrammerBackend()
+    phases = job.phases()
+    results = []
+    exit_codes = []
+    started = utc_timestamp()
+    start = time.monotonic()
+    timing = TimingRecorder(job.probe_serial) if on_timings is not None else None
+
+    fingerprint = job_fingerprint(phases) if progress is not None else None
+    completed = progress.completed(job.probe_serial, fingerprint) if progress is not None else set()
+    resume_at = next((i for i, phase in enumerate(phases) if phase.name not in completed), len(phases))
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        if resume_at:
+            verified = verify_completed(job, backend, phases[:resume_at], work_dir, on_stdout, on_stderr, on_progress,
+                                        timing)
+            if verified < resume_at:
+                on_stderr(f"{phases[verified].name} programmed earlier is not on this device, it may have been "
+                          f"swapped. Programming from {phases[verified].name}.")
+                resume_at = verified
+                completed = {phase.name for phase in phases[:resume_at]}
+
+        if resume_at:
+            on_stdout(f"{', '.join(phase.name for phase in phases[:resume_at])} already programmed on this device, "
+                      f"resuming at {phases[resume_at].name}.")
+            for phase in phases[:resume_at]:
+                on_phase(phase.name, True)
+                results.append(PhaseResult(phase.name, True, 0.0))
+        remaining = phases[resume_at:]
+        retry_delays = iter(job.retry_delays)
+
+        while remaining:
+            attempt_results, succeeded, attempt_exit_codes = _run_phases(job, backend, remaining, work_dir,
+                                                                         on_stdout, on_stderr, on_progress, timing)
+            for result in attempt_results:
+                on_phase(result.name, result.success)
+            results += attempt_results
+            exit_codes += attempt_exit_codes
+
+            # The CLI stops at the first failure, so the phases that completed are the ones before it
+            done = next((i for i, success in enumerate(succeeded) if not success), len(succeeded))
+            completed |= {phase.name for phase in remaining[:done]}
+            remaining = remaining[done:]
+            if progress is not None and remaining:
+                progress.update(job.probe_serial, fingerprint, completed)
+
+            delay = next(retry_delays, None)
+            # Nothing to retry if the CLI could not be run at all
+            if not remaining or delay is None or not attempt_exit_codes:
+                break
+
+            on_stderr(f"{remaining[0].name} failed, retrying in {delay:g} s.")
+            time.sleep(delay)
+
+    success = not remaining
+    end = time.monotonic()
+
+    # A finished job leaves nothing to resume, the next one is a new device
+    if progress is not None and success:
+        progress.forget(job.probe_serial)
+
+    if audit_log is not None:
+        audit_log.add(audit_record(job, backend, started, end - start, results, success, exit_codes))
+
+    if timing is not None:
+        timing.add("job", "job", start, end, success=success)
+        on_timings(timing.spans)
+
+    return success
+
+
+def read_device_config(on_stdout, on_stderr, backend=None, probe_serial=None, on_progress=None):
+    """
+    Reads the configuration struct off a device in one short connect, nothing is written.
+
+    Returns a DecodedConfig, or None if it could not be read or the device has never been configured.
+    """
+    backend = backend or STM32CubeProgrammerBackend()
+    connect_args = ProgrammingJob(probe_serial=probe_serial).connect_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        paths = read_memory_ranges(backend, [(CONFIG_ADDRESS, CONFIG_STRUCT_SIZE)], work_dir, on_stdout, on_stderr,
+                                   connect_args, on_progress)
+        if paths is None:
+            on_stderr("Unable to read the configuration from the device.")
+            return None
+
+        with open(paths[0], 'rb') as f:
+            data = f.read()
+
+    if data == bytes([ERASED_BYTE]) * CONFIG_STRUCT_SIZE:
+        on_stderr("Configuration block is erased, this device has not been configured.")
+        return None
+
+    try:
+        return unpack_config(data)
+    except ConfigDecodeError as e:
+        on_stderr(f"Unable to decode the device configuration: {e}")
+        return None
@@ -0,0 +1,120 @@
+"""
+Load test for the programming pipeline against the simulated programmer backend, no probe or target needed.
+
+    python programming_load_test.py --devices 16 --parallel 8 --rounds 2 --failure_rate 0.02
+
+Runs the same fleet jobs the Program Fleet dialog does and reports per-unit timings, the p50/p95 of every phase and
+step, and line throughput. The second and later rounds reprogram the same simulated units, which exercises the
+differential flash path.
+"""
+import argparse
+import os
+import statistics
+import struct
+import sys
+import tempfile
+import time
+
+from fleet_programming import run_fleet
+from phase_timing import TimingTrace, print_report, percentile
+from programming_job import ProgrammingJob, RETRY_DELAYS
+from simulated_backend import SimulatedProgrammerBackend
+from stm32_cli import FIRMWARE_PATH
+
+
+def write_synthetic_elf(path, size, load_address=0x08000000):
+    """Writes a minimal 32-bit ARM ELF with one PT_LOAD segment of random bytes, a stand-in firmware image."""
+    payload = os.urandom(size)
+    phoff = 52
+    header = struct.pack("<16sHHIIIIIHHHHHH", b'\x7fELF\x01\x01\x01' + bytes(9), 2, 40, 1, load_address, phoff, 0, 0,
+                         52, 32, 1, 40, 0, 0)
+    program_header = struct.pack("<IIIIIIII", 1, phoff + 32, load_address, load_address, size, size, 5, 4)
+
+    with open(path, 'wb') as f:
+        f.write(header + program_header + payload)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--devices', type=int, default=16, help='Number of simulated STLinks/units')
+    parser.add_argument('--parallel', type=int, default=8, help='Maximum jobs run at once')
+    parser.add_argument('--rounds', type=int, default=1, help='Times the whole fleet is programmed')
+    parser.add_argument('--failure_rate', type=float, default=0.0, help='Chance each simulated operation fails')
+    parser.add_argument('--time_scale', type=float, default=1.0,
+                        help='Multiplier on simulated latencies, 0 runs as fast as possible')
+    parser.add_argument('--firmware', default=None,
+                        help=f'Firmware ELF to program (default {FIRMWARE_PATH}, or a synthetic image if missing)')
+    parser.add_argument('--synthetic_firmware_kb', type=int, default=1024,
+                        help='Size of the synthetic firmware image when no ELF is available')
+    parser.add_argument('--full_flash', action='store_true', help='Disable differential flashing')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for the simulated failures')
+    parser.add_argument('--timing_trace', default=None,
+                        help='Append the timing spans of every unit to this file (JSON lines, Chrome trace for .json)')
+    args = parser.parse_args(argv)
+
+    trace = TimingTrace(os.path.abspath(args.timing_trace)) if args.timing_trace else None
+
+    # Firmware paths are relative to the application folder, as in the GUI
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    backend = SimulatedProgrammerBackend(probe_count=args.devices, failure_rate=args.failure_rate,
+                                         time_scale=args.time_scale, seed=args.seed)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        firmware_path = args.firmware or FIRMWARE_PATH
+        if not os.path.isfile(firmware_path):
+            firmware_path = os.path.join(work_dir, "synthetic.elf")
+            write_synthetic_elf(firmware_path, args.synthetic_firmware_kb * 1024)
+            print(f"Using synthetic {args.synthetic_firmware_kb} KB firmware image")
+
+        config_path = os.path.join(work_dir, "config.bin")
+        with open(config_path, 'wb') as f:
+            f.write(bytes(64))
+
+        for round_number in range(1, args.rounds + 1):
+            # Retry backoff runs on the same simulated clock as the operations
+            jobs = [ProgrammingJob(config_path=config_path, firmware_path=firmware_path,
+                                   probe_serial=probe.serial_number, differential=not args.full_flash,
+                                   retry_delays=tuple(delay * args.time_scale for delay in RETRY_DELAYS))
+                    for probe in backend.list_probes()]
+            started = {}
+            durations = {}
+            timings = {}
+
+            # Units are timed from their first output, not from submission, so queueing is left out
+            def on_output(serial, text):
+                started.setdefault(serial, time.monotonic())
+
+            def on_job_finished(serial, success):
+                durations[serial] = time.monotonic() - started.get(serial, start)
+
+            def on_timings(serial, spans):
+                timings[serial] = spans
+                if trace is not None:
+                    trace.write(spans)
+
+            start = time.monotonic()
+            results = run_fleet(jobs, on_output, on_output,
+                                lambda serial, name, success: None, on_job_finished, max_workers=args.parallel,
+                                backend=backend, on_timings=on_timings)
+            wall_time = time.monotonic() - start
+
+            passed = [serial for serial, success in results.items() if success]
+            times = list(durations.values())
+
+            print(f"Round {round_number}: {len(passed)}/{len(results)} passed in {wall_time:.2f} s "
+                  f"({len(passed) / wall_time * 3600:.0f} units/hour)")
+            print(f"  per unit: mean {statistics.mean(times):.2f} s, p50 {percentile(times, 0.5):.2f} s, "
+                  f"p95 {percentile(times, 0.95):.2f} s, max {max(times):.2f} s")
+            if passed:
+                print_report({serial: timings[serial] for serial in passed}, indent="  ")
+
+            failed = sorted(set(results) - set(passed))
+            if failed:
+                print(f"  failed: {', '.join(failed)}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Writes the over-the-air .sbd configuration file for every microSWIFT in a fleet manifest in one pass.
+
+    python microSWIFT_programmer.py sbd fleet.csv --out_dir sbd
+
+The manifest format is described in fleet_manifest.py. Every row is checked up front (the Verify button's rules,
+field ranges, unique tracking numbers and the 80 character .sbd filename limit) and nothing is written unless all of
+them pass. The structs are packed in a single vectorized call, and an index CSV listing each file with its size and
+SHA-256 is written alongside them for scripting the Iridium upload. Manifest columns left out or empty take their
+DEFAULT_CONFIG value, the index lists those fields for each file and the summary says which fields were defaulted.
+
+Nothing here imports Qt.
+"""
+import argparse
+import csv
+import hashlib
+import os
+import sys
+from datetime import datetime
+
+from fleet_manifest import read_manifest, ManifestError, CONFIG_FIELDS
+from microSWIFT_config import (DEFAULT_CONFIG, config_array, pack_configs, CONFIG_STRUCT_SIZE, SBD_EXTENSION,
+                               SBD_MAX_FILENAME_LENGTH)
+
+DEFAULT_NAME_TEMPLATE = "microSWIFT_{tracking_number}_config" + SBD_EXTENSION
+INDEX_FILENAME = "sbd_index.csv"
+
+
+def sbd_filename(template, config):
+    """Fills in the filename template from a MicroSWIFTConfig. Returns (filename, error or None)."""
+    try:
+        filename = template.format(**vars(config))
+    except (KeyError, IndexError, ValueError) as e:
+        return None, f"Bad filename template {template!r}: {e}"
+
+    if os.path.basename(filename) != filename:
+        return None, f"Filename {filename!r} must not contain a directory"
+    if not filename.endswith(SBD_EXTENSION):
+        return None, f"Filename {filename!r} must end in {SBD_EXTENSION}"
+    if len(filename) > SBD_MAX_FILENAME_LENGTH:
+        return None, f"Filename {filename!r} is {len(filename)} characters, the limit is {SBD_MAX_FILENAME_LENGTH}"
+
+    return filename, None
+
+
+def write_atomically(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="microSWIFT_programmer.py sbd", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('manifest', help='CSV file with one row per microSWIFT')
+    parser.add_argument('--out_dir', default=None, help='Folder the .sbd files are written to (default <manifest>_sbd)')
+    parser.add_argument('--name_template', default=DEFAULT_NAME_TEMPLATE,
+                        help='Filename for each unit, any configuration field can be used '
+                             f'(default "{DEFAULT_NAME_TEMPLATE}")')
+    parser.add_argument('--overwrite', action='store_true', help='Replace .sbd files that already exist')
+    args = parser.parse_args(argv)
+
+    manifest_path = os.path.abspath(args.manifest)
+    out_dir = os.path.abspath(args.out_dir or os.path.splitext(manifest_path)[0] + "_sbd")
+
+    try:
+        rows = read_manifest(manifest_path)
+    except ManifestError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    filenames = []
+    errors = []
+    seen_filenames = set()
+
+    for row in rows:
+        filename, error = sbd_filename(args.name_template, row.config)
+        row_errors = list(row.errors)
+        if error:
+            row_errors.append(error)
+        elif filename in seen_filenames:
+            row_errors.append(f"Filename {filename} is used by more than one unit")
+        elif not args.overwrite and os.path.exists(os.path.join(out_dir, filename)):
+            row_errors.append(f"{filename} already exists in {out_dir} (use --overwrite to replace it)")
+
+        seen_filenames.add(filename)
+        filenames.append(filename)
+        errors += [f"Line {row.line}: {error}" for error in row_errors]
+
+    if errors:
+        print("\n".join(errors), file=sys.stderr)
+        print(f"{len(errors)} problem(s) found, no files written.", file=sys.stderr)
+        return 1
+
+    if not rows:
+        print("Manifest has no units.", file=sys.stderr)
+        return 1
+
+    # One timestamp and one packing call for the whole fleet
+    generated = datetime.now().replace(microsecond=0)
+    structs = memoryview(pack_configs(config_array((row.config for row in rows), generated)))
+
+    os.makedirs(out_dir, exist_ok=True)
+    index = []
+
+    for i, (row, filename) in enumerate(zip(rows, filenames)):
+        data = structs[i * CONFIG_STRUCT_SIZE:(i + 1) * CONFIG_STRUCT_SIZE]
+        write_atomically(os.path.join(out_dir, filename), data)
+        index.append({"filename": filename, "tracking_number": row.config.tracking_number, "bytes": len(data),
+                      "sha256": hashlib.sha256(data).hexdigest(), "generated": generated.isoformat(),
+                      "defaulted": " ".join(row.defaulted)})
+
+    index_path = os.path.join(out_dir, INDEX_FILENAME)
+    with open(index_path + ".tmp", 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(index[0]))
+        writer.writeheader()
+        writer.writerows(index)
+    os.replace(index_path + ".tmp", index_path)
+
+    print(f"Wrote {len(index)} .sbd files to {out_dir}, index in {INDEX_FILENAME}")
+
+    defaulted = [name for name in CONFIG_FIELDS if any(name in row.defaulted for row in rows)]
+    for name in defaulted:
+        units = sum(name in row.defaulted for row in rows)
+        print(f"  {name} not in the manifest for {units} unit(s), used the default {getattr(DEFAULT_CONFIG, name)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+import os
+import random
+import threading
+import time
+
+from differential_flash import read_load_segments, ElfParseError, FLASH_BASE, FLASH_SIZE, SECTOR_SIZE, ERASED_BYTE
+from programmer_backend import ProgrammerBackend, ProgrammerSession
+from stlink_probes import StlinkProbe
+
+# STM32U5A5 SRAM1-3 and SRAM5
+RAM_BASE = 0x20000000
+RAM_SIZE = 0x270000
+
+# Number of progress bar updates printed per operation, like the CLI's 50 character bar
+PROGRESS_STEPS = 10
+
+
+class SimulatedTarget:
+    """Flash and RAM contents of one simulated microSWIFT."""
+
+    def __init__(self):
+        self.flash = bytearray([ERASED_BYTE]) * FLASH_SIZE
+        self.ram = bytearray(RAM_SIZE)
+        self.lock = threading.Lock()
+
+    def region(self, address, size):
+        """Returns (memory, offset) for an address range, or (None, None) if it is not mapped."""
+        if FLASH_BASE <= address and address + size <= FLASH_BASE + FLASH_SIZE:
+            return self.flash, address - FLASH_BASE
+        if RAM_BASE <= address and address + size <= RAM_BASE + RAM_SIZE:
+            return self.ram, address - RAM_BASE
+        return None, None
+
+    def erase(self, address, size):
+        """Erases the flash sectors covering an address range, returns their numbers. RAM is left alone."""
+        memory, offset = self.region(address, size)
+        if memory is None:
+            raise ValueError(f"Address 0x{address:08X} is not mapped")
+        if memory is not self.flash:
+            return []
+
+        sectors = list(range(offset // SECTOR_SIZE, (offset + size - 1) // SECTOR_SIZE + 1))
+        with self.lock:
+            for sector in sectors:
+                memory[sector * SECTOR_SIZE:(sector + 1) * SECTOR_SIZE] = bytes([ERASED_BYTE]) * SECTOR_SIZE
+
+        return sectors
+
+    def write(self, address, data):
+        memory, offset = self.region(address, len(data))
+        if memory is None:
+            raise ValueError(f"Address 0x{address:08X} is not mapped")
+
+        with self.lock:
+            memory[offset:offset + len(data)] = data
+
+    def read(self, address, size):
+        memory, offset = self.region(address, size)
+        if memory is None:
+            raise ValueError(f"Address 0x{address:08X} is not mapped")
+
+        with self.lock:
+            return bytes(memory[offset:offset + size])
+
+
+class SimulatedProgrammerBackend(ProgrammerBackend):
+    """
+    Stand-in for STM32_Programmer_CLI that needs no probe or target.
+
+    Each probe serial gets its own emulated target whose flash and RAM persist between sessions, so read-back,
+    differential flashing and retries behave as they would on hardware. Timing follows the configured connect latency
+    and transfer rates, scaled by time_scale (0 runs as fast as possible), and failure_rate is the chance that any
+    single operation fails the way a flaky SWD connection does.
+    """
+
+    name = "simulator"
+
+    def __init__(self, probe_count=4, connect_latency=0.4, write_rate=64 * 1024, read_rate=512 * 1024,
+                 failure_rate=0.0, time_scale=1.0, seed=None):
+        self.probes = [StlinkProbe(f"SIM{i:04d}", f"sim{i}") for i in range(probe_count)]
+        self.connect_latency = connect_latency
+        self.write_rate = write_rate  # bytes per second
+        self.read_rate = read_rate
+        self.failure_rate = failure_rate
+        self.time_scale = time_scale
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.targets = {}
+        self.targets_lock = threading.Lock()
+
+    def list_probes(self):
+        return list(self.probes)
+
+    def session(self, connect_args=("port=SWD",)):
+        return SimulatedSession(self, connect_args)
+
+    def target(self, serial):
+        with self.targets_lock:
+            return self.targets.setdefault(serial, SimulatedTarget())
+
+    def should_fail(self):
+        with self.random_lock:
+            return self.random.random() < self.failure_rate
+
+    def sleep(self, seconds):
+        if self.time_scale > 0:
+            time.sleep(seconds * self.time_scale)
+
+
+class SimulatedSession(ProgrammerSession):
+    def __init__(self, backend, connect_args):
+        super().__init__(connect_args)
+        self.backend = backend
+        self.serial = backend.probes[0].serial_number if backend.probes else "SIM0000"
+        for arg in self.connect_args:
+            if arg.startswith("sn="):
+                self.serial = arg[len("sn="):]
+
+    def execute(self, on_stdout, on_stderr, on_progress=None):
+        output = []
+
+        def emit(*lines):
+            output.extend(lines)
+            on_stdout("\n".join(lines))
+
+        emit("      -------------------------------------------------------------------",
+             "                        STM32CubeProgrammer (simulated)",
+             "      -------------------------------------------------------------------",
+             "")
+
+        self.backend.sleep(self.backend.connect_latency)
+        if self.backend.should_fail():
+            emit("Error: No STM32 target found! If your product embeds Debug Authentication, please perform a "
+                 "discovery using Debug Authentication")
+            return self.fail(on_stderr, output)
+
+        target = self.backend.target(self.serial)
+        emit(f"ST-LINK SN  : {self.serial}",
+             "ST-LINK FW  : V3J15M7",
+             "Board       : --",
+             "Voltage     : 3.28V",
+             "SWD freq    : 8000 KHz",
+             "Connect mode: Normal",
+             "Reset mode  : Software reset",
+             "Device ID   : 0x481",
+             "Device name : STM32U5Fx/STM32U5Gx",
+             "Flash size  : 4 MBytes",
+             "Device type : MCU",
+             "Device CPU  : Cortex-M33",
+             "")
+
+        for operation in self.operations:
+            if operation[0] == "download":
+                ok = self.perform_download(target, *operation[1:], emit=emit, on_progress=on_progress)
+            elif operation[0] == "read":
+                ok = self.perform_read(target, *operation[1:], emit=emit, on_progress=on_progress)
+            else:
+                emit("MCU Reset", "Software reset is performed", "")
+                ok = True
+
+            if not ok:
+                return self.fail(on_stderr, output)
+
+        return 0, "\n".join(output)
+
+    def fail(self, on_stderr, output):
+        on_stderr("\nProgramming Failed with code 1")
+        return 1, "\n".join(output)
+
+    def progress(self, size, rate, on_progress):
+        for step in range(PROGRESS_STEPS + 1):
+            if on_progress:
+                on_progress(step * 100 // PROGRESS_STEPS)
+            if step < PROGRESS_STEPS:
+                self.backend.sleep(size / rate / PROGRESS_STEPS)
+
+    def perform_download(self, target, path, address, verify, emit, on_progress):
+        name = os.path.basename(path)
+        emit("", "", "Memory Programming ...", f"Opening and parsing file: {name}")
+
+        try:
+            if address is None:
+                segments = read_load_segments(path)
+            else:
+                with open(path, 'rb') as f:
+                    segments = [(address, f.read())]
+        except (OSError, ElfParseError) as e:
+            emit(f"Error: Wrong file format or file not found: {e}")
+            return False
+
+        size = sum(len(data) for _, data in segments)
+        emit(f"  File          : {name}",
+             f"  Size          : {size / 1024:.2f} KB",
+             f"  Address       : 0x{segments[0][0]:08X}" if segments else "  Address       : --",
+             "")
+
+        start = time.monotonic()
+        try:
+            # Like the CLI, every sector the file touches is erased before anything is written
+            for index, (segment_address, data) in enumerate(segments):
+                erased = target.erase(segment_address, len(data)) if data else []
+                if erased:
+                    emit(f"Erasing memory corresponding to segment {index}:",
+                         f"Erasing internal memory sectors [{erased[0]} {erased[-1]}]")
+            for segment_address, data in segments:
+                target.write(segment_address, data)
+        except ValueError as e:
+            emit(f"Error: {e}")
+            return False
+
+        emit("Download in Progress:")
+        self.progress(size, self.backend.write_rate, on_progress)
+
+        if self.backend.should_fail():
+            emit("", "Error: failed to download Segment[0]", "Error: failed to download the File")
+            return False
+
+        elapsed = time.monotonic() - start
+        emit("", "File download complete",
+             f"Time elapsed during download operation: 00:00:{elapsed:06.3f}")
+
+        if verify:
+            emit("", "", "Verifying ...", "", "", "Read progress:")
+            self.progress(size, self.backend.read_rate, on_progress)
+            if self.backend.should_fail():
+                emit("", "Error: Data mismatch found at address  0x{:08X} (byte = 0x00 instead of 0xFF)"
+                     .format(segments[0][0]), "Error: Download verification failed")
+                return False
+            emit("", "Download verified successfully ", "")
+
+        return True
+
+    def perform_read(self, target, address, size, path, emit, on_progress):
+        emit("", "", "Reading data...", "")
+        self.progress(size, self.backend.read_rate, on_progress)
+
+        if self.backend.should_fail():
+            emit("Error: Uploading data failed")
+            return False
+
+        try:
+            data = target.read(address, size)
+        except ValueError as e:
+            emit(f"Error: {e}")
+            return False
+
+        with open(path, 'wb') as f:
+            f.write(data)
+
+        emit("", "Data read successfully", f"The data read from address 0x{address:08X} was saved to: {path}", "")
+        return True
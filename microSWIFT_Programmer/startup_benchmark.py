@@ -0,0 +1,98 @@
+"""
+Startup benchmark for the microSWIFT programmer and the OBS calibrator.
+
+    python startup_benchmark.py --runs 5
+    QT_QPA_PLATFORM=offscreen python startup_benchmark.py --app programmer --budget 1.0
+
+Each run launches the application in a fresh interpreter with --profile_startup and times it from launch to the first
+paint of its window, interpreter startup included. The per-step timings the application reports are averaged across
+runs. Exits with status 1 if the median startup of any application goes over its budget (seconds).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name: (script, working directory, arguments, budget in seconds)
+APPS = {
+    # No firmware download, it is on a background thread anyway and the network would dominate the timing
+    "programmer": ("microSWIFT_Programmer/microSWIFT_programmer.py", "microSWIFT_Programmer",
+                   ["--no_firmware_update", "--profile_startup"], 1.0),
+    # The calibrator loads its second QML file relative to the repo folder
+    "obs": ("OBS_Calibrator/OBS_Calibrator.py", ".", ["--profile-startup"], 1.5),
+}
+
+# A run that has not painted its window by then has hung
+RUN_TIMEOUT = 60
+
+
+def time_startup(script, work_dir, args, json_path):
+    """Runs one startup. Returns (seconds from launch to first paint, {step: seconds})."""
+    launched_at = time.time()
+    subprocess.run([sys.executable, os.path.join(REPO_DIR, script), *args, json_path],
+                   cwd=os.path.join(REPO_DIR, work_dir), stdout=subprocess.DEVNULL, timeout=RUN_TIMEOUT, check=True)
+
+    with open(json_path) as f:
+        profile = json.load(f)
+
+    return profile["finished_at"] - launched_at, profile["phases"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--app', choices=[*APPS, "all"], default="all", help='Application to benchmark')
+    parser.add_argument('--runs', type=int, default=5, help='Launches per application')
+    parser.add_argument('--budget', type=float, default=None,
+                        help='Maximum median startup in seconds (default per application: ' +
+                             ", ".join(f"{name} {app[3]:g}" for name, app in APPS.items()) + ')')
+    args = parser.parse_args(argv)
+
+    over_budget = []
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        json_path = os.path.join(work_dir, "startup.json")
+
+        for name in APPS if args.app == "all" else [args.app]:
+            script, app_dir, app_args, budget = APPS[name]
+            budget = args.budget if args.budget is not None else budget
+
+            totals = []
+            phases = {}
+            for _ in range(args.runs):
+                try:
+                    total, run_phases = time_startup(script, app_dir, app_args, json_path)
+                except (subprocess.SubprocessError, OSError, ValueError, KeyError) as e:
+                    print(f"{name}: startup failed ({e})", file=sys.stderr)
+                    return 2
+
+                totals.append(total)
+                for phase, seconds in run_phases.items():
+                    phases.setdefault(phase, []).append(seconds)
+
+            median = statistics.median(totals)
+            print(f"{name}: median {median * 1000:.0f} ms, first run {totals[0] * 1000:.0f} ms, "
+                  f"best {min(totals) * 1000:.0f} ms over {args.runs} runs (budget {budget * 1000:.0f} ms)")
+            for phase, seconds in phases.items():
+                print(f"  {phase:<16}{statistics.mean(seconds) * 1000:8.1f} ms")
+            # Whatever the application does not time itself, mostly starting the interpreter
+            unprofiled = statistics.mean(totals) - sum(map(statistics.mean, phases.values()))
+            print(f"  {'unprofiled':<16}{unprofiled * 1000:8.1f} ms")
+
+            if median > budget:
+                over_budget.append(name)
+
+    if over_budget:
+        print(f"Startup over budget: {', '.join(over_budget)}", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
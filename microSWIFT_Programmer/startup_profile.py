@@ -0,0 +1,40 @@
+import json
+import time
+
+
+class StartupProfile:
+    """
+    Time spent in each step of starting the application, for --profile_startup.
+
+    Steps are marked in order as they finish, each one timed from the mark before it. start is the time.perf_counter()
+    value the first step is timed from.
+    """
+
+    def __init__(self, start):
+        self.start = start
+        self.last = start
+        self.phases = []  # (name, seconds)
+        self.last_wall_time = time.time()
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+        self.last_wall_time = time.time()
+
+    def total(self):
+        return self.last - self.start
+
+    def report(self, json_path=None):
+        """
+        Prints the steps as a table. If json_path is given, they are also written there as JSON along with the wall
+        clock time of the last mark, which startup_benchmark.py compares with the time it launched the process.
+        """
+        print("Startup profile:")
+        for name, seconds in self.phases:
+            print(f"  {name:<16}{seconds * 1000:8.1f} ms")
+        print(f"  {'total':<16}{self.total() * 1000:8.1f} ms")
+
+        if json_path:
+            with open(json_path, 'w') as f:
+                json.dump({"phases": dict(self.phases), "total": self.total(), "finished_at": self.last_wall_time}, f)
@@ -0,0 +1,146 @@
+from collections import deque
+
+from PyQt6 import QtCore, QtWidgets
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex
+from PyQt6.QtGui import QColor, QGuiApplication, QKeySequence
+
+# Lines kept before the oldest are dropped
+DEFAULT_MAX_LINES = 5000
+# Appended lines are collected and shown at most this often (milliseconds)
+FLUSH_INTERVAL = 50
+
+ERROR_COLOR = QColor('red')
+
+
+def text_color_for_background(background):
+    """White text on a near black background, black on anything else."""
+    if background.red() < 50 and background.green() < 50 and background.blue() < 50:
+        return QColor(Qt.GlobalColor.white)
+    return QColor(Qt.GlobalColor.black)
+
+
+class StatusLogModel(QAbstractListModel):
+    """
+    The last max_lines lines of status output, each one plain text or an error.
+
+    Lines appended in quick succession are held back and added to the model together once every FLUSH_INTERVAL, so a
+    chatty CLI costs one view update per interval instead of one per line.
+    """
+
+    def __init__(self, max_lines=DEFAULT_MAX_LINES, parent=None):
+        super().__init__(parent)
+        self.max_lines = max_lines
+        self.lines = deque()  # (text, is_error)
+        self.pending = []
+        self.text_color = None
+
+        self.flushTimer = QtCore.QTimer(self)
+        self.flushTimer.setSingleShot(True)
+        self.flushTimer.setInterval(FLUSH_INTERVAL)
+        self.flushTimer.timeout.connect(self.flush)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.lines)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.lines):
+            return None
+
+        text, is_error = self.lines[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return text
+        if role == Qt.ItemDataRole.ForegroundRole:
+            return ERROR_COLOR if is_error else self.text_color
+        return None
+
+    def append(self, text, is_error=False):
+        self.pending += [(line, is_error) for line in text.splitlines() or [""]]
+        if not self.flushTimer.isActive():
+            self.flushTimer.start()
+
+    def clear(self):
+        self.flushTimer.stop()
+        self.pending = []
+        self.beginResetModel()
+        self.lines.clear()
+        self.endResetModel()
+
+    def flush(self):
+        self.flushTimer.stop()
+        if not self.pending:
+            return
+
+        new_lines = self.pending[-self.max_lines:]
+        self.pending = []
+
+        dropped = len(self.lines) + len(new_lines) - self.max_lines
+        if dropped > 0:
+            self.beginRemoveRows(QModelIndex(), 0, dropped - 1)
+            for _ in range(dropped):
+                self.lines.popleft()
+            self.endRemoveRows()
+
+        self.beginInsertRows(QModelIndex(), len(self.lines), len(self.lines) + len(new_lines) - 1)
+        self.lines.extend(new_lines)
+        self.endInsertRows()
+
+    def setTextColor(self, color):
+        self.text_color = color
+        if self.lines:
+            self.dataChanged.emit(self.index(0), self.index(len(self.lines) - 1), [Qt.ItemDataRole.ForegroundRole])
+
+    def toPlainText(self):
+        self.flush()
+        return "\n".join(text for text, _ in self.lines)
+
+
+class StatusLogView(QtWidgets.QListView):
+    """
+    Shows a StatusLogModel. Only the visible lines are laid out, and the view follows new output while it is
+    scrolled to the bottom. Selected lines can be copied.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setUniformItemSizes(True)
+        self.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+        self.follow_output = True
+
+    def setModel(self, model):
+        if self.model() is not None:
+            self.model().rowsAboutToBeInserted.disconnect(self.onRowsAboutToBeInserted)
+            self.model().rowsInserted.disconnect(self.onRowsInserted)
+
+        super().setModel(model)
+
+        model.rowsAboutToBeInserted.connect(self.onRowsAboutToBeInserted)
+        model.rowsInserted.connect(self.onRowsInserted)
+        self.updateTextColor()
+        self.scrollToBottom()
+
+    def onRowsAboutToBeInserted(self):
+        scroll_bar = self.verticalScrollBar()
+        self.follow_output = scroll_bar.value() == scroll_bar.maximum()
+
+    def onRowsInserted(self):
+        if self.follow_output:
+            self.scrollToBottom()
+
+    def updateTextColor(self):
+        # Worked out once per palette rather than for every line
+        if self.model() is not None:
+            self.model().setTextColor(text_color_for_background(self.palette().color(self.viewport().backgroundRole())))
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QtCore.QEvent.Type.PaletteChange:
+            self.updateTextColor()
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.StandardKey.Copy):
+            rows = sorted(index.row() for index in self.selectedIndexes())
+            QGuiApplication.clipboard().setText("\n".join(self.model().data(self.model().index(row)) for row in rows))
+            return
+        super().keyPressEvent(event)
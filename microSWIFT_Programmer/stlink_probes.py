@@ -0,0 +1,22 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class StlinkProbe:
+    serial_number: str
+    port: str
+
+
+def find_stlink_probes():
+    """Returns every attached STLink, identified by the USB serial number the CLI accepts as sn=<serial>."""
+    # Imported here so loading the programmer does not wait on pyserial, scans run on the device monitor's thread
+    import serial.tools.list_ports
+
+    probes = []
+
+    # List all available serial ports, each STLink V3 exposes one virtual COM port
+    for port in serial.tools.list_ports.comports():
+        if "STLINK" in port.description.upper():
+            probes.append(StlinkProbe(port.serial_number or "", port.device))
+
+    return probes
@@ -0,0 +1,375 @@
+import os
+import platform
+import queue
+import re
+import shutil
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+
+from programmer_backend import ProgrammerBackend, ProgrammerSession
+from stlink_probes import find_stlink_probes
+
+FIRMWARE_PATH = "firmware/microSWIFT_V2.2.elf"
+CONFIG_PATH = "firmware/config.bin"
+RAM_CLEAR_PATH = "firmware/zeros_64k.bin"
+
+# Location of the microSWIFT_configuration struct (USERVARS region in microSWIFT.ld)
+CONFIG_ADDRESS = 0x083FFC00
+# Start of the RAM region cleared so the firmware does not pick up stale persistent state
+RAM_CLEAR_ADDRESS = 0x200C0000
+
+ANSI_ESCAPE_RE = re.compile(r'\x1b\[[0-9;]*[mG]')
+# Progress bar lines, e.g. "  ███████████████████ 100%", carry nothing but the bar and a percentage
+PROGRESS_RE = re.compile(r'^[\s\u2588\u2591\u2592\u2593#=.>-]*(\d{1,3})%\s*$')
+OPENING_FILE_RE = re.compile(r'Opening and parsing file:\s*(\S+)')
+
+# Output lines that start (or, with None, end) each step of a CLI session. The session starts with the SWD connect,
+# which ends when the CLI lists the target it connected to.
+CLI_STEP_MARKERS = [
+    (re.compile(r'Device name\s*:'), None),
+    (OPENING_FILE_RE, "open"),
+    (re.compile(r'Erasing memory'), "erase"),
+    (re.compile(r'Download in Progress'), "download"),
+    (re.compile(r'File download complete'), None),
+    (re.compile(r'Verifying \.\.\.'), "verify"),
+    (re.compile(r'Download verified successfully'), None),
+    (re.compile(r'Reading data'), "read"),
+    (re.compile(r'Data read successfully'), None),
+]
+
+# Output is handed to the GUI at most this often (seconds) so a chatty CLI does not flood the event loop
+OUTPUT_BATCH_INTERVAL = 0.1
+
+
+def find_programmer_cli():
+    systemOS = platform.system()
+
+    if systemOS == "Darwin":  # MacOS
+        return ("/Applications/STMicroelectronics/STM32Cube/STM32CubeProgrammer/"
+                "STM32CubeProgrammer.app/Contents/MacOs/bin/STM32_Programmer_CLI")
+    elif systemOS == "Windows":
+        return ("C:\\Program Files\\STMicroelectronics\\STM32Cube\\STM32CubeProgrammer\\bin"
+                "\\STM32_Programmer_CLI.exe")
+    else:  # Linux installs put the CLI on the PATH
+        return shutil.which("STM32_Programmer_CLI") or "STM32_Programmer_CLI"
+
+
+@dataclass
+class ProgrammingPhase:
+    name: str
+    file: str
+    address: int = None  # None for ELF files, which carry their own load addresses
+    verify: bool = False
+
+
+@dataclass
+class PhaseResult:
+    name: str
+    success: bool
+    duration: float = None  # seconds from the phase's file being opened to the next phase or the end of the session
+    returncode: int = None  # exit code of the session the phase ran in, None if it could not be run
+
+
+DEFAULT_PHASES = [
+    ProgrammingPhase("Firmware", FIRMWARE_PATH, verify=True),
+    ProgrammingPhase("Configuration", CONFIG_PATH, CONFIG_ADDRESS),
+    ProgrammingPhase("RAM clear", RAM_CLEAR_PATH, RAM_CLEAR_ADDRESS),
+]
+
+
+def build_session(backend, phases, connect_args=("port=SWD",)):
+    """One backend session that connects once and runs every phase's download in order."""
+    session = backend.session(connect_args)
+    for phase in phases:
+        session.download(phase.file, phase.address, phase.verify)
+    return session
+
+
+def parse_phase_results(phases, output, returncode):
+    """
+    Works out which phases completed from the CLI output.
+
+    The CLI runs its commands in order and stops at the first failure, so every phase up to the last one that
+    reported "File download complete" (and "Download verified successfully" if verifying) succeeded.
+    """
+    results = []
+    phase_index = -1
+    completed = [False] * len(phases)
+    verified = [False] * len(phases)
+
+    for line in output.splitlines():
+        if OPENING_FILE_RE.search(line) and phase_index < len(phases) - 1:
+            phase_index += 1
+        elif phase_index >= 0 and "File download complete" in line:
+            completed[phase_index] = True
+        elif phase_index >= 0 and "Download verified successfully" in line:
+            verified[phase_index] = True
+
+    for i, phase in enumerate(phases):
+        success = completed[i] and (verified[i] or not phase.verify)
+        # A zero exit code means the CLI ran everything, even if its output format changed under us
+        results.append(PhaseResult(phase.name, success or returncode == 0))
+
+    return results
+
+
+def phase_durations(phases, line_times, end_time):
+    """
+    Works out how long each phase took from (time.monotonic(), line) pairs of the session's output. A phase runs from
+    its "Opening and parsing file" line to the next phase's, the last one until end_time. Phases the CLI never got to
+    take None.
+    """
+    starts = [time for time, line in line_times if OPENING_FILE_RE.search(line)][:len(phases)]
+    ends = starts[1:] + [end_time]
+    durations = [end - start for start, end in zip(starts, ends)]
+    return durations + [None] * (len(phases) - len(durations))
+
+
+def cli_steps(line_times, start_time, end_time):
+    """
+    Splits a session into its steps (connect, open, erase, download, verify, read) from (time.monotonic(), line)
+    pairs of its output. Returns (step, phase index, start, end) tuples in order, phase index counting the files
+    opened and None for steps outside a download. A step still running when the output stopped ends at end_time.
+    """
+    steps = []
+    current = ("connect", None, start_time)
+    phase_index = None
+
+    for line_time, line in line_times:
+        for marker, step in CLI_STEP_MARKERS:
+            if marker.search(line):
+                break
+        else:
+            continue
+
+        if step == "open":
+            phase_index = 0 if phase_index is None else phase_index + 1
+        # The CLI prints a line per erased segment, that is still the one erase
+        if current is not None and current[0] == step:
+            continue
+        if current is not None:
+            steps.append((*current, line_time))
+        current = (step, phase_index if step != "read" else None, line_time) if step else None
+
+    if current is not None:
+        steps.append((*current, end_time))
+
+    return steps
+
+
+def _read_lines(stream, lines, is_error):
+    for line in stream:
+        lines.put((is_error, line.rstrip("\n")))
+    stream.close()
+
+
+class _OutputBatcher:
+    """Collects output lines and hands them on as one block at most every OUTPUT_BATCH_INTERVAL seconds."""
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.lines = []
+        self.last_flush = time.monotonic()
+
+    def add(self, line):
+        self.lines.append(line)
+        if time.monotonic() - self.last_flush >= OUTPUT_BATCH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        if self.lines:
+            self.callback("\n".join(self.lines))
+            self.lines = []
+        self.last_flush = time.monotonic()
+
+
+def run_cli(command, on_stdout, on_stderr, on_progress=None):
+    """
+    Runs one CLI command, streaming its cleaned output line by line as it is produced.
+
+    stdout and stderr are read on background threads so neither pipe can fill up and stall the CLI. Output is passed
+    on in batches, and the percentages of the CLI's progress bars go to on_progress(percent) instead of the text
+    output. Returns (returncode, output), returncode None on failure.
+    """
+    output_lines = []
+    stdout_batch = _OutputBatcher(on_stdout)
+    stderr_batch = _OutputBatcher(on_stderr)
+    last_percent = None
+
+    try:
+        # Text mode turns the carriage returns the progress bars redraw with into line breaks
+        process = subprocess.Popen(command, text=True, bufsize=1, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+        lines = queue.Queue()
+        readers = [threading.Thread(target=_read_lines, args=(process.stdout, lines, False), daemon=True),
+                   threading.Thread(target=_read_lines, args=(process.stderr, lines, True), daemon=True)]
+        for reader in readers:
+            reader.start()
+
+        while any(reader.is_alive() for reader in readers) or not lines.empty():
+            try:
+                is_error, line = lines.get(timeout=OUTPUT_BATCH_INTERVAL)
+            except queue.Empty:
+                stdout_batch.flush()
+                stderr_batch.flush()
+                continue
+
+            line = ANSI_ESCAPE_RE.sub('', line)
+
+            progress = PROGRESS_RE.match(line)
+            if progress:
+                percent = int(progress.group(1))
+                if on_progress and percent != last_percent:
+                    on_progress(percent)
+                last_percent = percent
+                continue
+
+            if is_error:
+                stderr_batch.add(line)
+            else:
+                output_lines.append(line)
+                stdout_batch.add(line)
+
+        process.wait()
+        stdout_batch.flush()
+        stderr_batch.flush()
+
+        if process.returncode != 0:
+            on_stderr(f"\nProgramming Failed with code {process.returncode}")
+
+        return process.returncode, "\n".join(output_lines)
+
+    except Exception as e:
+        stdout_batch.flush()
+        stderr_batch.flush()
+        on_stderr(f"Unexpected error: {str(e)}")
+
+    return None, "\n".join(output_lines)
+
+
+class STM32CubeProgrammerSession(ProgrammerSession):
+    def __init__(self, programmer_path, connect_args):
+        super().__init__(connect_args)
+        self.programmer_path = programmer_path
+
+    def command(self):
+        command = [self.programmer_path, "--connect", *self.connect_args]
+
+        for operation in self.operations:
+            if operation[0] == "download":
+                _, path, address, verify = operation
+                command += ["--download", path]
+                if address is not None:
+                    command.append(f"0x{address:08X}")
+                if verify:
+                    command.append("--verify")
+            elif operation[0] == "read":
+                _, address, size, path = operation
+                command += ["--upload", f"0x{address:08X}", str(size), path]
+            elif operation[0] == "reset":
+                command.append("-rst")
+
+        return command
+
+    def execute(self, on_stdout, on_stderr, on_progress=None):
+        return run_cli(self.command(), on_stdout, on_stderr, on_progress)
+
+
+class STM32CubeProgrammerBackend(ProgrammerBackend):
+    """Runs every session as a single STM32_Programmer_CLI launch."""
+
+    name = "stm32cubeprogrammer"
+    usb_probes = True
+
+    def __init__(self, programmer_path=None):
+        self.programmer_path = programmer_path or find_programmer_cli()
+
+    def list_probes(self):
+        return find_stlink_probes()
+
+    def session(self, connect_args=("port=SWD",)):
+        return STM32CubeProgrammerSession(self.programmer_path, connect_args)
+
+
+def _timed_output(on_stdout, line_times):
+    """Wraps on_stdout to also record (time.monotonic(), line) for every line of output in line_times."""
+    def on_output(text):
+        # Output arrives in batches, so timings are good to about OUTPUT_BATCH_INTERVAL
+        now = time.monotonic()
+        line_times.extend((now, line) for line in text.split("\n"))
+        on_stdout(text)
+
+    return on_output
+
+
+def run_programming_session(backend, phases, on_stdout, on_stderr, connect_args=("port=SWD",), on_progress=None,
+                            timing=None):
+    """
+    Runs phases in a single backend session and returns a PhaseResult for each. The session, its phases and its CLI
+    steps are added to timing (a phase_timing.TimingRecorder) if one is given.
+    """
+    line_times = []
+    start = time.monotonic()
+
+    returncode, output = build_session(backend, phases, connect_args).execute(_timed_output(on_stdout, line_times),
+                                                                              on_stderr, on_progress)
+    end = time.monotonic()
+
+    if returncode is None:
+        results = [PhaseResult(phase.name, False) for phase in phases]
+    else:
+        results = parse_phase_results(phases, output, returncode)
+        for result, duration in zip(results, phase_durations(phases, line_times, end)):
+            result.duration = duration
+            result.returncode = returncode
+
+    if timing is not None:
+        timing.add_session("program", phases, results, line_times, start, end, returncode == 0)
+
+    return results
+
+
+def read_memory_ranges(backend, ranges, out_dir, on_stdout, on_stderr, connect_args=("port=SWD",),
+                       on_progress=None, timing=None):
+    """
+    Reads each (address, size) range into a .bin file in out_dir over a single connect. The session is added to
+    timing if one is given.
+
+    Returns the list of file paths in the same order as ranges, or None if the read failed.
+    """
+    session = backend.session(connect_args)
+    paths = []
+    line_times = []
+
+    for address, size in ranges:
+        path = os.path.join(out_dir, f"readback_{address:08X}.bin")
+        session.read_memory(address, size, path)
+        paths.append(path)
+
+    start = time.monotonic()
+    returncode, _ = session.execute(_timed_output(on_stdout, line_times), on_stderr, on_progress)
+
+    if timing is not None:
+        timing.add_session("readback", [], [], line_times, start, time.monotonic(), returncode == 0)
+
+    if returncode != 0 or not all(os.path.isfile(path) for path in paths):
+        return None
+
+    return paths
+
+
+def run_separate_sessions(backend, phases, on_stdout, on_stderr, connect_args=("port=SWD",), on_progress=None,
+                          timing=None):
+    """Legacy mode, one session (CLI launch) per phase. Stops at the first failed phase."""
+    results = []
+
+    for phase in phases:
+        if results and not results[-1].success:
+            results.append(PhaseResult(phase.name, False))
+            continue
+        results += run_programming_session(backend, [phase], on_stdout, on_stderr, connect_args, on_progress,
+                                           timing)
+
+    return results